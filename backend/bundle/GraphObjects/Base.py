@@ -1,11 +1,26 @@
 from __future__ import annotations
 from abc import ABCMeta
-from typing import Union, Iterable, Mapping, Type, MutableMapping, List, Callable
+from typing import Union, Iterable, Mapping, Type, MutableMapping, List, Callable, Optional
 import json
 import logging
 
 from .Errors import InvalidStyleCollectionError, InvalidClassCollectionError, InvalidIdentityError
 
+# the hook called with `(element, mutated)` when a property of a graph element is read or written,
+# or an element is queried from a graph. It's installed by the seeker so that the accesses are
+# recorded without `Tracer.look_at`, and it's `None` when nothing listens to the accesses.
+element_event_hook: Optional[Callable[['Comparable', bool], None]] = None
+
+
+def set_element_event_hook(hook: Optional[Callable[['Comparable', bool], None]]) -> None:
+    """
+    set the hook receiving the accesses and mutations of graph elements
+    @param hook: called with the element and whether it's mutated, `None` removes the hook
+    @return: None
+    """
+    global element_event_hook
+    element_event_hook = hook
+
 
 class Comparable(metaclass=ABCMeta):
     """
@@ -80,6 +95,8 @@ class HasProperty(metaclass=ABCMeta):
         @param item:
         @return:
         """
+        if element_event_hook is not None:
+            element_event_hook(self, False)
         return self.properties[item]
 
     def __setitem__(self, key, value):
@@ -88,6 +105,8 @@ class HasProperty(metaclass=ABCMeta):
         @param key:
         @param value:
         """
+        if element_event_hook is not None:
+            element_event_hook(self, True)
         self.properties[key] = value
 
     def __contains__(self, item):
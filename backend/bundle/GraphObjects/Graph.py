@@ -1,8 +1,10 @@
 from __future__ import annotations
+from . import Base
 from .Base import Stylable
 from .Errors import GraphJsonFormatError
 from .Node import Node, NodeSet, MutableNodeSet
 from .Edge import Edge, EdgeSet, MutableEdgeSet, NodeTuple, EdgeIDTuple
+from ..utils.serializers import get_serializer
 
 import json
 from typing import Iterable, Union, Optional, Mapping, Type, TypeVar, Generic
@@ -83,7 +85,10 @@ class Graph(Stylable, Generic[Node_C, Edge_C]):
         @param node_id:
         @return: the node instance or None
         """
-        return self.nodes[node_id]
+        node = self.nodes[node_id]
+        if node is not None and Base.element_event_hook is not None:
+            Base.element_event_hook(node, False)
+        return node
 
     def get_edge(self, edge_id: str) -> Optional[Edge]:
         """
@@ -91,7 +96,10 @@ class Graph(Stylable, Generic[Node_C, Edge_C]):
         @param edge_id:
         @return: the edge instance or None
         """
-        return self.edges[edge_id]
+        edge = self.edges[edge_id]
+        if edge is not None and Base.element_event_hook is not None:
+            Base.element_event_hook(edge, False)
+        return edge
 
     def has_node(self, node: Union[str, Node]) -> bool:
         """
@@ -158,7 +166,7 @@ class Graph(Stylable, Generic[Node_C, Edge_C]):
         # TODO this is not try enough, cut the json loading
         if isinstance(graph_json, str):
             try:
-                graph_dict = json.loads(graph_json)
+                graph_dict = get_serializer().loads(graph_json)
                 # TODO do not support json5
             except TypeError as e:
                 raise GraphJsonFormatError(e)
@@ -239,7 +247,7 @@ class MutableGraph(Graph):
             print('Wrong layout name. Nothing is changed. Please use GraphLayout Enum.')
 
     def generate_json(self, indent: int = None) -> str:
-        return json.dumps(self, indent=indent, cls=MutableGraph.GraphObjectEncoder)
+        return get_serializer().dumps(self, default=MutableGraph.GraphObjectEncoder().default, indent=indent)
 
     def generate_json_object(self) -> dict:
-        return json.loads(self.generate_json())
+        return get_serializer().loads(self.generate_json())
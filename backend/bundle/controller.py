@@ -1,27 +1,74 @@
+import contextlib
 import pathlib
-from typing import Union, List, Mapping
+from uuid import uuid4
+from typing import Union, List, Mapping, Optional, Any, ContextManager
 
+from bundle.utils.delta_result import encode_delta
+from bundle.utils.loop_folding import encode_loops
+from bundle.utils.memory_monitor import MemoryMonitor
 from bundle.utils.processor import Processor
-from bundle.utils.recorder import Recorder
+from bundle.utils.recorder import Recorder, RecordingPolicy
+from bundle.utils.trace_store import TraceStore
 from bundle.utils.cache_file_helpers import CacheFolder, USER_DOCS_PATH
 from bundle.seeker import tracer
+from bundle.seeker.instrumentation import TracerStats
+from bundle.seeker.profiler import LineProfiler
 
 from time import time
 
 
-class Controller:
-    def __init__(self, cache_path=USER_DOCS_PATH, auto_delete: bool = False):
+class ExecutionSession:
+    """
+    An execution session owns the recorder, the processor and the cache folders of one execution.
+
+    Entering a session binds its recorder and log sink to the current context,
+    so the tracers used inside of the `with` block record into this session
+    only. Sessions in different threads or asyncio tasks do not interfere
+    with each other.
+
+    Usage::
+
+        session = ExecutionSession()
+        with session as folder_creator, folder_creator('code_hash') as cache_folder:
+            main()  # traced functions
+
+        session.generate_processed_record()
+        result = session.get_processed_result()
+    """
+    def __init__(self, cache_path=USER_DOCS_PATH, auto_delete: bool = False, instrument: bool = False,
+                 freeze_values: bool = False, profile: bool = False, record: bool = True):
+        """
+        @param cache_path: the main cache folder
+        @param auto_delete: whether the cache folders are deleted when they are exited
+        @param instrument: whether the tracers and the recorder of this session collect `TracerStats`
+        @param freeze_values: whether the values are recorded as the reprs computed by the tracers,
+                              see `Recorder.freeze_values`
+        @param profile: whether the lines run by the tracers of this session are profiled
+        @param record: whether the steps are recorded, which can be unset to only profile the lines
+        """
+        self.session_id: str = uuid4().hex
         self.main_cache_folder = CacheFolder(cache_path, auto_delete=auto_delete)
         self.log_folder = CacheFolder(cache_path / 'log', auto_delete=auto_delete)
         # TODO think about this, and the log file location in the sight class
         self.log_folder.cache_folder_path.mkdir(parents=True, exist_ok=True)
         self.tracer_cls = tracer
-        self.recorder = Recorder()
+        self.recorder = Recorder(freeze_values=freeze_values, recording=record)
         self.processor = Processor()
+        self.stats: Optional[TracerStats] = TracerStats() if instrument else None
+        if self.stats is not None:
+            self.stats.instrument_recorder(self.recorder)
+        self.profiler: Optional[LineProfiler] = LineProfiler() if profile else None
+        self.memory_monitor: Optional[MemoryMonitor] = None
+        self.log_file_name: Optional[str] = None
+        self._context_stack: List[contextlib.ExitStack] = []
 
         self.main_cache_folder.__enter__()
-        self.tracer_cls.set_log_file_dir(self.log_folder.cache_folder_path)
 
+    def make_default(self) -> None:
+        """
+        use this session when no session is entered in the current context
+        """
+        self.tracer_cls.set_log_file_dir(self.log_folder.cache_folder_path)
         self.tracer_cls.set_new_recorder(self.recorder)
 
     def get_recorded_content(self) -> List[Mapping]:
@@ -30,16 +77,115 @@ class Controller:
     def get_processed_result(self) -> List[Mapping]:
         return self.processor.result
 
+    def get_delta_result(self, keyframe_interval: int) -> Mapping:
+        """
+        get the processed result in the delta format
+        @param keyframe_interval: the number of records between two keyframes
+        @return: the delta-encoded result, see `bundle.utils.delta_result`
+        """
+        return encode_delta(self.processor.result, keyframe_interval)
+
+    def get_folded_result(self) -> Mapping:
+        """
+        get the processed result in the loop-folded format
+        @return: the loop-folded result, see `bundle.utils.loop_folding`
+        """
+        return encode_loops(self.processor.result)
+
     def get_processed_result_json(self) -> str:
         return self.processor.result_json
 
+    def set_record_limits(self, max_steps: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self.recorder.set_limits(max_steps=max_steps, max_bytes=max_bytes)
+
+    def set_recording_policy(self, policy: Optional[RecordingPolicy]) -> None:
+        self.recorder.set_policy(policy)
+
+    def set_trace_store(self, cache_folder: Optional[CacheFolder], threshold: int) -> None:
+        """
+        spill the old records into a trace store in the cache folder once their size exceeds the threshold
+        @param cache_folder: the folder of the store, `None` means keeping the records in memory
+        @param threshold: the estimated size of in-memory records, in bytes
+        """
+        if self.recorder.store is not None:
+            self.recorder.store.close()
+        # the cache folder of the same code may be shared by concurrent sessions
+        store = TraceStore(cache_folder / f'{self.session_id}.{TraceStore.FILE_NAME}', threshold) \
+            if cache_folder is not None else None
+        self.recorder.set_store(store)
+
+    def get_tracer_stats(self) -> Optional[Mapping[str, Any]]:
+        return self.stats.as_dict() if self.stats is not None else None
+
+    def get_profile(self, limit: Optional[int] = None) -> Optional[Mapping[str, Any]]:
+        """
+        @param limit: the number of the hottest lines, `None` means all of them
+        @return: the line profile, see `LineProfiler.as_dict`, `None` if this session is not profiled
+        """
+        return self.profiler.as_dict(limit) if self.profiler is not None else None
+
+    def measure_wall_time(self) -> ContextManager:
+        """
+        measure the wall time of the traced code if this session is instrumented
+        @return: context manager
+        """
+        return self.stats.wall_clock() if self.stats is not None else contextlib.nullcontext()
+
+    def measure_memory(self, max_memory: Optional[int] = None, source_file: Optional[str] = None) -> ContextManager:
+        """
+        trace the memory allocated by the traced code, and stop the execution if it exceeds the limit
+        @param max_memory: the limit in bytes, `None` means no limit
+        @param source_file: the file of the user's code, see `MemoryMonitor`
+        @return: context manager
+        """
+        self.memory_monitor = MemoryMonitor(self.recorder, max_memory, source_file)
+        return self.memory_monitor.measure()
+
+    def get_execution_info(self) -> Mapping[str, Any]:
+        info = dict(self.recorder.get_summary())
+        if self.stats is not None:
+            info['tracerStats'] = self.stats.as_dict()
+        if self.processor.trace_index is not None:
+            info['traceIndex'] = self.processor.trace_index.as_dict()
+        if self.profiler is not None:
+            info['profile'] = self.profiler.as_dict()
+        if self.memory_monitor is not None:
+            info['memory'] = self.memory_monitor.as_dict()
+        return info
+
     def purge_records(self):
         self.recorder.purge()
         self.processor.purge()
 
-    def generate_processed_record(self):
-        self.processor.load_data(change_list=self.recorder.changes, variables=self.recorder.variables)
-        self.processor.generate_result_json()
+    def generate_processed_record(self, keyframe_interval: Optional[int] = None, fold_loops: bool = False,
+                                  trace_index: bool = False, result_json: bool = True):
+        """
+        process the records of this session
+        @param keyframe_interval: the interval of keyframes if the json is delta-encoded, see `delta_result`
+        @param fold_loops: whether the loops are folded in the json, see `loop_folding`
+        @param trace_index: whether the trace index is generated
+        @param result_json: whether the result is dumped into json, which is kept by the processor,
+                            it can be unset if the json is encoded by the caller, eg. by `iter_result_json`
+        """
+        self.processor.load_data(self.recorder)
+        if trace_index:
+            self.processor.generate_trace_index()
+        if result_json:
+            self.processor.generate_result_json(keyframe_interval, fold_loops)
+
+    def write_processed_record(self, path: Union[str, pathlib.Path], keyframe_interval: Optional[int] = None,
+                               fold_loops: bool = False, trace_index: bool = False) -> None:
+        """
+        process the records of this session into a json file as a stream, so the processed records are not kept
+        @param path: the json file
+        @param keyframe_interval: the interval of keyframes if the json is delta-encoded, see `delta_result`
+        @param fold_loops: whether the loops are folded in the json, see `loop_folding`
+        @param trace_index: whether the trace index is generated
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            for chunk in self.processor.iter_recorder_json(self.recorder, keyframe_interval,
+                                                           fold_loops=fold_loops, trace_index=trace_index):
+                file.write(chunk)
 
     def __call__(self, dir_name: Union[str, pathlib.Path] = None,
                        mode: int = 0o777,
@@ -51,17 +197,25 @@ class Controller:
             return self.main_cache_folder
 
     def __enter__(self):
-        self.tracer_cls.set_log_file_name(str(time()))
+        self.log_file_name = str(time())
         # TODO give a prompt that the current session is under this time stamp
+        context = contextlib.ExitStack()
+        context.enter_context(
+            self.tracer_cls.bind(self.recorder, self.log_folder.cache_folder_path, self.log_file_name, self.stats,
+                                 self.profiler)
+        )
+        self._context_stack.append(context)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        pass
+        self._context_stack.pop().close()
 
     def __del__(self):
+        if self.recorder.store is not None:
+            self.recorder.store.close()
         self.main_cache_folder.__exit__(None, None, None)
 
 
-controller = Controller()
-
-del Controller  # User should only have one controller
+# the default session, which is used by the tracers outside of any session
+controller = ExecutionSession()
+controller.make_default()
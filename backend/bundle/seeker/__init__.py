@@ -15,6 +15,7 @@ Credit: modified from PySnooper U{https://github.com/cool-RR/PySnooper/}
 
 from .sight import Tracer as tracer
 from .variables import Attrs, Exploding, Indices, Keys
+from .containers import TracedList, TracedDeque, TracedDict, TracedHeap, TracedSet
 from collections import namedtuple
 
 __VersionInfo = namedtuple('VersionInfo', ('major', 'minor', 'micro'))
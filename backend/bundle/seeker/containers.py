@@ -0,0 +1,461 @@
+"""
+traced containers, which report their changes to the seeker as deltas
+
+The tracer finds the changes of a variable by comparing its reprs at each
+line, which costs a full repr of a container on every line. The containers
+here count their versions and report each operation instead, so the tracer
+only compares the versions, and the recorder only keeps the operations::
+
+    from bundle.seeker import tracer, TracedDict, TracedHeap
+
+    @tracer('distances', 'queue')
+    def main():
+        distances = TracedDict({start: 0})
+        queue = TracedHeap([(0, start)])
+        while queue:
+            distance, node = queue.pop()
+            ...
+
+The operations are reported as `(operation, [index], *items)`, in which
+the items are recorded by their reprs, eg.::
+
+    ('append', "'a'")           ('set', "'a'", '1')         ('push', "(0, 'n1')")
+    ('insert', 0, "'a'")        ('delete', "'a'")           ('pop',)
+    ('pop', 2)                  ('add', "'a'")              ('reset', "'a'", "'b'")
+
+An item is removed from a position by `pop` with its index, or from the end
+of a heap or a deque by `pop` without index, while `delete` removes a key
+of a dictionary. The index of `rotate` is the number of steps. `reset`
+carries all the items, or the keys and the values alternately for
+dictionaries. It's used by the operations which cannot be told by a few
+arguments, ie. sorting and slice assignments.
+
+The items are only recorded when a recorder observes a container for the
+first time, so the operations made before that are not reported to it.
+
+Note that `heapq` functions bypass the methods of list subclasses, so a
+heap must be a `TracedHeap` rather than a `TracedList`.
+"""
+import heapq
+import itertools
+from collections import deque
+from copy import deepcopy
+from typing import Any, Callable, Optional, Iterable, Iterator, Tuple, Set
+
+from bundle.utils.trace_store import ContainerState
+
+# the hook called with `(container, operation, index, items)` when a traced container is changed,
+# in which `index` is None unless the operation works on a position. It's installed by the seeker,
+# and it's `None` when nothing listens to the changes.
+delta_hook: Optional[Callable[['TracedContainer', str, Optional[int], Tuple], None]] = None
+
+_container_ids = itertools.count()
+
+
+def set_delta_hook(hook: Optional[Callable[['TracedContainer', str, Optional[int], Tuple], None]]) -> None:
+    """
+    set the hook receiving the operations of traced containers
+    @param hook: called with the container, the operation, its index and its items, `None` removes the hook
+    @return: None
+    """
+    global delta_hook
+    delta_hook = hook
+
+
+class TracedContainer:
+    """
+    The mixin of traced containers.
+
+    The version of a container is increased by every operation, and the
+    operations are reported through `delta_hook`. The ids are assigned
+    lazily, so that copies made by `copy` get their own ids.
+    """
+    KIND = 'container'
+    _container_id: Optional[int] = None
+    _version: int = 0
+
+    @property
+    def container_id(self) -> int:
+        if self._container_id is None:
+            self._container_id = next(_container_ids)
+        return self._container_id
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _report(self, operation: str, *items: Any, index: Optional[int] = None) -> None:
+        self._version += 1
+        if delta_hook is not None:
+            delta_hook(self, operation, index, items)
+
+    def _reset(self) -> None:
+        self._report('reset', *self._iter_reported_items())
+
+    def _iter_reported_items(self) -> Iterator:
+        return iter(self)
+
+    def _plain(self) -> Any:
+        return list(self)
+
+    @property
+    def state_token(self) -> str:
+        """
+        the string compared by the tracer instead of the repr
+        @return:
+        """
+        return f'{type(self).__name__}(#{self.container_id}, version={self._version}, size={len(self)})'
+
+    def get_state(self, item_repr: Callable[[Any], str] = repr,
+                  observed: Optional[Set[int]] = None) -> ContainerState:
+        """
+        get the state of this container, the items are included when it's observed for the first time
+        @param item_repr: the representation function of items
+        @param observed: the ids of the containers observed by a recorder, to which this container is added,
+                         `None` means the items are always included
+        @return: the state
+        """
+        items = None
+        if observed is None or self.container_id not in observed:
+            if observed is not None:
+                observed.add(self.container_id)
+            items = [item_repr(item) for item in self._iter_reported_items()]
+        return ContainerState(self.container_id, self.KIND, self._version, len(self), items)
+
+    def _rebuild(self, items: Iterable) -> 'TracedContainer':
+        return type(self)(items)
+
+    def __copy__(self):
+        return self._rebuild(self._plain())
+
+    def __deepcopy__(self, memo):
+        return self._rebuild(deepcopy(self._plain(), memo))
+
+
+class TracedList(TracedContainer, list):
+    KIND = 'list'
+
+    def _index(self, index: int) -> int:
+        return index + len(self) if index < 0 else index
+
+    def append(self, item) -> None:
+        super().append(item)
+        self._report('append', item)
+
+    def extend(self, items: Iterable) -> None:
+        items = list(items)
+        super().extend(items)
+        self._report('extend', *items)
+
+    def __iadd__(self, items: Iterable):
+        self.extend(items)
+        return self
+
+    def __imul__(self, times: int):
+        super().__imul__(times)
+        self._reset()
+        return self
+
+    def insert(self, index: int, item) -> None:
+        index = min(max(self._index(index), 0), len(self))
+        super().insert(index, item)
+        self._report('insert', item, index=index)
+
+    def pop(self, index: int = -1):
+        item = super().pop(index)
+        # the length is decreased, so the index of the removed item is the length if it's negative
+        self._report('pop', index=index + len(self) + 1 if index < 0 else index)
+        return item
+
+    def remove(self, item) -> None:
+        index = self.index(item)
+        super().__delitem__(index)
+        self._report('pop', index=index)
+
+    def clear(self) -> None:
+        super().clear()
+        self._report('clear')
+
+    def __setitem__(self, index, item) -> None:
+        super().__setitem__(index, item)
+        if isinstance(index, slice):
+            self._reset()
+        else:
+            self._report('set', item, index=self._index(index))
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            super().__delitem__(index)
+            self._reset()
+        else:
+            index = self._index(index)
+            super().__delitem__(index)
+            self._report('pop', index=index)
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self._reset()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._report('reverse')
+
+
+class TracedDeque(TracedContainer, deque):
+    KIND = 'deque'
+
+    def _rebuild(self, items: Iterable) -> 'TracedDeque':
+        return type(self)(items, self.maxlen)
+
+    def _is_full(self) -> bool:
+        return self.maxlen is not None and len(self) == self.maxlen
+
+    def append(self, item) -> None:
+        # a full deque discards the items from the other end, which are reported explicitly
+        if self._is_full():
+            self._report('popleft')
+        super().append(item)
+        self._report('append', item)
+
+    def appendleft(self, item) -> None:
+        if self._is_full():
+            self._report('pop')
+        super().appendleft(item)
+        self._report('appendleft', item)
+
+    def extend(self, items: Iterable) -> None:
+        for item in list(items):
+            self.append(item)
+
+    def extendleft(self, items: Iterable) -> None:
+        for item in list(items):
+            self.appendleft(item)
+
+    def __iadd__(self, items: Iterable):
+        self.extend(items)
+        return self
+
+    def pop(self):
+        item = super().pop()
+        self._report('pop')
+        return item
+
+    def popleft(self):
+        item = super().popleft()
+        self._report('popleft')
+        return item
+
+    def insert(self, index: int, item) -> None:
+        super().insert(index, item)
+        self._reset()
+
+    def remove(self, item) -> None:
+        index = self.index(item)
+        super().__delitem__(index)
+        self._report('pop', index=index)
+
+    def rotate(self, steps: int = 1) -> None:
+        super().rotate(steps)
+        self._report('rotate', index=steps)
+
+    def clear(self) -> None:
+        super().clear()
+        self._report('clear')
+
+    def __setitem__(self, index: int, item) -> None:
+        super().__setitem__(index, item)
+        self._report('set', item, index=index + len(self) if index < 0 else index)
+
+    def __delitem__(self, index: int) -> None:
+        index = index + len(self) if index < 0 else index
+        super().__delitem__(index)
+        self._report('pop', index=index)
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._report('reverse')
+
+
+class TracedDict(TracedContainer, dict):
+    KIND = 'dict'
+
+    def _iter_reported_items(self) -> Iterator:
+        # the keys and the values are reported alternately
+        return itertools.chain.from_iterable(self.items())
+
+    def _plain(self) -> Any:
+        return dict(self)
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self._report('set', key, value)
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._report('delete', key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        value = super().pop(key)
+        self._report('delete', key)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._report('delete', key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super().__getitem__(key)
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self._report('clear')
+
+
+class TracedSet(TracedContainer, set):
+    KIND = 'set'
+
+    def add(self, item) -> None:
+        if item not in self:
+            super().add(item)
+            self._report('add', item)
+
+    def discard(self, item) -> None:
+        if item in self:
+            super().discard(item)
+            self._report('remove', item)
+
+    def remove(self, item) -> None:
+        super().remove(item)
+        self._report('remove', item)
+
+    def pop(self):
+        item = super().pop()
+        self._report('remove', item)
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self._report('clear')
+
+    def update(self, *others: Iterable) -> None:
+        for item in itertools.chain(*others):
+            self.add(item)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def difference_update(self, *others: Iterable) -> None:
+        for item in itertools.chain(*others):
+            self.discard(item)
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def intersection_update(self, *others: Iterable) -> None:
+        super().intersection_update(*others)
+        self._reset()
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def symmetric_difference_update(self, other: Iterable) -> None:
+        super().symmetric_difference_update(other)
+        self._reset()
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+
+class TracedHeap(TracedContainer):
+    """
+    A binary min heap built on `heapq`, which reports `push` and `pop`
+    rather than the swaps of the items in the underlying list.
+    """
+    KIND = 'heap'
+
+    def __init__(self, items: Iterable = ()):
+        self.heap = list(items)
+        heapq.heapify(self.heap)
+
+    def push(self, item) -> None:
+        heapq.heappush(self.heap, item)
+        self._report('push', item)
+
+    def pop(self):
+        """
+        pop the smallest item
+        @return: the smallest item
+        @raise IndexError: if the heap is empty
+        """
+        item = heapq.heappop(self.heap)
+        self._report('pop')
+        return item
+
+    def pushpop(self, item):
+        """
+        push an item and then pop the smallest item, which is faster than `push` followed by `pop`
+        @param item:
+        @return: the smallest item
+        """
+        result = heapq.heappushpop(self.heap, item)
+        if result is not item:
+            self._report('push', item)
+            self._report('pop')
+        return result
+
+    def replace(self, item):
+        """
+        pop the smallest item and then push an item
+        @param item:
+        @return: the smallest item before the push
+        @raise IndexError: if the heap is empty
+        """
+        result = heapq.heapreplace(self.heap, item)
+        self._report('pop')
+        self._report('push', item)
+        return result
+
+    def peek(self):
+        """
+        @return: the smallest item
+        @raise IndexError: if the heap is empty
+        """
+        return self.heap[0]
+
+    def clear(self) -> None:
+        self.heap.clear()
+        self._report('clear')
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.heap)
+
+    def __contains__(self, item) -> bool:
+        return item in self.heap
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TracedHeap) and self.heap == other.heap
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.heap!r})'
@@ -0,0 +1,142 @@
+"""
+instrumentation of the tracer, which tells where the time of a traced execution goes
+"""
+import contextlib
+from collections import Counter
+from functools import wraps, partial
+from time import perf_counter_ns
+from typing import Callable, Mapping, Any, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bundle.utils.recorder import Recorder
+
+TRACE_PHASE = 'trace'
+LOCALS_PHASE = 'locals'
+COPY_PHASE = 'copy'
+RECORDER_PHASE = 'recorder'
+WRITE_PHASE = 'write'
+PHASES = (TRACE_PHASE, LOCALS_PHASE, COPY_PHASE, RECORDER_PHASE, WRITE_PHASE)
+
+# the recorder methods called in the trace function
+RECORDER_METHODS = ('add_record', 'register_variable', 'add_vc_to_last_record',
+                    'add_vc_to_previous_record', 'add_ac_to_last_record', 'add_element_event',
+                    'add_container_delta')
+
+
+class TracerStats:
+    """
+    Counters and timers of the hot path of the tracer.
+
+    The time spent in each phase of the trace function is accumulated by
+    `perf_counter_ns`, ie.::
+
+        trace       the whole trace function, which contains the following phases
+        locals      evaluating watched variables and their reprs (`get_local_values`)
+        copy        copying the changed values
+        recorder    appending to the recorder
+        write       writing the log
+
+    Nothing is measured unless the stats are bound to the execution context
+    (see `Tracer.bind`) when a tracer is created. Then the tracer swaps in
+    the timed versions of its functions, so a tracer without stats runs
+    exactly the same code as before, with the functions of its hot path
+    bound as the defaults of `Tracer.trace`.
+    """
+    def __init__(self):
+        self.event_counts: Counter = Counter()
+        self.skipped_events: int = 0
+        self.phase_times: Counter = Counter()
+        self.phase_calls: Counter = Counter()
+        self.wall_time: int = 0
+
+    def timed(self, phase: str, function: Callable) -> Callable:
+        """
+        wrap a function so that its calls and time are counted in a phase
+        @param phase:
+        @param function:
+        @return: the wrapped function
+        """
+        phase_times, phase_calls = self.phase_times, self.phase_calls
+
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                phase_times[phase] += perf_counter_ns() - start
+                phase_calls[phase] += 1
+
+        return timed_function
+
+    def timed_trace(self, trace: Callable) -> Callable:
+        """
+        wrap a trace function, counting the events by types
+        @param trace:
+        @return: the wrapped trace function
+        """
+        timed = self.timed(TRACE_PHASE, trace)
+        event_counts = self.event_counts
+
+        @wraps(trace)
+        def timed_trace_function(frame, event, arg):
+            result = timed(frame, event, arg)
+            if result is None and event == 'call':
+                # the frame is not traced
+                self.skipped_events += 1
+            else:
+                event_counts[event] += 1
+            return result
+
+        return timed_trace_function
+
+    def instrument_tracer(self, tracer) -> None:
+        """
+        swap in the timed functions of a tracer
+        @param tracer: a `Tracer` instance
+        @return: None
+        """
+        from .sight import get_local_values, copy_value
+
+        tracer.trace = self.timed_trace(partial(tracer.trace,
+                                                get_local_values=self.timed(LOCALS_PHASE, get_local_values),
+                                                copy_value=self.timed(COPY_PHASE, copy_value)))
+        tracer._write = self.timed(WRITE_PHASE, tracer._write)
+
+    def instrument_recorder(self, recorder: 'Recorder') -> None:
+        """
+        swap in the timed methods of a recorder which are used by tracers
+        @param recorder:
+        @return: None
+        """
+        for method_name in RECORDER_METHODS:
+            setattr(recorder, method_name, self.timed(RECORDER_PHASE, getattr(recorder, method_name)))
+
+    @contextlib.contextmanager
+    def wall_clock(self) -> Iterator['TracerStats']:
+        """
+        measure the wall time of an execution, which contains the user code and the tracing
+        """
+        start = perf_counter_ns()
+        try:
+            yield self
+        finally:
+            self.wall_time += perf_counter_ns() - start
+
+    def as_dict(self) -> Mapping[str, Any]:
+        """
+        summarize the stats, the times are in nanoseconds
+        @return:
+        """
+        trace_time = self.phase_times[TRACE_PHASE]
+        phase_times = {phase: self.phase_times[phase] for phase in PHASES}
+        # the time of the trace function which is not in any other phase, ie. checking frames, source lines etc.
+        phase_times['traceOther'] = trace_time - sum(phase_times[phase] for phase in PHASES[1:])
+        return {
+            'events': dict(self.event_counts),
+            'skippedEvents': self.skipped_events,
+            'phaseTimes': phase_times,
+            'phaseCalls': {phase: self.phase_calls[phase] for phase in PHASES},
+            'wallTime': self.wall_time,
+            'userTime': max(self.wall_time - trace_time, 0) if self.wall_time else None,
+        }
@@ -0,0 +1,141 @@
+"""
+a line profiler of the traced code, which tells where the time of the user code goes
+"""
+import os
+from collections import Counter
+from functools import wraps
+from time import perf_counter_ns
+from types import FrameType
+from typing import Callable, Dict, Tuple, Optional, Mapping, Any, List
+
+# (file name, first line number of the function, line number), which tells apart the functions of the same name
+LineKey = Tuple[str, int, int]
+
+
+class LineProfiler:
+    """
+    The hit count and the self time of each traced line.
+
+    The self time of a line is the time between its `line` event and the
+    next event in the same frame, measured by `perf_counter_ns`. The time
+    spent in the trace function is not counted, and neither is the time
+    of the traced callees, whose lines are profiled themselves. The calls
+    which are not traced, eg. the methods of the graph, count towards the
+    lines calling them.
+
+    Nothing is profiled unless the profiler is bound to the execution context
+    (see `Tracer.bind`) when a tracer is created. Then the tracer swaps in
+    the profiled trace function, like `TracerStats` does.
+
+    The lines are told apart by their functions, ie. the files and the
+    first lines of the functions, and the names of the functions are only
+    kept as the labels of the lines.
+    """
+    def __init__(self):
+        self.hits: Counter = Counter()
+        self.times: Counter = Counter()
+        # the names of the functions of the lines
+        self.labels: Dict[LineKey, str] = {}
+        # the current lines of the profiled frames, and the time from which their lines are timed
+        self._frame_lines: Dict[FrameType, Optional[LineKey]] = {}
+        self._frame_starts: Dict[FrameType, int] = {}
+        # the profiled frames being run, the last one is timed and the others wait for their callees
+        self._frame_stack: List[FrameType] = []
+        # the number of the profiled tracers entered, see `enter_tracer`
+        self._entered_tracers: int = 0
+
+    def _stop_timing(self, frame: FrameType, now: int) -> None:
+        line = self._frame_lines.get(frame)
+        if line is not None:
+            self.times[line] += now - self._frame_starts[frame]
+
+    def profiled_trace(self, trace: Callable) -> Callable:
+        """
+        wrap a trace function, timing the lines of the frames it traces
+        @param trace:
+        @return: the wrapped trace function
+        """
+        hits, labels, frame_lines, frame_starts, frame_stack = \
+            self.hits, self.labels, self._frame_lines, self._frame_starts, self._frame_stack
+
+        @wraps(trace)
+        def profiled_trace_function(frame, event, arg):
+            now = perf_counter_ns()
+            result = trace(frame, event, arg)
+            if result is None:
+                # the frame is not traced
+                return result
+
+            self._stop_timing(frame, now)
+            if event == 'line':
+                code = frame.f_code
+                line = (code.co_filename, code.co_firstlineno, frame.f_lineno)
+                if line not in hits:
+                    labels[line] = code.co_name
+                hits[line] += 1
+                frame_lines[frame] = line
+            elif event == 'call':
+                frame_lines[frame] = None
+                # the caller is paused until the callee returns, there may be untraced frames between them
+                if frame_stack:
+                    self._stop_timing(frame_stack[-1], now)
+                frame_stack.append(frame)
+            elif event == 'return':
+                frame_lines.pop(frame, None)
+                frame_starts.pop(frame, None)
+                if frame in frame_stack:
+                    frame_stack.remove(frame)
+                if frame_stack:
+                    frame_starts[frame_stack[-1]] = perf_counter_ns()
+                return result
+
+            frame_starts[frame] = perf_counter_ns()
+            return result
+
+        return profiled_trace_function
+
+    def instrument_tracer(self, tracer) -> None:
+        """
+        swap in the profiled trace function of a tracer
+        @param tracer: a `Tracer` instance
+        @return: None
+        """
+        tracer.trace = self.profiled_trace(tracer.trace)
+        tracer.profiler = self
+
+    def enter_tracer(self) -> None:
+        """
+        count a profiled tracer which is entered, see `Tracer.__enter__`
+        """
+        self._entered_tracers += 1
+
+    def exit_tracer(self) -> None:
+        """
+        count a profiled tracer which is exited, the frames are dropped once none of the tracers is entered,
+        since the return events of the frames are lost if the trace function raises
+        """
+        self._entered_tracers -= 1
+        if not self._entered_tracers:
+            self.clear_frames()
+
+    def clear_frames(self) -> None:
+        self._frame_lines.clear()
+        self._frame_starts.clear()
+        self._frame_stack.clear()
+
+    def as_dict(self, limit: Optional[int] = None) -> Mapping[str, Any]:
+        """
+        summarize the profile, the times are in nanoseconds
+        @param limit: the number of the hottest lines in the summary, `None` means all of them
+        @return: the lines ranked by their self times
+        """
+        ranked_lines = sorted(self.hits.keys() | self.times.keys(),
+                              key=lambda line: (-self.times[line], -self.hits[line], line))
+        return {
+            'totalTime': sum(self.times.values()),
+            'totalHits': sum(self.hits.values()),
+            # only the name of the file is kept, the folders of the server are not exposed
+            'lines': [{'file': os.path.basename(line[0]), 'function': self.labels.get(line, ''), 'line': line[2],
+                       'hits': self.hits[line], 'time': self.times[line]}
+                      for line in ranked_lines[:limit]],
+        }
@@ -6,17 +6,25 @@ import pathlib
 import sys
 import re
 import collections
+import contextlib
+import contextvars
 import datetime as datetime_module
 import itertools
 import threading
 import traceback
 import logging
+import weakref
 from copy import copy
-from types import FrameType, FunctionType
-from typing import Iterable, Tuple, Any, Mapping, Optional, List, Callable, Union
-
-from bundle.utils.recorder import Recorder
-from .variables import CommonVariable, Exploding, BaseVariable
+from types import FrameType, FunctionType, CodeType
+from typing import Iterable, Tuple, Any, Mapping, Optional, List, Callable, Union, Dict, Iterator
+
+from bundle.GraphObjects.Base import Comparable, set_element_event_hook
+from bundle.utils.recorder import Recorder, RecordingPolicy
+from bundle.utils.trace_store import RecordedValue, freeze_value
+from .variables import CommonVariable, Exploding, BaseVariable, WatchBatch
+from .containers import TracedContainer, set_delta_hook
+from .instrumentation import TracerStats
+from .profiler import LineProfiler
 from . import utils, pycompat
 
 from io import StringIO
@@ -29,26 +37,75 @@ ipython_filename_pattern = re.compile('^<ipython-input-([0-9]+)-.*>$')
 
 
 def get_local_values(frame: FrameType,
-                     watch: Iterable[BaseVariable] = (),
+                     watch: Union[WatchBatch, Iterable[BaseVariable]] = (),
                      custom_repr=(),
                      max_length: int = None,
-                     only_watch: bool = True) -> Mapping[str, Tuple[Any, str]]:
+                     only_watch: bool = True,
+                     var_order: Mapping[str, int] = None) -> Mapping[str, Tuple[Any, str]]:
     result = collections.OrderedDict()
+    f_locals = None
     if not only_watch:
-        code = frame.f_code
-        vars_order = (code.co_varnames + code.co_cellvars + code.co_freevars +
-                      tuple(frame.f_locals.keys()))
-        result_values = [(key, value) for key, value in frame.f_locals.items()]
-        result_values.sort(key=lambda key_value: vars_order.index(key_value[0]))
+        if var_order is None:
+            var_order = get_variable_order(frame.f_code)
+        # names which are not declared in the code object (ie. the ones created by `exec`)
+        # keep the order in which they appear in `f_locals`, after the declared ones
+        unknown_position = len(var_order)
+        f_locals = frame.f_locals
+        result_values = [(var_order.get(key, unknown_position + index), key, value)
+                         for index, (key, value) in enumerate(f_locals.items())]
+        result_values.sort(key=lambda item: item[0])
+
+        for (_, key, value) in result_values:
+            result[key] = (value, get_value_repr(value, custom_repr, max_length))
+
+    if not isinstance(watch, WatchBatch):
+        watch = WatchBatch(watch)
+
+    for values in watch.values(frame, f_locals):
+        result.update((key, (value, get_value_repr(value, custom_repr, max_length)))
+                      for key, value in sorted(values))
 
-        for (key, value) in result_values:
-            result[key] = (value, utils.get_shortish_repr(value, custom_repr, max_length))
+    return result
 
-    for variable in watch:
-        result.update((key, (value, utils.get_shortish_repr(value, custom_repr, max_length)))
-                      for key, value in sorted(variable.values(frame)))
 
-    return result
+def get_value_repr(value: Any, custom_repr=(), max_length: int = None) -> str:
+    """
+    get the representation of a value, which is compared to find the changes
+    @param value:
+    @param custom_repr:
+    @param max_length:
+    @return: the repr, or the state token of a traced container which reports its changes by itself
+    """
+    if isinstance(value, TracedContainer):
+        return value.state_token
+    return utils.get_shortish_repr(value, custom_repr, max_length)
+
+
+def copy_value(value: Any, value_repr: Optional[str] = None) -> Any:
+    """
+    copy a changed value to record it, a traced container is recorded by its state rather than a copy
+    @param value:
+    @param value_repr: the repr computed while tracing, with which the value is frozen instead of
+                       copied if it's given, see `Recorder.freeze_values`
+    @return:
+    """
+    if isinstance(value, TracedContainer):
+        return value.get_state(utils.get_shortish_repr, Tracer.get_recorder().observed_containers)
+    if value_repr is not None:
+        return RecordedValue(value_repr, value.identity if isinstance(value, Comparable) else None)
+    return copy(value)
+
+
+def get_variable_order(code: CodeType) -> Dict[str, int]:
+    """
+    map the variable names declared in a code object to their display order
+    @param code: the code object
+    @return: mapping from variable name to its position
+    """
+    var_order = {}
+    for name in code.co_varnames + code.co_cellvars + code.co_freevars:
+        var_order.setdefault(name, len(var_order))
+    return var_order
 
 
 class UnavailableSource:
@@ -56,7 +113,82 @@ class UnavailableSource:
         return u'SOURCE IS UNAVAILABLE'
 
 
-source_and_path_cache = {}
+class SourceCache:
+    """
+    LRU cache of the sources of files.
+
+    The entries are keyed by (module name, file name), and the modification
+    time and the size of the file are stored along with the source. A cached
+    source is reloaded once the file changes, ie. a reused cache folder never
+    gives stale lines, and the least recently used entry is evicted when the
+    cache is full, so that long-lived workers do not keep the sources of all
+    the submitted programs.
+    """
+    def __init__(self, capacity: int = 128):
+        if capacity < 1:
+            raise ValueError(f'The capacity of the source cache must be positive. You gave {capacity}')
+        self.capacity = capacity
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def get_file_stamp(file_name: str) -> Optional[Tuple[int, int]]:
+        """
+        @param file_name:
+        @return: (modification time in ns, size), or `None` if the file is not on the disk, eg. `<string>`
+        """
+        try:
+            stat = os.stat(file_name)
+        except (OSError, ValueError):
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, key: Tuple[Optional[str], str], stamp: Optional[Tuple[int, int]]) -> Optional[Tuple[str, Any]]:
+        """
+        get a cached source
+        @param key: (module name, file name)
+        @param stamp: the current stamp of the file
+        @return: (file name, source lines), or `None` if it's not cached or the file has changed
+        """
+        try:
+            cached_stamp, result = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        if cached_stamp != stamp:
+            del self._entries[key]
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: Tuple[Optional[str], str], stamp: Optional[Tuple[int, int]], result: Tuple[str, Any]) -> None:
+        self._entries[key] = (stamp, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Mapping[str, int]:
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+
+source_cache = SourceCache(int(os.getenv('SEEKER_SOURCE_CACHE_SIZE', '128')))
 
 
 def get_path_and_source_from_frame(frame):
@@ -64,10 +196,10 @@ def get_path_and_source_from_frame(frame):
     module_name = globs.get('__name__')
     file_name = frame.f_code.co_filename
     cache_key = (module_name, file_name)
-    try:
-        return source_and_path_cache[cache_key]
-    except KeyError:
-        pass
+    file_stamp = source_cache.get_file_stamp(file_name)
+    cached = source_cache.get(cache_key, file_stamp)
+    if cached is not None:
+        return cached
     loader = globs.get('__loader__')
 
     source = None
@@ -109,10 +241,99 @@ def get_path_and_source_from_frame(frame):
                   source]
 
     result = (file_name, source)
-    source_and_path_cache[cache_key] = result
+    source_cache.put(cache_key, file_stamp, result)
     return result
 
 
+def resolve_def_line(source, line_no: int) -> Tuple[int, str]:
+    """
+    find the actual function definition line if the given line is a decorator
+    @param source: the source lines
+    @param line_no: the line number reported by the `call` event
+    @return: the line number and the source line of the definition
+    """
+    source_line = source[line_no - 1]
+    if source_line.lstrip().startswith('@'):
+        # If a function decorator is found, skip lines until an actual
+        # function definition is found.
+        for candidate_line_no in itertools.count(line_no):
+            try:
+                candidate_source_line = source[candidate_line_no - 1]
+            except IndexError:
+                # End of source file reached without finding a function
+                # definition. Fall back to original source line.
+                break
+
+            if candidate_source_line.lstrip().startswith('def'):
+                # Found the def line!
+                return candidate_line_no, candidate_source_line
+
+    return line_no, source_line
+
+
+class CodeInfo:
+    """
+    Metadata of a code object which the tracer needs on every event.
+
+    It is computed once when the code object is first seen, so that
+    the per-event work is reduced to indexing.
+    """
+    __slots__ = ('source_path', 'source', 'var_order', 'def_line_no', 'def_source_line', '_call_lines')
+
+    def __init__(self, frame: FrameType):
+        code = frame.f_code
+        self.source_path, self.source = get_path_and_source_from_frame(frame)
+        self.var_order: Dict[str, int] = get_variable_order(code)
+        self.def_line_no, self.def_source_line = resolve_def_line(self.source, code.co_firstlineno)
+        self._call_lines: Dict[int, Tuple[int, str]] = {
+            code.co_firstlineno: (self.def_line_no, self.def_source_line)
+        }
+
+    def resolve_call_line(self, line_no: int) -> Tuple[int, str]:
+        """
+        get the line that should be reported for a `call` event
+        @param line_no: the line number of the frame
+        @return: the line number and the source line
+        """
+        try:
+            return self._call_lines[line_no]
+        except KeyError:
+            resolved = self._call_lines[line_no] = resolve_def_line(self.source, line_no)
+            return resolved
+
+
+class CodeInfoCache:
+    """
+    Cache `CodeInfo` by code objects.
+
+    The entries are keyed by the identity of the code objects
+    (equal code objects from different files must not share an entry)
+    and they are dropped as soon as the code object is garbage collected.
+    """
+    def __init__(self):
+        self._infos: Dict[int, CodeInfo] = {}
+
+    def get(self, frame: FrameType) -> CodeInfo:
+        code = frame.f_code
+        try:
+            return self._infos[id(code)]
+        except KeyError:
+            pass
+
+        info = self._infos[id(code)] = CodeInfo(frame)
+        weakref.finalize(code, self._infos.pop, id(code), None)
+        return info
+
+    def __len__(self):
+        return len(self._infos)
+
+    def clear(self):
+        self._infos.clear()
+
+
+code_info_cache = CodeInfoCache()
+
+
 def get_write_function(output, overwrite):
     is_path = isinstance(output, (pycompat.PathLike, str))
     if overwrite and not is_path:
@@ -154,22 +375,41 @@ class FileWriter(object):
 thread_global = threading.local()
 DISABLED = bool(os.getenv('SEEKER_DISABLED', ''))
 
+# the recorder and the log sink of the current execution. They are bound by
+# `Tracer.bind`, so that the executions in different threads or asyncio tasks
+# do not write into each other's records. The class level ones are used when
+# nothing is bound.
+recorder_context: contextvars.ContextVar[Optional[Recorder]] = \
+    contextvars.ContextVar('seeker_recorder', default=None)
+log_file_name_context: contextvars.ContextVar[Optional[str]] = \
+    contextvars.ContextVar('seeker_log_file_name', default=None)
+log_file_dir_context: contextvars.ContextVar[Optional[pathlib.Path]] = \
+    contextvars.ContextVar('seeker_log_file_dir', default=None)
+# the tracers created when stats are bound are instrumented
+stats_context: contextvars.ContextVar[Optional[TracerStats]] = \
+    contextvars.ContextVar('seeker_stats', default=None)
+# the tracers created when a profiler is bound are profiled
+profiler_context: contextvars.ContextVar[Optional[LineProfiler]] = \
+    contextvars.ContextVar('seeker_profiler', default=None)
+
 
 class Tracer:
     _recorder: Recorder = None
-    _log_file_name: Optional[pathlib.Path] = None
-    _log_file_dir: Optional[str] = None
+    _log_file_name: Optional[str] = None
+    _log_file_dir: Optional[pathlib.Path] = None
 
     def __init__(self, *watch_list, default_output: bool = True,
                  output: Union[str, Callable, utils.WritableStream, StringIO] = None,
                  watch=(), watch_explode=(), depth: int = 1, prefix: str = '', overwrite: bool = False,
                  thread_info: bool = False, custom_repr=(), max_variable_length: int = 100,
-                 relative_time: bool = False, only_watch: bool = True):
+                 relative_time: bool = False, only_watch: bool = True,
+                 policy: Optional[RecordingPolicy] = None):
 
+        log_file_name, log_file_dir = type(self).get_log_file_name(), type(self).get_log_file_dir()
         if output:
             self.log_path = output
-        elif self._log_file_name and self._log_file_dir and not default_output:
-            self.log_path = self._log_file_dir / self._log_file_name
+        elif log_file_name and log_file_dir and not default_output:
+            self.log_path = log_file_dir / log_file_name
         else:
             self.log_path = None
         self._write = get_write_function(self.log_path, overwrite)
@@ -184,6 +424,7 @@ class Tracer:
                          v if isinstance(v, BaseVariable) else Exploding(v)
                          for v in utils.ensure_tuple(watch_explode)
                      ]
+        self.watch_batch = WatchBatch(self.watch)
 
         self.frame_to_local_reprs = {}
         self.start_times = {}
@@ -194,6 +435,9 @@ class Tracer:
         assert self.depth >= 1
         self.target_codes = set()
         self.target_frames = set()
+        # the frames being traced because they are within `depth` of a target frame,
+        # mapping to their distances from the nearest target frame
+        self.frame_distances: Dict[FrameType, int] = {}
         self.thread_local = threading.local()
         if len(custom_repr) == 2 and \
                 not all(isinstance(x, Iterable) for x in custom_repr):
@@ -203,10 +447,33 @@ class Tracer:
         self.max_variable_length = max_variable_length
         self.relative_time = relative_time
         self.only_watch = only_watch
-        self.recorder = type(self).get_recorder()
+        # the recording policy of this tracer, the one of the recorder is used if it's None
+        self.policy = policy
+
+        # the tracers with stats bind the timed functions of the hot path into their trace function
+        stats = stats_context.get()
+        if stats is not None:
+            stats.instrument_tracer(self)
+        # the profiler wraps the timed trace function, so that none of the tracing is counted as the user's time
+        self.profiler: Optional[LineProfiler] = None
+        profiler = profiler_context.get()
+        if profiler is not None:
+            profiler.instrument_tracer(self)
+
+    @property
+    def recorder(self) -> Recorder:
+        """
+        the recorder of the current execution, which is looked up when it's used
+        since the tracer may run in different executions
+        @return:
+        """
+        return recorder_context.get() or type(self).get_recorder()
 
     @classmethod
     def get_recorder(cls) -> Recorder:
+        recorder = recorder_context.get()
+        if recorder is not None:
+            return recorder
         if not cls._recorder:
             # For testing, Tracer should not create recorder by itself
             cls.set_new_recorder(Recorder())
@@ -214,20 +481,67 @@ class Tracer:
 
     @classmethod
     def set_new_recorder(cls, recorder: Recorder) -> None:
+        """
+        set the default recorder, which is used when no recorder is bound to the current context
+        @param recorder:
+        """
         cls._recorder = recorder
 
     @classmethod
     def get_recorder_change_list(cls) -> List[dict]:
         return cls.get_recorder().changes
 
+    @classmethod
+    def get_log_file_name(cls) -> Optional[str]:
+        return log_file_name_context.get() or cls._log_file_name
+
     @classmethod
     def set_log_file_name(cls, file_name: Optional[str]) -> None:
         cls._log_file_name = file_name
 
+    @classmethod
+    def get_log_file_dir(cls) -> Optional[pathlib.Path]:
+        return log_file_dir_context.get() or cls._log_file_dir
+
     @classmethod
     def set_log_file_dir(cls, file_dir: Optional[pathlib.Path]) -> None:
         cls._log_file_dir = file_dir
 
+    @staticmethod
+    @contextlib.contextmanager
+    def bind(recorder: Recorder,
+             log_file_dir: Optional[pathlib.Path] = None,
+             log_file_name: Optional[str] = None,
+             stats: Optional[TracerStats] = None,
+             profiler: Optional[LineProfiler] = None) -> Iterator[Recorder]:
+        """
+        bind a recorder and a log sink to the current context
+
+        Usage::
+
+            with tracer.bind(Recorder(), log_dir, 'log_name') as recorder:
+                main()  # the traced functions record into `recorder`
+
+        @param recorder: the recorder used by the tracers in this context
+        @param log_file_dir: the directory of the log files
+        @param log_file_name: the name of the log file
+        @param stats: the stats collected by the tracers created in this context, `None` means no instrumentation
+        @param profiler: the profiler of the tracers created in this context, `None` means no profiling
+        @return: the bound recorder
+        """
+        tokens = [
+            (recorder_context, recorder_context.set(recorder)),
+            (log_file_dir_context, log_file_dir_context.set(log_file_dir)),
+            (log_file_name_context, log_file_name_context.set(log_file_name)),
+            (stats_context, stats_context.set(stats)),
+            (profiler_context, profiler_context.set(profiler)),
+        ]
+        try:
+            yield recorder
+        finally:
+            for context_var, token in reversed(tokens):
+                context_var.reset(token)
+
     def __call__(self, function_or_class):
         if DISABLED:
             return function_or_class
@@ -251,7 +565,12 @@ class Tracer:
         def wrapper(*args, **kwargs):
             result = func(*args, **kwargs)
             # cls._recorder.add_ac_to_last_record('get value %s' % result)
-            cls._recorder.add_ac_to_last_record(result)
+            recorder = cls.get_recorder()
+            if isinstance(result, Comparable):
+                # only the id is kept, so the record does not hold the graph
+                recorder.add_element_event(result.identity)
+            else:
+                recorder.add_ac_to_last_record(freeze_value(result) if recorder.freeze_values else result)
             return result
 
         return wrapper
@@ -319,7 +638,11 @@ class Tracer:
             'original_trace_functions', []
         )
         stack.append(sys.gettrace())
+        # the depth is restored on exit, since the return events are lost if the trace function raises
+        self.thread_local.__dict__.setdefault('original_depths', []).append(thread_global.depth)
         self.start_times[calling_frame] = datetime_module.datetime.now()
+        if self.profiler is not None:
+            self.profiler.enter_tracer()
         sys.settrace(self.trace)
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
@@ -327,6 +650,13 @@ class Tracer:
             return
         stack = self.thread_local.original_trace_functions
         sys.settrace(stack.pop())
+        thread_global.depth = self.thread_local.original_depths.pop()
+        if not stack:
+            # the frames within depth are finished once the outermost call exits,
+            # including the ones whose return events are lost since the trace function raises
+            self.frame_distances.clear()
+        if self.profiler is not None:
+            self.profiler.exit_tracer()
         calling_frame = inspect.currentframe().f_back
         self.target_frames.discard(calling_frame)
         self.frame_to_local_reprs.pop(calling_frame, None)
@@ -347,13 +677,52 @@ class Tracer:
     def _is_internal_frame(frame):
         return frame.f_code.co_filename == Tracer.__enter__.__code__.co_filename
 
+    def _is_target_frame(self, frame: FrameType) -> bool:
+        return frame.f_code in self.target_codes or frame in self.target_frames
+
+    def _walk_target_distance(self, frame: FrameType) -> Optional[int]:
+        """
+        find the distance to the nearest target frame by walking up the stack
+        @param frame:
+        @return: the distance, or `None` if no target frame is within depth
+        """
+        _frame_candidate = frame
+        for i in range(1, self.depth):
+            _frame_candidate = _frame_candidate.f_back
+            if _frame_candidate is None:
+                return None
+            elif self._is_target_frame(_frame_candidate):
+                return i
+        return None
+
+    def _target_distance(self, frame: FrameType) -> Optional[int]:
+        """
+        find the distance from a newly called frame to the nearest target frame
+        @param frame: a frame which is not a target frame
+        @return: the distance, or `None` if no target frame is within depth
+        """
+        parent = frame.f_back
+        if parent is None:
+            return None
+        if self._is_target_frame(parent):
+            return 1
+        parent_distance = self.frame_distances.get(parent)
+        if parent_distance is not None:
+            return parent_distance + 1 if parent_distance + 1 < self.depth else None
+        if self._is_internal_frame(parent):
+            # the frames of the tracer are not traced, so they are not tracked
+            return self._walk_target_distance(frame)
+        return None
+
     def set_thread_info_padding(self, thread_info):
         current_thread_len = len(thread_info)
         self.thread_info_padding = max(self.thread_info_padding,
                                        current_thread_len)
         return thread_info.ljust(self.thread_info_padding)
 
-    def trace(self, frame, event, arg):
+    def trace(self, frame, event, arg, get_local_values=get_local_values, copy_value=copy_value):
+        # the functions of the hot path are bound as defaults, so they are looked up as locals,
+        # and only an instrumented tracer binds the timed ones, see `TracerStats.instrument_tracer`
 
         # Checking whether we should trace this line: #########################
         #                                                                     #
@@ -367,21 +736,32 @@ class Tracer:
                 # trace function runs so incredibly often, therefore it's
                 # crucial to hyper-optimize it for the common case.
                 return None
-            elif self._is_internal_frame(frame):
+            elif frame in self.frame_distances:
+                # The frame is known to be within depth since its call
+                pass
+            elif event != 'call' or self._is_internal_frame(frame):
                 return None
             else:
-                _frame_candidate = frame
-                for i in range(1, self.depth):
-                    _frame_candidate = _frame_candidate.f_back
-                    if _frame_candidate is None:
-                        return None
-                    elif _frame_candidate.f_code in self.target_codes or _frame_candidate in self.target_frames:
-                        break
-                else:
+                # The distance of a new frame is its parent's plus one, so
+                # the stack is only walked when the frames are not tracked.
+                distance = self._target_distance(frame)
+                if distance is None:
                     return None
+                self.frame_distances[frame] = distance
 
         if event == 'call':
             thread_global.depth += 1
+
+        recorder = self.recorder
+        if not recorder.recording:
+            # only the frames are tracked, eg. when the lines are profiled without recording
+            if recorder.memory_monitor is not None:
+                recorder.check_memory()
+            if event == 'return':
+                self.frame_distances.pop(frame, None)
+                thread_global.depth -= 1
+            return self.trace
+
         indent = ' ' * 4 * thread_global.depth
 
         #                                                                     #
@@ -392,12 +772,12 @@ class Tracer:
 
         # get line_no
         line_no = frame.f_lineno
-        source_path, source = get_path_and_source_from_frame(frame)
+        code_info = code_info_cache.get(frame)
+        source_path = code_info.source_path
         if self.last_source_path != source_path:
             self.write(u'{indent}Source path:... {source_path}'.
                        format(**locals()))
             self.last_source_path = source_path
-        source_line = source[line_no - 1]
         thread_info = ""
         if self.thread_info:
             current_thread = threading.current_thread()
@@ -407,27 +787,17 @@ class Tracer:
 
         # Dealing with misplaced function definition: #########################
         #                                                                     #
-        if event == 'call' and source_line.lstrip().startswith('@'):
-            # If a function decorator is found, skip lines until an actual
-            # function definition is found.
-            for candidate_line_no in itertools.count(line_no):
-                try:
-                    candidate_source_line = source[candidate_line_no - 1]
-                except IndexError:
-                    # End of source file reached without finding a function
-                    # definition. Fall back to original source line.
-                    break
-
-                if candidate_source_line.lstrip().startswith('def'):
-                    # Found the def line!
-                    line_no = candidate_line_no
-                    source_line = candidate_source_line
-                    break
+        if event == 'call':
+            # If a function decorator is found, the line of actual
+            # function definition is reported instead.
+            line_no, source_line = code_info.resolve_call_line(line_no)
+        else:
+            source_line = code_info.source[line_no - 1]
         #                                                                     #
         # Finished dealing with misplaced function definition. ################
 
         if event != 'return':
-            self.recorder.add_record(line_no)
+            recorder.add_record(line_no, self.policy)
 
         # Reporting newish and modified variables: ############################
         #                                                                     #
@@ -436,28 +806,33 @@ class Tracer:
 
         # TODO do I need the extra repr? Why not just use variable
         self.frame_to_local_reprs[frame] = local_reprs = get_local_values(frame,
-                                                                          watch=self.watch,
+                                                                          watch=self.watch_batch,
                                                                           custom_repr=self.custom_repr,
-                                                                          only_watch=self.only_watch)
+                                                                          only_watch=self.only_watch,
+                                                                          var_order=code_info.var_order)
 
         newish_string = ('Starting var:.. ' if event == 'call' else
                          'New var:....... ')
 
+        # the reprs are reused by the processor instead of copying the values
+        freeze_values = recorder.freeze_values
         for name, (value, value_repr) in local_reprs.items():
             identifier = (self.prefix, name)
-            copied_value = copy(value)
             if name not in old_local_reprs:
-                self.recorder.register_variable(identifier)
+                recorder.register_variable(identifier)
+                copied_value = copy_value(value, value_repr if freeze_values else None)
 
                 if event == 'call':
                     # TODO it seems to work but I am not sure about this
-                    self.recorder.add_vc_to_last_record(identifier, copied_value)
+                    recorder.add_vc_to_last_record(identifier, copied_value)
                 else:
-                    self.recorder.add_vc_to_previous_record(identifier, copied_value)
+                    recorder.add_vc_to_previous_record(identifier, copied_value)
                 self.write('{indent}{newish_string}{name} = {value_repr}'.format(
                     **locals()))
             elif old_local_reprs[name][1] != value_repr:
-                self.recorder.add_vc_to_previous_record(identifier, copied_value)
+                # only the changed values are copied
+                copied_value = copy_value(value, value_repr if freeze_values else None)
+                recorder.add_vc_to_previous_record(identifier, copied_value)
                 self.write('{indent}Modified var:.. {name} = {value_repr}'.format(
                     **locals()))
 
@@ -487,6 +862,7 @@ class Tracer:
         if event == 'return':
             self.frame_to_local_reprs.pop(frame, None)
             self.start_times.pop(frame, None)
+            self.frame_distances.pop(frame, None)
             thread_global.depth -= 1
 
             if not ended_by_exception:
@@ -504,3 +880,43 @@ class Tracer:
                        format(**locals()))
 
         return self.trace
+
+
+def record_element_event(element: Comparable, mutated: bool) -> None:
+    """
+    record an access or a mutation of a graph element in the recorder of the current execution
+    @param element: the node or edge
+    @param mutated: whether the element is mutated
+    @return: None
+    """
+    # the elements used out of the traced functions, eg. when the graph is loaded, are not recorded
+    if getattr(thread_global, 'depth', -1) < 0:
+        return
+    Tracer.get_recorder().add_element_event(element.identity, mutated)
+
+
+def record_container_delta(container: TracedContainer, operation: str, index: Optional[int], items: Tuple) -> None:
+    """
+    record an operation on a traced container in the recorder of the current execution
+    @param container:
+    @param operation:
+    @param index: the position of the operation, None if the operation has no position
+    @param items: the items of the operation, which are recorded by their reprs
+    @return: None
+    """
+    if getattr(thread_global, 'depth', -1) < 0:
+        return
+    recorder = Tracer.get_recorder()
+    # the items are not represented unless the container is watched by the recorder,
+    # whose first state of the container carries all the items
+    if not recorder.recording or container.container_id not in recorder.observed_containers:
+        return
+    recorder.add_container_delta((
+        container.container_id, container.version, operation,
+        *(() if index is None else (index,)),
+        *(utils.get_shortish_repr(item) for item in items)
+    ))
+
+
+set_element_event_hook(record_element_event)
+set_delta_hook(record_container_delta)
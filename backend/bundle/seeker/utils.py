@@ -4,6 +4,7 @@ import re
 from typing import Mapping, Any, Callable, Union, Iterable
 
 from .pycompat import ABC, string_types
+from bundle.utils.bounded_repr import bounded_repr
 
 
 def _check_methods(C, *methods):
@@ -44,9 +45,13 @@ def shitcode(s):
     )
 
 
+# the representation of the values without custom representations, whose cost is bounded by its limits
+default_repr: Callable[..., str] = bounded_repr.repr
+
+
 def get_repr_function(item: Any, custom_repr: Mapping[Union[Callable, type], Callable]) -> Callable:
     """
-    get default representation function `repr` or custom representation function
+    get default representation function `bounded_repr.repr` or custom representation function
     @param item: the item
     @param custom_repr: custom representation function mappings
     @return: representation function for the item
@@ -56,7 +61,7 @@ def get_repr_function(item: Any, custom_repr: Mapping[Union[Callable, type], Cal
             condition = lambda x, y=condition: isinstance(x, y)
         if condition(item):
             return action
-    return repr
+    return default_repr
 
 
 DEFAULT_REPR_RE = re.compile(r' at 0x[a-f0-9A-F]{4,}')
@@ -78,7 +83,11 @@ def get_shortish_repr(item: Any,
 
     repr_function: Callable = get_repr_function(item, custom_repr)
     try:
-        r: str = repr_function(item)
+        if repr_function is default_repr:
+            # only the displayed part of a long value is represented
+            r: str = repr_function(item, max_length)
+        else:
+            r: str = repr_function(item)
     except Exception:
         r = 'REPR FAILED'
     r = r.replace('\r', '').replace('\n', '')
@@ -1,8 +1,10 @@
 import itertools
 import abc
+import keyword
 import logging
+from collections import OrderedDict
 from types import FrameType
-from typing import Tuple, List, Any
+from typing import Tuple, List, Any, Iterable, Optional, NamedTuple, Dict, Type
 
 try:
     from collections.abc import Mapping, Sequence
@@ -12,6 +14,84 @@ from copy import deepcopy
 
 from . import utils
 from . import pycompat
+from .containers import TracedContainer
+
+# the types whose values are compared by equality when the entries are diffed
+CHEAP_TYPES = (int, float, complex, str, bytes, bool, type(None))
+
+
+class ExplodedSummary(NamedTuple):
+    """
+    The stand-in of an exploded value when exploding is incremental or
+    limited, since the full repr of the value would defeat them.
+    """
+    type_name: str
+    size: int
+
+    def __repr__(self):
+        return f'<{self.type_name} of {self.size} entries>'
+
+
+class Overflow(NamedTuple):
+    """
+    The marker of the entries left out by `max_entries`
+    """
+    count: int
+
+    def __repr__(self):
+        return f'<{self.count} more entries>'
+
+
+class RemovedEntry(NamedTuple):
+    """
+    The marker of an entry removed since the last evaluation in the incremental mode
+    """
+    def __repr__(self):
+        return '<removed>'
+
+
+class ContainerMarker(NamedTuple):
+    """
+    The marker of a traced container, which is changed when its version is
+    """
+    container_id: int
+    version: int
+
+
+class IdentityMarker:
+    """
+    The marker of a value which is only compared by identity
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        # the value is held, so its id is not reused by another value
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, IdentityMarker) and other.value is self.value
+
+    __hash__ = None
+
+
+def get_entry_marker(value: Any) -> Any:
+    """
+    get what's compared to tell whether an entry is changed, without repr'ing it
+    @param value:
+    @return: the value itself if it's compared by equality, or the version of a traced
+             container, or the identity of other values
+    """
+    if type(value) in CHEAP_TYPES:
+        return value
+    if isinstance(value, TracedContainer):
+        return ContainerMarker(value.container_id, value.version)
+    if type(value) is tuple and all(type(item) in CHEAP_TYPES for item in value):
+        return value
+    return IdentityMarker(value)
+
+
+def is_same_entry(old_marker: Any, new_marker: Any) -> bool:
+    return old_marker is new_marker or (type(old_marker) is type(new_marker) and old_marker == new_marker)
 
 
 def needs_parentheses(source):
@@ -37,8 +117,17 @@ class BaseVariable(pycompat.ABC):
         @param frame:
         @return: the value(s) of this variable
         """
+        return self.evaluate_values(frame.f_globals or {}, frame.f_locals)
+
+    def evaluate_values(self, f_globals: Mapping, f_locals: Mapping):
+        """
+        evaluate the variable's value with given namespaces
+        @param f_globals: the globals of a frame
+        @param f_locals: the locals of a frame
+        @return: the value(s) of this variable
+        """
         try:
-            main_value = eval(self.code, frame.f_globals or {}, frame.f_locals)
+            main_value = eval(self.code, f_globals, f_locals)
         except Exception:
             return ()
 
@@ -82,20 +171,100 @@ class CommonVariable(BaseVariable):
             CommonVariable('arr[0]')
 
     It cannot be further formatted
+
+    The subclasses exploding the entries of a value can be limited::
+
+        Keys('dist', incremental=True, max_entries=100)
+
+    In the incremental mode, only the entries changed since the last
+    evaluation of the same value are given, where the entries are compared
+    by identity, cheap equality and the versions of traced containers (see
+    `get_entry_marker`) rather than by reprs. So the other values changed
+    in place are not found, and they should be traced containers. The
+    entries removed since the last evaluation are given as `RemovedEntry`.
+    `max_entries` caps the number of exploded entries, and the rest are
+    counted by an `Overflow` marker. In both cases the value itself is
+    given as an `ExplodedSummary`.
     """
+    # the number of values whose snapshots are kept by an incremental variable
+    SNAPSHOT_LIMIT = 16
+
+    def __init__(self, source, exclude=(), incremental: bool = False, max_entries: Optional[int] = None):
+        super().__init__(source, exclude)
+        self.incremental = incremental
+        self.max_entries = max_entries
+        # id of a value -> (the value, the markers of its entries)
+        self._snapshots: Dict[int, Tuple[Any, Dict[Any, Any]]] = OrderedDict()
+
+    @property
+    def _fingerprint(self):
+        return super()._fingerprint + (self.incremental, self.max_entries)
+
     def _values(self, main_value):
+        if self.incremental or self.max_entries is not None:
+            return self._limited_values(main_value)
+
         result = [(self.source, main_value)]
         for key in self._safe_keys(main_value):
-            try:
-                if key in self.exclude:
+            if key in self.exclude:
+                continue
+            result.append((self._entry_name(key), self._safe_value(main_value, key)))
+        return result
+
+    def _entry_name(self, key) -> str:
+        return '{}{}'.format(self.unambiguous_source, self._format_key(key))
+
+    def _safe_value(self, main_value, key):
+        try:
+            return self._get_value(main_value, key)
+        except Exception as e:
+            logging.error(f'Unknown exception occurs during evaluating _values of '
+                          f'key={key}, main_value={main_value}. '
+                          f'Errors: {e}')
+            return None
+
+    def _get_snapshot(self, main_value) -> Dict[Any, Any]:
+        # the snapshot holds the value, so its id is not reused by another value
+        value_id = id(main_value)
+        snapshot = self._snapshots.get(value_id)
+        if snapshot is None or snapshot[0] is not main_value:
+            snapshot = self._snapshots[value_id] = (main_value, {})
+            if len(self._snapshots) > self.SNAPSHOT_LIMIT:
+                self._snapshots.popitem(last=False)
+        else:
+            self._snapshots.move_to_end(value_id)
+        return snapshot[1]
+
+    def _limited_values(self, main_value):
+        key_iterator = iter(self._safe_keys(main_value))
+        keys = list(itertools.islice(key_iterator, self.max_entries) if self.max_entries is not None
+                    else key_iterator)
+        overflow = sum(1 for _ in key_iterator)
+
+        result = [(self.source, ExplodedSummary(type(main_value).__name__, len(keys) + overflow))]
+        markers = self._get_snapshot(main_value) if self.incremental else None
+        entry_count = 0
+        for key in keys:
+            if key in self.exclude:
+                continue
+            entry_count += 1
+            value = self._safe_value(main_value, key)
+            if markers is not None:
+                marker = get_entry_marker(value)
+                if key in markers and is_same_entry(markers[key], marker):
                     continue
-                value = self._get_value(main_value, key)
-            except Exception as e:
-                value = None
-                logging.error(f'Unknown exception occurs during evaluating _values of '
-                                f'key={key}, main_value={main_value}. '
-                                f'Errors: {e}')
-            result.append(('{}{}'.format(self.unambiguous_source, self._format_key(key)), value))
+                markers[key] = marker
+            result.append((self._entry_name(key), value))
+
+        # every entry given has a marker, so there are more markers only if some entries are removed
+        if markers is not None and len(markers) > entry_count:
+            current_keys = set(keys)
+            for key in [key for key in markers if key not in current_keys]:
+                del markers[key]
+                result.append((self._entry_name(key), RemovedEntry()))
+
+        if overflow:
+            result.append(('{}[...]'.format(self.unambiguous_source), Overflow(overflow)))
         return result
 
     def _safe_keys(self, main_value):
@@ -160,15 +329,28 @@ class Indices(Keys):
     def __getitem__(self, item):
         if not isinstance(item, slice):
             raise AssertionError(f'item {item} must be a slice instance')
+        snapshots, self._snapshots = self._snapshots, OrderedDict()
         result = deepcopy(self)
+        self._snapshots = snapshots
         result._slice = item
         return result
 
 
 class Exploding(BaseVariable):
     """
-    Dynamic variable
+    Dynamic variable, which explodes a value as `Keys`, `Indices` or `Attrs` by its type
     """
+    def __init__(self, source, exclude=(), incremental: bool = False, max_entries: Optional[int] = None):
+        super().__init__(source, exclude)
+        self.incremental = incremental
+        self.max_entries = max_entries
+        # the variables are kept, so that their snapshots are kept in the incremental mode
+        self._variables: Dict[Type[CommonVariable], CommonVariable] = {}
+
+    @property
+    def _fingerprint(self):
+        return super()._fingerprint + (self.incremental, self.max_entries)
+
     def _values(self, main_value):
         if isinstance(main_value, Mapping):
             cls = Keys
@@ -177,4 +359,94 @@ class Exploding(BaseVariable):
         else:
             cls = Attrs
 
-        return cls(self.source, self.exclude)._values(main_value)
+        variable = self._variables.get(cls)
+        if variable is None:
+            variable = self._variables[cls] = cls(self.source, self.exclude, self.incremental, self.max_entries)
+        return variable._values(main_value)
+
+
+class WatchBatch:
+    """
+    Evaluate all the watched variables of a tracer at once.
+
+    The watched names, which are most of the variables, are looked up in
+    the namespaces of the frame without `eval`. The other expressions are
+    compiled into one code object, so the code is run only once per event.
+    Each expression is guarded by its own `try`, so an expression which
+    fails gives `MISSING` and does not affect the others, and neither
+    does a watched local which is not assigned yet.
+    """
+    MISSING = object()
+    VALUES_NAME = '__watch_values'
+    MISSING_NAME = '__watch_missing'
+
+    def __init__(self, variables: Iterable[BaseVariable] = ()):
+        self.variables: Tuple[BaseVariable, ...] = tuple(variables)
+        # the positions of the variables which are names, and of the ones which are expressions
+        self.names: List[Tuple[int, str]] = []
+        self.expressions: List[int] = []
+        for index, variable in enumerate(self.variables):
+            source = variable.source.strip()
+            if source.isidentifier() and not keyword.iskeyword(source):
+                self.names.append((index, source))
+            else:
+                self.expressions.append(index)
+
+        self.code = None
+        if self.expressions:
+            source = ''.join(
+                f'try:\n'
+                f'    {self.VALUES_NAME}[{index}] = ({self.variables[index].source})\n'
+                f'except Exception:\n'
+                f'    {self.VALUES_NAME}[{index}] = {self.MISSING_NAME}\n'
+                for index in self.expressions
+            )
+            try:
+                self.code = compile(source, '<watch>', 'exec')
+            except SyntaxError as e:
+                logging.error(f'Cannot compile watched variables together. Error: {e}')
+
+    def values(self, frame: FrameType, f_locals: Optional[Mapping] = None) -> List[List[Tuple[str, Any]]]:
+        """
+        evaluate the variables in a given frame
+        @param frame:
+        @param f_locals: the locals of the frame if they are already fetched
+        @return: the values of each variable, in the order of the variables
+        """
+        if not self.variables:
+            return []
+
+        f_globals = frame.f_globals or {}
+        if f_locals is None:
+            f_locals = frame.f_locals
+
+        missing, f_builtins = self.MISSING, frame.f_builtins
+        main_values = [missing] * len(self.variables)
+        # the names are looked up in the same order as `eval` does
+        for index, name in self.names:
+            value = f_locals.get(name, missing)
+            if value is missing:
+                value = f_globals.get(name, missing)
+                if value is missing:
+                    value = f_builtins.get(name, missing)
+            main_values[index] = value
+
+        if self.code is not None:
+            # the names of the batch are put into a copy of the locals, so the locals of the frame are not changed
+            scope = dict(f_locals)
+            scope[self.VALUES_NAME], scope[self.MISSING_NAME] = main_values, missing
+            exec(self.code, f_globals, scope)
+
+        results = [variable._values(main_value) if main_value is not missing else ()
+                   for variable, main_value in zip(self.variables, main_values)]
+        if self.code is None:
+            # the expressions cannot be compiled together, so they are evaluated one by one
+            for index in self.expressions:
+                results[index] = self.variables[index].evaluate_values(f_globals, f_locals)
+        return results
+
+    def __len__(self):
+        return len(self.variables)
+
+    def __iter__(self):
+        return iter(self.variables)
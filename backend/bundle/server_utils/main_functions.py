@@ -1,20 +1,20 @@
-import json
-from typing import Mapping, Callable, Any
+import os
+from typing import Mapping, Callable, Union
 from wsgiref.simple_server import make_server
 from multiprocessing import Pool, TimeoutError
 
 from bundle.server_utils.params import TIMEOUT_SECONDS, REQUEST_CODE_NAME, ONLY_ACCEPTED_ORIGIN, ACCEPTED_ORIGIN, \
-    REQUEST_GRAPH_NAME, REQUEST_VERSION_NAME, VERSION
+    REQUEST_GRAPH_NAME, REQUEST_VERSION_NAME, REQUEST_DEBUG_NAME, REQUEST_RESULT_VERSION_NAME, \
+    REQUEST_TRACE_INDEX_NAME, REQUEST_PROFILE_NAME, REQUEST_RECORD_NAME, REQUEST_MEMORY_NAME, \
+    REQUEST_RESULT_FORMAT_NAME, BINARY_RESULT_FORMAT, RESPONSE_COMPRESSION_LEVEL, MAX_EXECUTION_MEMORY, VERSION
 from bundle.server_utils.utils import create_error_response, create_data_response, execute, \
-    ExecutionException
-
-
-class StringEncoder(json.JSONEncoder):
-    def default(self, obj: Any) -> Any:
-        try:
-            json.JSONEncoder.default(self, obj)
-        except TypeError:
-            return str(obj)
+    ExecutionException, create_result_path
+from bundle.utils.delta_result import DELTA_FORMAT_VERSION, DEFAULT_KEYFRAME_INTERVAL
+from bundle.utils.loop_folding import LOOP_FORMAT_VERSION
+from bundle.utils.json_stream import iter_json, read_json_file
+from bundle.utils.binary_trace import encode_trace, CONTENT_TYPE as BINARY_CONTENT_TYPE
+from bundle.utils.compression import iter_compressed, negotiate_encoding
+from bundle.utils.serializers import get_serializer
 
 
 def main(port: int = 7590):
@@ -49,18 +49,41 @@ def application(environ: Mapping, start_response: Callable):
             content = create_error_response(f'An exception occurs in the server. Error: {e}')
 
     headers.append(('Access-Control-Allow-Origin', origin))
+    if isinstance(content, bytes):
+        headers[0] = ('Content-Type', BINARY_CONTENT_TYPE)
+        chunks = [content]
+    else:
+        # the records are sent while they are encoded, without the whole json in memory
+        # the values which cannot be encoded, eg. the objects in `environ`, are sent as strings
+        chunks = (chunk.encode() for chunk in iter_json(content, default=str))
+
+    encoding = negotiate_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is not None:
+        headers.append(('Content-Encoding', encoding))
+        headers.append(('Vary', 'Accept-Encoding'))
+        chunks = iter_compressed(chunks, encoding, RESPONSE_COMPRESSION_LEVEL)
+
     start_response(response_code, headers)
-    return [json.dumps(content, cls=StringEncoder).encode()]
+    return chunks
 
 
 def time_out_execute(*args, **kwargs):
+    if kwargs.get('stream', True) and kwargs.get('result_path') is None:
+        # the file is created here, so it's deleted even if the execution times out
+        kwargs['result_path'] = create_result_path()
+    result_path = kwargs.get('result_path')
     with Pool(processes=1) as pool:
         try:
             result = pool.apply_async(func=execute, args=args, kwds=kwargs)
 
-            code_hash, exec_result = result.get(timeout=TIMEOUT_SECONDS)
+            code_hash, exec_result, exec_info = result.get(timeout=TIMEOUT_SECONDS)
+            if result_path is not None:
+                # the records are encoded into the file by the execution, and they are sent from there
+                exec_result = read_json_file(result_path, delete=True)
 
-            response_dict = create_data_response({'codeHash': code_hash, 'execResult': exec_result})
+            response_dict = create_data_response({'codeHash': code_hash,
+                                                  'execResult': exec_result,
+                                                  'execInfo': exec_info})
         except TimeoutError:
             response_dict = create_error_response(f'Timeout: Code running timed out after {TIMEOUT_SECONDS} s.')
         except ExecutionException as e:
@@ -70,10 +93,13 @@ def time_out_execute(*args, **kwargs):
             response_dict = create_error_response(f'Unknown Exception: {e}.')
 
         print('Execution done.')
+
+    if result_path is not None and 'errors' in response_dict and os.path.exists(result_path):
+        os.remove(result_path)
     return response_dict
 
 
-def application_helper(environ: Mapping) -> Mapping:
+def application_helper(environ: Mapping) -> Union[Mapping, bytes]:
     method = environ.get('REQUEST_METHOD')
     path = environ.get('PATH_INFO')
 
@@ -87,7 +113,7 @@ def application_helper(environ: Mapping) -> Mapping:
 
     # get request content
     request_body = environ['wsgi.input'].read(int(environ['CONTENT_LENGTH']))
-    request_json_object = json.loads(request_body)
+    request_json_object = get_serializer().loads(request_body)
     if REQUEST_VERSION_NAME not in request_json_object or request_json_object[REQUEST_VERSION_NAME] != VERSION:
         return create_error_response('The current version of your local server (%s) does not match version of the web '
                                      'app ("%s"). Please download the newest version at '
@@ -100,6 +126,27 @@ def application_helper(environ: Mapping) -> Mapping:
     if REQUEST_GRAPH_NAME not in request_json_object:
         return create_error_response('No Graph Intel Embedded In The Request.')
 
+    result_version = request_json_object.get(REQUEST_RESULT_VERSION_NAME)
+    # the binary trace carries the full records, so the result version is not used
+    binary = request_json_object.get(REQUEST_RESULT_FORMAT_NAME) == BINARY_RESULT_FORMAT
+
     # execute program with timed out
-    return time_out_execute(code=request_json_object[REQUEST_CODE_NAME],
-                            graph_json=request_json_object[REQUEST_GRAPH_NAME])
+    response = time_out_execute(code=request_json_object[REQUEST_CODE_NAME],
+                                graph_json=request_json_object[REQUEST_GRAPH_NAME],
+                                debug=bool(request_json_object.get(REQUEST_DEBUG_NAME, False)),
+                                keyframe_interval=DEFAULT_KEYFRAME_INTERVAL
+                                if result_version == DELTA_FORMAT_VERSION and not binary else None,
+                                fold_loops=result_version == LOOP_FORMAT_VERSION and not binary,
+                                trace_index=bool(request_json_object.get(REQUEST_TRACE_INDEX_NAME, False)),
+                                profile=bool(request_json_object.get(REQUEST_PROFILE_NAME, False)),
+                                record=bool(request_json_object.get(REQUEST_RECORD_NAME, True)),
+                                memory=bool(request_json_object.get(REQUEST_MEMORY_NAME, False)),
+                                max_memory=MAX_EXECUTION_MEMORY,
+                                # the json records are streamed, while the binary trace is encoded from the records
+                                stream=not binary)
+    if not binary or 'errors' in response:
+        return response
+
+    # the other parts of the response are sent as the metadata of the trace
+    data = dict(response['data'])
+    return encode_trace(data.pop('execResult'), metadata=data)
@@ -1,7 +1,16 @@
+from typing import Optional
+
 DEFAULT_PORT: int = 7590
 ONLY_ACCEPTED_ORIGIN: bool = False
 ACCEPTED_ORIGIN: str = ''
 TIMEOUT_SECONDS: int = 5
+# the budget of recorder for each execution, `None` means no limit
+MAX_RECORDED_STEPS: int = 100_000
+MAX_RECORDED_BYTES: int = 256 * 1024 * 1024
+# the memory an execution can allocate, which is traced by tracemalloc when it's set, `None` means no limit
+MAX_EXECUTION_MEMORY: Optional[int] = None
+# the estimated size of records kept in memory, the older ones are spilled into the cache folder
+TRACE_STORE_THRESHOLD: int = 16 * 1024 * 1024
 
 ENTRY_PY_MODULE_NAME: str = 'entry'
 ENTRY_PY_FILE_NAME: str = f'{ENTRY_PY_MODULE_NAME}.py'
@@ -10,6 +19,23 @@ GRAPH_OBJ_ANCHOR_NAME: str = 'graph_object'
 
 REQUEST_CODE_NAME: str = 'code'
 REQUEST_GRAPH_NAME: str = 'graph'
+# the flag which attaches the tracer stats to the execution info
+REQUEST_DEBUG_NAME: str = 'debug'
+# the version of the result format, the results of version 2 are delta-encoded and the ones of version 3 are loop-folded
+REQUEST_RESULT_VERSION_NAME: str = 'resultVersion'
+# the flag which attaches the trace index to the execution info
+REQUEST_TRACE_INDEX_NAME: str = 'traceIndex'
+# the flag which attaches the line profile to the execution info
+REQUEST_PROFILE_NAME: str = 'profile'
+# the flag which records the steps, it can be false when only the profile is wanted
+REQUEST_RECORD_NAME: str = 'record'
+# the flag which attaches the memory used by the execution to the execution info
+REQUEST_MEMORY_NAME: str = 'memory'
+# the format of the response, which is json unless it's binary, see `bundle.utils.binary_trace`
+REQUEST_RESULT_FORMAT_NAME: str = 'resultFormat'
+BINARY_RESULT_FORMAT: str = 'binary'
+# the compression level of the responses sent to the clients accepting gzip or deflate, see `bundle.utils.compression`
+RESPONSE_COMPRESSION_LEVEL: int = 6
 
 REQUEST_VERSION_NAME: str = 'version'
 VERSION: str = '0.1.2'
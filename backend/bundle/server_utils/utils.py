@@ -1,16 +1,22 @@
 import argparse
+import contextlib
 import json
-import sys
+import logging
+import os
 import pathlib
-from importlib import import_module
-from typing import Mapping, Any, Callable, Union, List, Tuple
+import tempfile
+from importlib.util import spec_from_file_location, module_from_spec
+from typing import Mapping, Any, Callable, Union, List, Tuple, Optional
 
 from .params import DEFAULT_PORT, GRAPH_OBJ_ANCHOR_NAME, ENTRY_PY_MODULE_NAME, MAIN_FUNCTION_NAME, \
-    ENTRY_PY_FILE_NAME
+    ENTRY_PY_FILE_NAME, MAX_RECORDED_STEPS, MAX_RECORDED_BYTES, TRACE_STORE_THRESHOLD
 
 from ..GraphObjects.Graph import Graph
-from ..utils.cache_file_helpers import TempSysPathAdder, get_md5_of_a_string
-from ..controller import controller
+from ..utils.cache_file_helpers import get_md5_of_a_string
+from ..utils.recorder import RecordLimitExceeded, RecordingPolicy
+from ..controller import ExecutionSession
+
+execution_logger = logging.getLogger('execution_request')
 
 
 class ExecutionException(Exception):
@@ -42,7 +48,51 @@ def create_data_response(data: Any) -> dict:
     }
 
 
-def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool = False) -> Tuple[str, List[Mapping]]:
+def create_result_path() -> pathlib.Path:
+    """
+    create an empty temporary file for the json of processed records, which is deleted by the caller
+    @return: the path of the file
+    """
+    file_descriptor, result_path = tempfile.mkstemp(suffix='.json', prefix='graphery_result_')
+    os.close(file_descriptor)
+    return pathlib.Path(result_path)
+
+
+def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool = False,
+            recording_policy: Optional[RecordingPolicy] = None,
+            debug: bool = False,
+            keyframe_interval: Optional[int] = None,
+            fold_loops: bool = False,
+            trace_index: bool = False,
+            profile: bool = False,
+            record: bool = True,
+            memory: bool = False,
+            max_memory: Optional[int] = None,
+            stream: bool = True,
+            result_path: Optional[Union[str, pathlib.Path]] = None) \
+        -> Tuple[str, Union[List[Mapping], Mapping, pathlib.Path], Mapping]:
+    """
+    execute the code on the graph
+    @param code: the code containing the main function
+    @param graph_json: the graph
+    @param auto_delete_cache: whether the cache folder of the code is deleted after the execution
+    @param recording_policy: the policy deciding which steps are recorded, `None` means all of them
+    @param debug: whether the tracer stats are collected and attached to the execution info
+    @param keyframe_interval: the interval of keyframes if the records are delta-encoded, `None` means the full records
+    @param fold_loops: whether the loops in the records are folded, which is ignored if the records are delta-encoded
+    @param trace_index: whether the index of lines, variables and graph elements is attached to the execution info
+    @param profile: whether the line profile of the code is attached to the execution info
+    @param record: whether the steps are recorded, which can be unset to only profile the code on a large graph
+    @param memory: whether the memory used by the code is traced and attached to the execution info
+    @param max_memory: the memory in bytes the code can allocate before it's stopped, `None` means no limit,
+                       the memory is traced if it's set
+    @param stream: whether the processed records are encoded as json into a file while they are processed,
+                   so they are not kept in memory, otherwise the processed records are returned
+    @param result_path: the file of the json if the records are streamed,
+                        `None` means a temporary file, see `create_result_path`
+    @return: the hash of the code, the path of the json of the processed records or the processed records,
+             and the execution info
+    """
     folder_hash: str = get_md5_of_a_string(code)
 
     try:
@@ -52,19 +102,27 @@ def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool
     except Exception as e:
         raise ExecutionException(f'Cannot import graph objects. Error: {e}')
 
-    with controller as folder_creator, \
-            folder_creator(folder_hash, auto_delete=auto_delete_cache) as cache_folder, \
-            TempSysPathAdder(cache_folder):
+    # every execution has its own session, so that executions can run concurrently in one process,
+    # and only the processed records are returned, so the values are recorded as their reprs
+    session = ExecutionSession(instrument=debug, freeze_values=True, profile=profile, record=record)
+    with session as folder_creator, \
+            folder_creator(folder_hash, auto_delete=auto_delete_cache) as cache_folder:
         try:
             entry_file: pathlib.Path = cache_folder.cache_folder_path / ENTRY_PY_FILE_NAME
 
-            entry_file.write_text(code)
+            # the same code shares one folder, so the file is replaced as a whole
+            # in case another execution is reading it
+            temp_entry_file: pathlib.Path = entry_file.with_name(f'{session.session_id}.{ENTRY_PY_FILE_NAME}')
+            temp_entry_file.write_text(code)
+            temp_entry_file.replace(entry_file)
         except Exception as e:
             raise ExecutionException(f'Cannot create temporary execution file. Error: {e}')
 
         try:
-            imported_module = import_module(ENTRY_PY_MODULE_NAME)
-
+            # the module is not put into `sys.modules`, since another execution may load the same name
+            module_spec = spec_from_file_location(ENTRY_PY_MODULE_NAME, entry_file)
+            imported_module = module_from_spec(module_spec)
+            module_spec.loader.exec_module(imported_module)
         except Exception as e:
             raise ExecutionException(f'Cannot import module. Error: {e}')
 
@@ -79,13 +137,44 @@ def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool
 
             setattr(imported_module, GRAPH_OBJ_ANCHOR_NAME, graph_object)
 
-            controller.purge_records()
-            main_function()
-            controller.generate_processed_record()
+            session.set_record_limits(max_steps=MAX_RECORDED_STEPS, max_bytes=MAX_RECORDED_BYTES)
+            session.set_recording_policy(recording_policy)
+            session.set_trace_store(cache_folder, TRACE_STORE_THRESHOLD)
+            memory_context = session.measure_memory(max_memory, str(entry_file)) \
+                if memory or max_memory is not None else contextlib.nullcontext()
+            try:
+                with session.measure_wall_time(), memory_context:
+                    main_function()
+            except RecordLimitExceeded:
+                # the records made before the limit is hit are still a valid trace
+                pass
+            if stream:
+                if result_path is None:
+                    result_path = create_result_path()
+                # the spilled records are read from the trace store in the cache folder
+                session.write_processed_record(result_path, keyframe_interval,
+                                               fold_loops and keyframe_interval is None, trace_index)
+            else:
+                # the records are returned as they are, and dumped by the caller
+                session.generate_processed_record(trace_index=trace_index, result_json=False)
         except Exception as e:
             raise ExecutionException(e)
         finally:
-            del sys.modules[ENTRY_PY_MODULE_NAME]
             del imported_module
 
-    return folder_hash, controller.get_processed_result()
+    if session.memory_monitor is not None:
+        memory_info = session.memory_monitor.as_dict()
+        execution_logger.info(f'code (hash: {folder_hash}) allocated {memory_info["peakBytes"]} bytes at peak, '
+                              f'{memory_info["userBytes"]} bytes by the user and '
+                              f'{memory_info["traceBytes"]} bytes of records. '
+                              f'Top allocations: {memory_info["topAllocations"][:3]}')
+
+    if stream:
+        exec_result = pathlib.Path(result_path)
+    elif keyframe_interval is not None:
+        exec_result = session.get_delta_result(keyframe_interval)
+    elif fold_loops:
+        exec_result = session.get_folded_result()
+    else:
+        exec_result = session.get_processed_result()
+    return folder_hash, exec_result, session.get_execution_info()
@@ -0,0 +1,171 @@
+"""
+algorithms and graphs used by the tracer benchmarks
+
+The algorithms are written in the way tutorials are written, ie. plain loops
+over the graph object, so the tracer sees a representative mix of events.
+"""
+import heapq
+import random
+from collections import deque
+from typing import Mapping, Callable, NamedTuple, Tuple, Sequence
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.seeker import TracedDict, TracedHeap
+from bundle.tests.seeker_tests.samples import recorder as recorder_samples
+
+
+def generate_graph_json(size: int, edge_factor: int = 2, seed: int = 0) -> Mapping:
+    """
+    generate a connected graph in the cytoscape json format
+    @param size: the number of nodes
+    @param edge_factor: the number of edges per node, besides the ones of the spanning tree
+    @param seed: the random seed, so that the graphs of the same size are the same
+    @return: the graph json
+    """
+    rand = random.Random(seed)
+    nodes = [{'data': {'id': f'v{index}', 'displayed': {}}} for index in range(size)]
+    edges = []
+    for index in range(1, size):
+        # a random spanning tree keeps the graph connected
+        edges.append((rand.randrange(index), index))
+    for _ in range(size * edge_factor if size > 1 else 0):
+        edges.append(tuple(rand.sample(range(size), 2)))
+
+    return {'elements': {
+        'nodes': nodes,
+        'edges': [
+            {'data': {'id': f'e{index}', 'source': f'v{source}', 'target': f'v{target}',
+                      'displayed': {'weight': rand.randint(1, 10)}}}
+            for index, (source, target) in enumerate(edges)
+        ]
+    }}
+
+
+def generate_graph(size: int, edge_factor: int = 2, seed: int = 0) -> Graph:
+    return Graph.graph_generator(generate_graph_json(size, edge_factor, seed))
+
+
+def bfs(graph: Graph):
+    adjacency = {}
+    for edge in graph.E:
+        source, target = edge.get_nodes()
+        adjacency.setdefault(source, []).append(target)
+        adjacency.setdefault(target, []).append(source)
+
+    start = next(iter(graph.V))
+    visited = {start}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        for neighbor in adjacency.get(current, ()):
+            if neighbor not in visited:
+                visited.add(neighbor)
+                queue.append(neighbor)
+    return len(visited)
+
+
+def dfs(graph: Graph):
+    adjacency = {}
+    for edge in graph.E:
+        source, target = edge.get_nodes()
+        adjacency.setdefault(source, []).append(target)
+        adjacency.setdefault(target, []).append(source)
+
+    start = next(iter(graph.V))
+    visited = set()
+    stack = [start]
+    while stack:
+        current = stack.pop()
+        if current in visited:
+            continue
+        visited.add(current)
+        for neighbor in adjacency.get(current, ()):
+            if neighbor not in visited:
+                stack.append(neighbor)
+    return len(visited)
+
+
+def dijkstra(graph: Graph):
+    adjacency = {}
+    for edge in graph.E:
+        source, target = edge.get_nodes()
+        weight = edge['weight']
+        adjacency.setdefault(source, []).append((target, weight))
+        adjacency.setdefault(target, []).append((source, weight))
+
+    start = next(iter(graph.V))
+    distance = {start: 0}
+    heap = [(0, start.identity, start)]
+    while heap:
+        current_distance, _, current = heapq.heappop(heap)
+        if current_distance > distance[current]:
+            continue
+        for neighbor, weight in adjacency.get(current, ()):
+            new_distance = current_distance + weight
+            if new_distance < distance.get(neighbor, new_distance + 1):
+                distance[neighbor] = new_distance
+                heapq.heappush(heap, (new_distance, neighbor.identity, neighbor))
+    return distance
+
+
+def traced_dijkstra(graph: Graph):
+    # the same as `dijkstra`, but the distances and the heap report their own changes
+    adjacency = {}
+    for edge in graph.E:
+        source, target = edge.get_nodes()
+        weight = edge['weight']
+        adjacency.setdefault(source, []).append((target, weight))
+        adjacency.setdefault(target, []).append((source, weight))
+
+    start = next(iter(graph.V))
+    distance = TracedDict({start: 0})
+    heap = TracedHeap([(0, start.identity, start)])
+    while heap:
+        current_distance, _, current = heap.pop()
+        if current_distance > distance[current]:
+            continue
+        for neighbor, weight in adjacency.get(current, ()):
+            new_distance = current_distance + weight
+            if new_distance < distance.get(neighbor, new_distance + 1):
+                distance[neighbor] = new_distance
+                heap.push((new_distance, neighbor.identity, neighbor))
+    return distance
+
+
+def fibonacci(n: int) -> int:
+    if n < 2:
+        return n
+    return fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def recursion(graph: Graph):
+    # the recursion grows slowly with the graph, since it's exponential
+    return fibonacci(len(graph.V).bit_length() + 8)
+
+
+def loop_samples(graph: Graph):
+    for _ in range(len(graph.V)):
+        # the samples of the seeker tests, without their own tracers
+        recorder_samples.simple_loop_trace_index.__wrapped__()
+        recorder_samples.simple_while_loop_trace_index.__wrapped__()
+
+
+class Algorithm(NamedTuple):
+    name: str
+    function: Callable[[Graph], object]
+    # the watched variables, and the functions traced besides the main one
+    watch: Tuple[str, ...]
+    helpers: Sequence[Callable] = ()
+    depth: int = 1
+
+
+ALGORITHMS: Mapping[str, Algorithm] = {
+    algorithm.name: algorithm for algorithm in [
+        Algorithm('bfs', bfs, ('current', 'neighbor', 'visited', 'queue')),
+        Algorithm('dfs', dfs, ('current', 'neighbor', 'visited', 'stack')),
+        Algorithm('dijkstra', dijkstra, ('current', 'neighbor', 'current_distance', 'distance')),
+        Algorithm('traced_dijkstra', traced_dijkstra, ('current', 'neighbor', 'current_distance', 'distance', 'heap')),
+        Algorithm('recursion', recursion, ('n',), helpers=(fibonacci,)),
+        Algorithm('samples', loop_samples, ('i',), depth=2),
+    ]
+}
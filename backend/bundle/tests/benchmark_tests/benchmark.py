@@ -0,0 +1,240 @@
+"""
+Tracer overhead benchmarks
+
+Every algorithm in `algorithms.ALGORITHMS` is run on generated graphs of
+increasing sizes, in four modes:
+
+    - untraced:      the plain function
+    - null_sink:     traced, the log is dropped
+    - default_sink:  traced, the log is written to stderr (redirected to devnull)
+    - processed:     traced with the null sink, and the records are processed into json
+
+Usage::
+
+    python -m bundle.tests.benchmark_tests.benchmark --sizes 10 100 1000 --output result.json
+    python -m bundle.tests.benchmark_tests.benchmark --baseline bundle/tests/benchmark_tests/baseline.json
+
+The slowdown ratios are compared with the baseline, since they depend less
+on the machine than the absolute time. The command exits with 1 if any ratio
+is worse than the baseline by more than the tolerance.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import pathlib
+import sys
+import timeit
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Mapping, List, Optional, Sequence, Any, Tuple
+
+from bundle.seeker import tracer
+from bundle.utils.processor import Processor
+from bundle.utils.recorder import Recorder
+from bundle.tests.benchmark_tests.algorithms import ALGORITHMS, Algorithm, generate_graph
+
+BASELINE_PATH: pathlib.Path = pathlib.Path(__file__).parent / 'baseline.json'
+DEFAULT_SIZES: Tuple[int, ...] = (10, 50, 200)
+DEFAULT_REPEAT: int = 5
+DEFAULT_TOLERANCE: float = 0.5
+
+UNTRACED = 'untraced'
+NULL_SINK = 'null_sink'
+DEFAULT_SINK = 'default_sink'
+PROCESSED = 'processed'
+MODES: Tuple[str, ...] = (UNTRACED, NULL_SINK, DEFAULT_SINK, PROCESSED)
+
+
+def _null_sink(s: str) -> None:
+    pass
+
+
+def make_runner(algorithm: Algorithm, mode: str, graph) -> Callable[[], Tuple[Optional[Recorder], int]]:
+    """
+    create a function which runs the algorithm once in the given mode
+    @param algorithm:
+    @param mode: one of `MODES`
+    @param graph: the input graph
+    @return: a function returning the recorder of the run, `None` if it's not traced,
+             and the size of the processed json
+    """
+    if mode == UNTRACED:
+        def run_untraced():
+            algorithm.function(graph)
+            return None, 0
+        return run_untraced
+
+    tracer_instance = tracer(*algorithm.watch,
+                             output=None if mode == DEFAULT_SINK else _null_sink,
+                             depth=algorithm.depth)
+    traced_function = tracer_instance(algorithm.function)
+    for helper in algorithm.helpers:
+        tracer_instance.target_codes.add(helper.__code__)
+
+    def run_traced():
+        recorder = Recorder()
+        with tracer.bind(recorder), open(os.devnull, 'w') as devnull, contextlib.redirect_stderr(devnull):
+            traced_function(graph)
+        if mode != PROCESSED:
+            return recorder, 0
+
+        processor = Processor()
+        processor._no_limit_override(True)
+        processor.load_data(recorder)
+        processor.generate_result_json()
+        return recorder, len(processor.get_result_json())
+
+    return run_traced
+
+
+def measure(algorithm: Algorithm, size: int, mode: str, repeat: int = DEFAULT_REPEAT) -> Mapping[str, Any]:
+    """
+    measure an algorithm in a mode
+    @param algorithm:
+    @param size: the number of nodes of the input graph
+    @param mode: one of `MODES`
+    @param repeat: the best time of the repeated runs is taken
+    @return: the time, the number of events, the peak memory and the size of the trace
+    """
+    graph = generate_graph(size)
+    runner = make_runner(algorithm, mode, graph)
+
+    best_time, recorder, json_size = float('inf'), None, 0
+    if mode == UNTRACED:
+        # an untraced run takes microseconds, so it's repeated until the time is measurable
+        timer = timeit.Timer(runner)
+        number, _ = timer.autorange()
+        best_time = min(timer.repeat(repeat, number)) / number
+    else:
+        # like timeit, the garbage collector is disabled so that it does not add noise to the time
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                start = perf_counter()
+                recorder, json_size = runner()
+                best_time = min(best_time, perf_counter() - start)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    # memory is measured in another run, since tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        runner()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    events = recorder.step_count if recorder is not None else 0
+    return {
+        'algorithm': algorithm.name,
+        'size': size,
+        'mode': mode,
+        'seconds': best_time,
+        'events': events,
+        'eventsPerSecond': events / best_time if best_time else 0,
+        'peakMemory': peak_memory,
+        'traceSteps': recorder.step_number if recorder is not None else 0,
+        'traceBytes': recorder.recorded_bytes if recorder is not None else 0,
+        'processedJsonBytes': json_size,
+    }
+
+
+def run_benchmarks(algorithm_names: Sequence[str] = tuple(ALGORITHMS),
+                   sizes: Sequence[int] = DEFAULT_SIZES,
+                   modes: Sequence[str] = MODES,
+                   repeat: int = DEFAULT_REPEAT) -> List[Mapping[str, Any]]:
+    """
+    run the benchmarks and calculate the slowdown ratio against the untraced mode
+    @param algorithm_names:
+    @param sizes:
+    @param modes: the untraced mode is always measured
+    @param repeat:
+    @return: a list of results
+    """
+    results = []
+    for name in algorithm_names:
+        algorithm = ALGORITHMS[name]
+        for size in sizes:
+            untraced = measure(algorithm, size, UNTRACED, repeat)
+            for mode in modes:
+                result = dict(untraced) if mode == UNTRACED else dict(measure(algorithm, size, mode, repeat))
+                result['slowdown'] = result['seconds'] / untraced['seconds'] if untraced['seconds'] else 0
+                results.append(result)
+    return results
+
+
+def _result_key(result: Mapping[str, Any]) -> Tuple[str, int, str]:
+    return result['algorithm'], result['size'], result['mode']
+
+
+def compare_with_baseline(results: Sequence[Mapping[str, Any]],
+                          baseline: Sequence[Mapping[str, Any]],
+                          tolerance: float = DEFAULT_TOLERANCE) -> List[Mapping[str, Any]]:
+    """
+    find the results whose slowdown ratio is worse than the baseline
+    @param results:
+    @param baseline: the results stored before
+    @param tolerance: the allowed relative increase of the slowdown ratio
+    @return: the regressions, with the ratios of the baseline and the current run
+    """
+    baseline_slowdowns = {_result_key(result): result['slowdown'] for result in baseline}
+    regressions = []
+    for result in results:
+        expected = baseline_slowdowns.get(_result_key(result))
+        if expected is not None and result['slowdown'] > expected * (1 + tolerance):
+            regressions.append({
+                'algorithm': result['algorithm'],
+                'size': result['size'],
+                'mode': result['mode'],
+                'baselineSlowdown': expected,
+                'slowdown': result['slowdown'],
+            })
+    return regressions
+
+
+def format_results(results: Sequence[Mapping[str, Any]]) -> str:
+    lines = [f'{"algorithm":<16} {"size":>6} {"mode":<13} {"seconds":>10} {"events/s":>12} '
+             f'{"slowdown":>9} {"peak mem":>10} {"trace":>10}']
+    for result in results:
+        lines.append(f'{result["algorithm"]:<16} {result["size"]:>6} {result["mode"]:<13} '
+                     f'{result["seconds"]:>10.5f} {result["eventsPerSecond"]:>12.0f} '
+                     f'{result["slowdown"]:>9.1f} {result["peakMemory"]:>10} {result["traceBytes"]:>10}')
+    return '\n'.join(lines)
+
+
+def arg_parser(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Tracer overhead benchmarks')
+    parser.add_argument('-a', '--algorithms', nargs='+', default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument('-s', '--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument('-m', '--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('-o', '--output', type=pathlib.Path, help='the json file the results are written to')
+    parser.add_argument('-b', '--baseline', type=pathlib.Path, help='the json file of the baseline results')
+    parser.add_argument('-t', '--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    return parser.parse_args(args)
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    options = arg_parser(args)
+    results = run_benchmarks(options.algorithms, options.sizes, options.modes, options.repeat)
+    print(format_results(results))
+
+    if options.output:
+        options.output.write_text(json.dumps(results, indent=2))
+
+    if options.baseline:
+        regressions = compare_with_baseline(results, json.loads(options.baseline.read_text()), options.tolerance)
+        for regression in regressions:
+            print('Regression: {algorithm} (size {size}, {mode}) slows down {slowdown:.1f}x, '
+                  'while the baseline is {baselineSlowdown:.1f}x'.format(**regression))
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Exploded variable benchmarks
+
+A large dictionary is watched by `Keys`, which explodes all the entries,
+in the incremental mode, and with `max_entries`. One entry is changed
+before each event, like in a loop relaxing the distances of a graph.
+
+Usage::
+
+    python -m bundle.tests.benchmark_tests.incremental_benchmark --sizes 500 5000
+
+The speedups are relative to exploding all the entries.
+"""
+import argparse
+import sys
+from time import perf_counter
+from typing import Any, List, Mapping, Optional, Sequence
+
+from bundle.seeker.sight import get_local_values
+from bundle.seeker.variables import Keys
+
+DEFAULT_SIZES = (500, 5000)
+DEFAULT_REPEAT = 20
+DEFAULT_MAX_ENTRIES = 100
+
+
+def _time(variable: Keys, size: int, repeat: int) -> float:
+    dist = {index: index for index in range(size)}
+    frame = sys._getframe()
+    start = perf_counter()
+    for index in range(repeat):
+        dist[index % size] = -index
+        get_local_values(frame, [variable])
+    return perf_counter() - start
+
+
+def measure(size: int, repeat: int = DEFAULT_REPEAT, max_entries: int = DEFAULT_MAX_ENTRIES) -> Mapping[str, Any]:
+    """
+    measure the events in which a dictionary is exploded
+    @param size: the number of the entries
+    @param repeat:
+    @param max_entries: the number of the entries exploded by the limited variable
+    @return: the time of an event in seconds, of each mode
+    """
+    full_time = _time(Keys('dist'), size, repeat) / repeat
+    incremental_time = _time(Keys('dist', incremental=True), size, repeat) / repeat
+    limited_time = _time(Keys('dist', max_entries=max_entries), size, repeat) / repeat
+    return {
+        'size': size,
+        'fullSeconds': full_time,
+        'incrementalSeconds': incremental_time,
+        'limitedSeconds': limited_time,
+        'incrementalSpeedup': full_time / incremental_time if incremental_time else 0,
+        'limitedSpeedup': full_time / limited_time if limited_time else 0,
+    }
+
+
+def run_benchmarks(sizes: Sequence[int] = DEFAULT_SIZES, repeat: int = DEFAULT_REPEAT,
+                   max_entries: int = DEFAULT_MAX_ENTRIES) -> List[Mapping[str, Any]]:
+    return [measure(size, repeat, max_entries) for size in sizes]
+
+
+def format_results(results: Sequence[Mapping[str, Any]]) -> str:
+    lines = [f'{"size":>8} {"full ms":>9} {"incremental ms":>15} {"limited ms":>11} {"speedups":>16}']
+    for result in results:
+        lines.append(f'{result["size"]:>8} {result["fullSeconds"] * 1e3:>9.3f} '
+                     f'{result["incrementalSeconds"] * 1e3:>15.3f} {result["limitedSeconds"] * 1e3:>11.3f} '
+                     f'{result["incrementalSpeedup"]:>7.2f}x {result["limitedSpeedup"]:>7.2f}x')
+    return '\n'.join(lines)
+
+
+def arg_parser(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Exploded variable benchmarks')
+    parser.add_argument('-s', '--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('-m', '--max-entries', type=int, default=DEFAULT_MAX_ENTRIES)
+    return parser.parse_args(args)
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    options = arg_parser(args)
+    print(format_results(run_benchmarks(options.sizes, options.repeat, options.max_entries)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
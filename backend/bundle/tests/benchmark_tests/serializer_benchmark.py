@@ -0,0 +1,116 @@
+"""
+Serializer benchmarks
+
+The results of the algorithms in `algorithms.ALGORITHMS` are traced and
+processed, and then encoded and decoded by every serializer installed.
+
+Usage::
+
+    python -m bundle.tests.benchmark_tests.serializer_benchmark --sizes 50 200
+
+The speedups are relative to the `json` module of the standard library.
+"""
+import argparse
+import sys
+from time import perf_counter
+from typing import Any, List, Mapping, Optional, Sequence
+
+from bundle.tests.benchmark_tests.algorithms import ALGORITHMS, generate_graph
+from bundle.tests.benchmark_tests.benchmark import make_runner, NULL_SINK, DEFAULT_REPEAT
+from bundle.utils.processor import Processor
+from bundle.utils.serializers import Serializer, StdlibSerializer, available_serializers
+
+DEFAULT_SIZES = (50, 200)
+
+
+def trace_result(algorithm_name: str, size: int) -> List[Mapping]:
+    """
+    trace an algorithm and process its records
+    @param algorithm_name: one of `ALGORITHMS`
+    @param size: the number of nodes of the input graph
+    @return: the processed result
+    """
+    recorder, _ = make_runner(ALGORITHMS[algorithm_name], NULL_SINK, generate_graph(size))()
+    processor = Processor()
+    processor._no_limit_override(True)
+    return processor.load_data(recorder)
+
+
+def _best_time(function, repeat: int) -> float:
+    best_time = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        best_time = min(best_time, perf_counter() - start)
+    return best_time
+
+
+def measure(result: List[Mapping], serializer: Serializer, repeat: int = DEFAULT_REPEAT) -> Mapping[str, Any]:
+    """
+    measure the encoding and the decoding of a result
+    @param result: the processed result
+    @param serializer:
+    @param repeat: the best time of the repeated runs is taken
+    @return: the time of encoding and decoding, and the size of the json
+    """
+    document = serializer.dumps(result)
+    return {
+        'serializer': serializer.name,
+        'jsonBytes': len(document),
+        'dumpsSeconds': _best_time(lambda: serializer.dumps(result), repeat),
+        'loadsSeconds': _best_time(lambda: serializer.loads(document), repeat),
+    }
+
+
+def run_benchmarks(algorithm_names: Sequence[str] = tuple(ALGORITHMS),
+                   sizes: Sequence[int] = DEFAULT_SIZES,
+                   repeat: int = DEFAULT_REPEAT) -> List[Mapping[str, Any]]:
+    """
+    run the benchmarks and calculate the speedups against the standard library
+    @param algorithm_names:
+    @param sizes:
+    @param repeat:
+    @return: a list of results
+    """
+    serializers = available_serializers()
+    results = []
+    for name in algorithm_names:
+        for size in sizes:
+            result = trace_result(name, size)
+            baseline = measure(result, serializers[StdlibSerializer.name], repeat)
+            for serializer in serializers.values():
+                measured = dict(baseline if serializer.name == StdlibSerializer.name
+                                else measure(result, serializer, repeat))
+                measured.update(algorithm=name, size=size, steps=len(result),
+                                dumpsSpeedup=baseline['dumpsSeconds'] / measured['dumpsSeconds'],
+                                loadsSpeedup=baseline['loadsSeconds'] / measured['loadsSeconds'])
+                results.append(measured)
+    return results
+
+
+def format_results(results: Sequence[Mapping[str, Any]]) -> str:
+    lines = [f'{"algorithm":<16} {"size":>6} {"serializer":<10} {"json":>10} '
+             f'{"dumps":>10} {"speedup":>8} {"loads":>10} {"speedup":>8}']
+    for result in results:
+        lines.append(f'{result["algorithm"]:<16} {result["size"]:>6} {result["serializer"]:<10} '
+                     f'{result["jsonBytes"]:>10} {result["dumpsSeconds"]:>10.5f} {result["dumpsSpeedup"]:>7.1f}x '
+                     f'{result["loadsSeconds"]:>10.5f} {result["loadsSpeedup"]:>7.1f}x')
+    return '\n'.join(lines)
+
+
+def arg_parser(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Serializer benchmarks')
+    parser.add_argument('-a', '--algorithms', nargs='+', default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument('-s', '--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT)
+    return parser.parse_args(args)
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    options = arg_parser(args)
+    print(format_results(run_benchmarks(options.algorithms, options.sizes, options.repeat)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
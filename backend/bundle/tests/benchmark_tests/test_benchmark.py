@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from bundle.tests.benchmark_tests.algorithms import ALGORITHMS, generate_graph
+from bundle.tests.benchmark_tests.benchmark import run_benchmarks, compare_with_baseline, main, make_runner, \
+    MODES, UNTRACED, PROCESSED, BASELINE_PATH
+
+
+@pytest.mark.parametrize('name', list(ALGORITHMS))
+def test_algorithms_can_be_traced(name):
+    recorder, json_size = make_runner(ALGORITHMS[name], PROCESSED, generate_graph(6))()
+    assert recorder.step_count > 0 and recorder.identifiers
+    assert json_size > 0
+
+
+@pytest.mark.benchmark
+def test_run_benchmarks():
+    results = run_benchmarks(['dijkstra'], sizes=[6], repeat=1)
+
+    assert [result['mode'] for result in results] == list(MODES)
+    for result in results:
+        if result['mode'] == UNTRACED:
+            assert result['events'] == 0 and result['slowdown'] == 1
+        else:
+            assert result['events'] > 0 and result['traceSteps'] > 0
+            assert result['eventsPerSecond'] > 0 and result['peakMemory'] > 0
+    assert results[-1]['processedJsonBytes'] > 0
+
+
+def test_generated_graph_is_connected():
+    graph = generate_graph(30)
+    assert len(graph.V) == 30
+    assert ALGORITHMS['bfs'].function(graph) == 30
+
+
+def test_compare_with_baseline():
+    baseline = [
+        {'algorithm': 'bfs', 'size': 10, 'mode': 'null_sink', 'slowdown': 100},
+        {'algorithm': 'bfs', 'size': 10, 'mode': 'processed', 'slowdown': 100},
+    ]
+    results = [
+        {'algorithm': 'bfs', 'size': 10, 'mode': 'null_sink', 'slowdown': 120},
+        {'algorithm': 'bfs', 'size': 10, 'mode': 'processed', 'slowdown': 200},
+        {'algorithm': 'bfs', 'size': 20, 'mode': 'processed', 'slowdown': 500},
+    ]
+
+    regressions = compare_with_baseline(results, baseline, tolerance=0.5)
+    assert [(regression['mode'], regression['baselineSlowdown']) for regression in regressions] == \
+           [('processed', 100)]
+
+
+@pytest.mark.benchmark
+def test_stored_baseline_covers_all_modes():
+    baseline = json.loads(BASELINE_PATH.read_text())
+    assert {(result['algorithm'], result['mode']) for result in baseline} == \
+           {(name, mode) for name in ALGORITHMS for mode in MODES}
+
+
+@pytest.mark.benchmark
+def test_main_writes_json(tmp_path, capsys):
+    output = tmp_path / 'result.json'
+    assert main(['-a', 'recursion', '-s', '4', '-r', '1', '-o', str(output)]) == 0
+
+    assert len(json.loads(output.read_text())) == len(MODES)
+    assert 'recursion' in capsys.readouterr().out
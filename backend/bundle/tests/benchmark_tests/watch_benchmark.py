@@ -0,0 +1,112 @@
+"""
+Watch evaluation benchmarks
+
+The watched variables of a tracer are evaluated in a function frame, like
+the tracer does, one by one and in a `WatchBatch`. Some of the watched
+locals are not assigned, like on the first lines of a function.
+
+Usage::
+
+    python -m bundle.tests.benchmark_tests.watch_benchmark --watches 1 5 20
+
+The speedups are relative to the separate evaluation.
+"""
+import argparse
+import sys
+from time import perf_counter
+from types import FrameType
+from typing import Any, List, Mapping, Optional, Sequence, Callable
+
+from bundle.seeker.variables import CommonVariable, WatchBatch, BaseVariable
+
+DEFAULT_WATCHES = (1, 5, 20)
+DEFAULT_REPEAT = 2000
+
+
+def make_frame(names: Sequence[str], assigned: int) -> FrameType:
+    """
+    make the frame of a function in which some of the names are assigned
+    @param names: the local names
+    @param assigned: the number of the names which are assigned
+    @return: the frame
+    """
+    namespace = {'sys': sys}
+    exec('def get_frame():\n' +
+         ''.join(f'    {name} = {index}\n' for index, name in enumerate(names[:assigned])) +
+         '    return sys._getframe()\n' +
+         # the names which are not assigned are still locals of the function
+         ''.join(f'    {name} = None\n' for name in names[assigned:]), namespace)
+    return namespace['get_frame']()
+
+
+def evaluate_separately(variables: Sequence[BaseVariable], frame: FrameType) -> List:
+    return [variable.values(frame) for variable in variables]
+
+
+def _time(function: Callable[[FrameType], Any], frame: FrameType, repeat: int) -> float:
+    start = perf_counter()
+    for _ in range(repeat):
+        function(frame)
+    return perf_counter() - start
+
+
+def measure(watch_number: int, assigned: int, repeat: int = DEFAULT_REPEAT) -> Mapping[str, Any]:
+    """
+    measure the evaluation of the watched variables
+    @param watch_number: the number of the watched variables
+    @param assigned: the number of the watched variables which are assigned
+    @param repeat:
+    @return: the time of an event in seconds, evaluated separately and in a batch
+    """
+    names = [f'var_{index}' for index in range(watch_number)]
+    variables = [CommonVariable(name) for name in names]
+    batch = WatchBatch(variables)
+    frame = make_frame(names, assigned)
+
+    separate_time = _time(lambda f: evaluate_separately(variables, f), frame, repeat) / repeat
+    batch_time = _time(batch.values, frame, repeat) / repeat
+    return {
+        'watches': watch_number,
+        'assigned': assigned,
+        'separateSeconds': separate_time,
+        'batchSeconds': batch_time,
+        'speedup': separate_time / batch_time if batch_time else 0,
+    }
+
+
+def run_benchmarks(watch_numbers: Sequence[int] = DEFAULT_WATCHES,
+                   repeat: int = DEFAULT_REPEAT) -> List[Mapping[str, Any]]:
+    """
+    measure the evaluation when all the watched variables are assigned, and when only one is
+    @param watch_numbers:
+    @param repeat:
+    @return: a list of results
+    """
+    return [measure(watch_number, assigned, repeat)
+            for watch_number in watch_numbers
+            for assigned in sorted({watch_number, 1})]
+
+
+def format_results(results: Sequence[Mapping[str, Any]]) -> str:
+    lines = [f'{"watches":>8} {"assigned":>9} {"separate us":>12} {"batch us":>10} {"speedup":>8}']
+    for result in results:
+        lines.append(f'{result["watches"]:>8} {result["assigned"]:>9} {result["separateSeconds"] * 1e6:>12.2f} '
+                     f'{result["batchSeconds"] * 1e6:>10.2f} {result["speedup"]:>7.2f}x')
+    return '\n'.join(lines)
+
+
+def arg_parser(args: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Watch evaluation benchmarks')
+    parser.add_argument('-w', '--watches', nargs='+', type=int, default=list(DEFAULT_WATCHES))
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT)
+    return parser.parse_args(args)
+
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    options = arg_parser(args)
+    print(format_results(run_benchmarks(options.watches, options.repeat)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
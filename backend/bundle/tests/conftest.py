@@ -0,0 +1,27 @@
+"""
+The tests marked by `benchmark` time the tracer, so they are slow and their results
+depend on the load of the machine. They are skipped unless `GRAPHERY_BENCHMARKS`
+is set, eg.::
+
+    GRAPHERY_BENCHMARKS=1 pytest bundle
+"""
+import os
+
+import pytest
+
+BENCHMARK_MARKER = 'benchmark'
+BENCHMARK_ENV_NAME = 'GRAPHERY_BENCHMARKS'
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', f'{BENCHMARK_MARKER}: a timing benchmark, which runs only when '
+                                       f'{BENCHMARK_ENV_NAME} is set')
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get(BENCHMARK_ENV_NAME):
+        return
+    skip_benchmark = pytest.mark.skip(reason=f'the benchmarks run only when {BENCHMARK_ENV_NAME} is set')
+    for item in items:
+        if item.get_closest_marker(BENCHMARK_MARKER) is not None:
+            item.add_marker(skip_benchmark)
@@ -0,0 +1,53 @@
+from bundle.GraphObjects.Node import Node
+from bundle.seeker import tracer
+from bundle.tests.utils_tests.recorder_utils import bound_recorder, trace_graph_usage
+from bundle.utils.processor import Processor
+from bundle.utils.recorder import Recorder
+from bundle.utils.trace_store import TraceStore, RecordedValue
+
+
+def test_element_events(bound_recorder):
+    recorder = trace_graph_usage(bound_recorder)
+
+    assert recorder.step_count > 0
+    assert list(recorder.ac_kinds) == [Recorder.ELEMENT_ACCESS, Recorder.ELEMENT_ACCESS, Recorder.ELEMENT_MUTATION,
+                                       Recorder.ELEMENT_ACCESS, Recorder.ELEMENT_ACCESS]
+    # only the ids are kept
+    assert recorder.ac_values == ['n1', 'n1', 'n1', 'e1', 'n1']
+
+    # the first record is the definition of the function
+    accesses = [record['variables'][Processor.ACCESSED_ID_NAME] for record in Processor().load_data(recorder)[1:]]
+    assert accesses == [
+        [{'id': 'n1', 'color': Processor.ACCESSED_COLOR}],
+        [{'id': 'n1', 'color': Processor.MUTATED_COLOR}],
+        [{'id': 'e1', 'color': Processor.ACCESSED_COLOR}],
+        [{'id': 'n1', 'color': Processor.ACCESSED_COLOR}],
+    ]
+
+
+def test_spilled_element_events(bound_recorder, tmp_path):
+    expected = Processor().load_data(trace_graph_usage(bound_recorder))
+    expected_changes = bound_recorder.changes
+
+    store = TraceStore(tmp_path / TraceStore.FILE_NAME, threshold=0)
+    recorder = trace_graph_usage(bound_recorder, store)
+    assert len(store) > 0
+    assert Processor().load_data(recorder) == expected
+    assert recorder.changes == expected_changes
+    recorder.purge()
+
+
+def test_look_at_records_element_ids(bound_recorder):
+    node = Node('n1')
+
+    @tracer.look_at
+    def get_node():
+        return node
+
+    @tracer(output=lambda s: None)
+    def main():
+        get_node()
+
+    main()
+    assert bound_recorder.ac_values == ['n1']
+    assert bound_recorder.changes[1]['accesses'] == [RecordedValue('n1', 'n1')]
@@ -0,0 +1,78 @@
+import gc
+import sys
+import textwrap
+
+from bundle.seeker.sight import CodeInfoCache, get_variable_order
+
+
+def _get_frame_of(function, *args):
+    frames = []
+
+    def tracer(frame, event, arg):
+        if event == 'call' and frame.f_code is function.__code__:
+            frames.append(frame)
+        return None
+
+    sys.settrace(tracer)
+    try:
+        function(*args)
+    finally:
+        sys.settrace(None)
+
+    return frames[0]
+
+
+def decorator(function):
+    return function
+
+
+@decorator
+def decorated_function(a):
+    b = a
+    return b
+
+
+def test_resolve_decorated_def_line():
+    cache = CodeInfoCache()
+    code_info = cache.get(_get_frame_of(decorated_function, 1))
+
+    line_no, source_line = code_info.resolve_call_line(decorated_function.__code__.co_firstlineno)
+    assert source_line.lstrip().startswith('def decorated_function')
+    assert line_no == code_info.def_line_no
+    assert code_info.source[line_no - 1] == source_line
+
+
+def test_code_info_is_cached():
+    cache = CodeInfoCache()
+    frame = _get_frame_of(decorated_function, 1)
+    assert cache.get(frame) is cache.get(frame)
+    assert len(cache) == 1
+
+
+def test_code_info_is_dropped_with_code():
+    cache = CodeInfoCache()
+    namespace = {}
+    exec(compile(textwrap.dedent('''
+    def temp_function(x):
+        return x
+    '''), '<temp>', 'exec'), namespace)
+
+    cache.get(_get_frame_of(namespace['temp_function'], 1))
+    assert len(cache) == 1
+
+    del namespace
+    gc.collect()
+    assert len(cache) == 0
+
+
+def test_variable_order():
+    def function(a, b):
+        c = a + b
+
+        def inner():
+            return c
+
+        return inner
+
+    var_order = get_variable_order(function.__code__)
+    assert sorted(var_order, key=var_order.get) == ['a', 'b', 'inner', 'c']
@@ -0,0 +1,193 @@
+import copy
+
+import pytest
+
+from bundle.seeker import tracer, containers, TracedList, TracedDeque, TracedDict, TracedHeap, TracedSet
+from bundle.utils.processor import Processor
+from bundle.utils.recorder import Recorder
+from bundle.utils.trace_store import TraceStore, ContainerState
+
+
+@pytest.fixture()
+def reported(monkeypatch):
+    operations = []
+    def hook(container, operation, index, items):
+        operations.append((operation, *(() if index is None else (index,)), *items))
+
+    monkeypatch.setattr(containers, 'delta_hook', hook)
+    return operations
+
+
+@pytest.fixture()
+def recorder():
+    original_recorder = tracer.get_recorder()
+    recorder = Recorder()
+    tracer.set_new_recorder(recorder)
+    yield recorder
+    tracer.set_new_recorder(original_recorder)
+
+
+def test_list_operations(reported):
+    items = TracedList(['a', 'b'])
+    items.append('c')
+    items.insert(-1, 'd')
+    items[0] = 'e'
+    items.pop()
+    items.remove('b')
+    del items[-1]
+    items += ['f', 'g']
+    items.sort(reverse=True)
+
+    assert items == ['g', 'f', 'e']
+    assert reported == [('append', 'c'), ('insert', 2, 'd'), ('set', 0, 'e'), ('pop', 3), ('pop', 1),
+                        ('pop', 1), ('extend', 'f', 'g'), ('reset', 'g', 'f', 'e')]
+    assert items.version == len(reported)
+
+
+def test_other_containers(reported):
+    distances = TracedDict(a=1)
+    distances['b'] = 2
+    distances.setdefault('a', 3)
+    distances.update(c=3)
+    del distances['a']
+    assert distances == {'b': 2, 'c': 3}
+
+    queue = TracedDeque([1, 2], maxlen=2)
+    queue.append(3)
+    queue.popleft()
+    assert list(queue) == [3]
+    queue.appendleft(4)
+    del queue[1]
+    assert list(queue) == [4]
+
+    visited = TracedSet()
+    visited.add(1)
+    visited.add(1)
+    visited.discard(2)
+    visited |= {2}
+
+    heap = TracedHeap([3, 1])
+    heap.push(2)
+    assert heap.pop() == 1 and heap.peek() == 2 and len(heap) == 2
+
+    assert reported == [('set', 'b', 2), ('set', 'c', 3), ('delete', 'a'),
+                        ('popleft',), ('append', 3), ('popleft',), ('appendleft', 4), ('pop', 1),
+                        ('add', 1), ('add', 2),
+                        ('push', 2), ('pop',)]
+
+
+def test_copies_are_new_containers():
+    items = TracedList([[1]])
+    shallow, deep = copy.copy(items), copy.deepcopy(items)
+
+    assert type(shallow) is TracedList and shallow == items
+    assert deep[0] is not items[0]
+    assert len({items.container_id, shallow.container_id, deep.container_id}) == 3
+    assert copy.copy(TracedDeque([1], maxlen=3)).maxlen == 3
+
+
+def _replay(result, name):
+    """
+    rebuild the final items of a traced list from the processed records
+    """
+    items, versions = [], []
+    for record in result:
+        value = record['variables'] and record['variables'].get(name)
+        if not value or value['version'] in versions:
+            continue
+        versions.append(value['version'])
+        for operation, *arguments in value['operations']:
+            if operation == 'reset':
+                items = list(arguments)
+            elif operation == 'append':
+                items.append(arguments[0])
+            elif operation == 'pop':
+                items.pop(arguments[0])
+            elif operation == 'set':
+                items[arguments[0]] = arguments[1]
+    return items
+
+
+def _trace_containers(store=None):
+    @tracer('queue', 'seen', output=lambda s: None)
+    def traverse():
+        queue = TracedList([0])
+        seen = TracedDict()
+        for i in range(1, 4):
+            queue.append(i * 10)
+            seen[i] = queue.pop(0)
+        queue[0] = -1
+        return queue
+
+    recorder = tracer.get_recorder()
+    recorder.set_store(store)
+    queue = traverse()
+    return queue, Processor().load_data(recorder)
+
+
+def test_traced_containers_are_recorded_as_deltas(recorder):
+    queue, result = _trace_containers()
+
+    # the changes are reported by the containers, not by copies of them
+    assert not any(isinstance(value, (TracedList, TracedDict)) for value in recorder.vc_values)
+    states = [value for value in recorder.vc_values
+              if isinstance(value, ContainerState) and value.container_id == queue.container_id]
+    # the items are only recorded when the container is observed for the first time
+    assert states[0].items == ['0'] and all(state.items is None for state in states[1:])
+    assert recorder.ac_kinds.count(Recorder.CONTAINER_DELTA) == queue.version + 3
+    assert all(not record['accesses'] for record in recorder.changes)
+
+    final = [record['variables']['traverse#queue'] for record in result if record['variables']][-1]
+    assert final == {'type': 'container', 'container': 'list', 'id': queue.container_id,
+                     'color': final['color'], 'size': 1, 'version': queue.version,
+                     'operations': [['set', 0, '-1']]}
+    assert _replay(result, 'traverse#queue') == [repr(item) for item in queue]
+
+
+def test_spilled_container_states(recorder, tmp_path):
+    _, expected = _trace_containers()
+    recorder.purge()
+
+    store = TraceStore(tmp_path / TraceStore.FILE_NAME, threshold=0)
+    _, result = _trace_containers(store)
+    assert len(store) > 0
+    # the ids of the containers differ in the two runs
+    for record in expected + result:
+        for value in (record['variables'] or {}).values():
+            if isinstance(value, dict) and value.get('type') == 'container':
+                value['id'] = None
+    assert result == expected
+    recorder.purge()
+
+
+def test_containers_are_observed_by_each_recorder(recorder):
+    queue = TracedList([1])
+    first_state = queue.get_state(repr, recorder.observed_containers)
+
+    # a new recorder, or the same one after it's purged, records the items again
+    assert first_state.items == ['1'] and queue.get_state(repr, recorder.observed_containers).items is None
+    assert queue.get_state(repr, Recorder().observed_containers).items == ['1']
+    recorder.purge()
+    assert queue.get_state(repr, recorder.observed_containers).items == ['1']
+
+
+def test_unobserved_operations_are_not_recorded(recorder):
+    hidden = TracedList()
+
+    @tracer('queue', output=lambda s: None)
+    def traverse():
+        queue = TracedList()
+        for i in range(3):
+            hidden.append(i)
+            queue.append(i)
+        return queue
+
+    queue = traverse()
+    deltas = [value for value, kind in zip(recorder.ac_values, recorder.ac_kinds) if kind == Recorder.CONTAINER_DELTA]
+    assert [delta[0] for delta in deltas] == [queue.container_id] * 3
+    assert hidden.container_id not in recorder.observed_containers
+
+    recorder.purge()
+    recorder.set_recording(False)
+    traverse()
+    assert not recorder.ac_values and not recorder.observed_containers
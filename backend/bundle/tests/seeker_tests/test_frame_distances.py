@@ -0,0 +1,71 @@
+import io
+
+import pytest
+
+from bundle.seeker import tracer
+from bundle.tests.utils_tests.recorder_utils import bound_recorder
+from bundle.utils.recorder import RecordLimitExceeded
+
+
+def level3():
+    return 3
+
+
+def level2():
+    return level3() + 2
+
+
+def level1():
+    return level2() + 1
+
+
+def numbers():
+    yield level2()
+    yield level2()
+
+
+def test_depth_traces_frames_within_depth():
+    output = io.StringIO()
+    snoop = tracer(output=output, depth=3)
+
+    @snoop
+    def main():
+        return level1() + sum(numbers())
+
+    assert main() == 16
+    log = output.getvalue()
+    assert 'def level1():' in log and 'def level2():' in log and 'def numbers():' in log
+    # level3 is three calls away from main, which is out of the depth
+    assert log.count('def level3():') == 0
+    assert not snoop.frame_distances
+
+
+def test_frames_are_dropped_on_exceptions():
+    snoop = tracer(output=lambda s: None, depth=2)
+
+    def fail():
+        raise ValueError
+
+    @snoop
+    def main():
+        try:
+            fail()
+        except ValueError:
+            return True
+
+    assert main()
+    assert not snoop.frame_distances
+
+
+def test_frames_are_dropped_when_the_trace_function_raises(bound_recorder):
+    snoop = tracer(output=lambda s: None, depth=3)
+    # the limit is exceeded in level2, whose return event is lost
+    bound_recorder.set_limits(max_steps=5)
+
+    @snoop
+    def main():
+        return level1()
+
+    with pytest.raises(RecordLimitExceeded):
+        main()
+    assert not snoop.frame_distances
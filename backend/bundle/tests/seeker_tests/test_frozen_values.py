@@ -0,0 +1,44 @@
+import pytest
+
+from bundle.GraphObjects.Node import Node
+from bundle.seeker import tracer
+from bundle.tests.utils_tests.recorder_utils import bound_recorder
+from bundle.utils.processor import Processor
+from bundle.utils.trace_store import TraceStore, RecordedValue
+
+
+def _trace_mixed_values(recorder):
+    @tracer.look_at
+    def get_pair(index):
+        return index, str(index)
+
+    @tracer('node', 'names', 'total', output=lambda s: None)
+    def main():
+        node = Node('n1')
+        names = []
+        total = 0
+        for index in range(5):
+            names.append(get_pair(index)[1])
+            total += index
+        node = Node('n2')
+        return total
+
+    main()
+    return recorder
+
+
+@pytest.mark.parametrize('store_threshold', [None, 0])
+def test_frozen_values(bound_recorder, tmp_path, store_threshold):
+    expected = Processor().load_data(_trace_mixed_values(bound_recorder))
+    bound_recorder.purge()
+
+    bound_recorder.set_freeze_values(True)
+    if store_threshold is not None:
+        bound_recorder.set_store(TraceStore(tmp_path / TraceStore.FILE_NAME, store_threshold))
+    recorder = _trace_mixed_values(bound_recorder)
+    # no reference to the traced objects is kept
+    assert recorder.vc_values and all(isinstance(value, RecordedValue) for value in recorder.vc_values)
+    assert all(isinstance(value, RecordedValue) for value in recorder.ac_values)
+    assert list(recorder.changes[1]['variables'].values()) == [RecordedValue('Node(id: n1)', 'n1')]
+    assert Processor().load_data(recorder) == expected
+    recorder.purge()
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bundle.seeker import tracer, Attrs, Exploding, Indices, Keys, TracedList
+from bundle.seeker.variables import ExplodedSummary, Overflow, RemovedEntry
+from bundle.tests.benchmark_tests.incremental_benchmark import run_benchmarks, format_results
+from bundle.utils.recorder import Recorder
+from bundle.utils.trace_store import ContainerState
+
+
+def test_incremental_keys():
+    dist = {'a': 1, 'b': [1]}
+    variable = Keys('dist', incremental=True)
+
+    assert variable._values(dist) == [('dist', ExplodedSummary('dict', 2)), ("dist['a']", 1), ("dist['b']", [1])]
+    assert variable._values(dist) == [('dist', ExplodedSummary('dict', 2))]
+
+    dist['a'] = 2
+    # the other values are compared by identity, so the ones changed in place are not found
+    dist['b'].append(2)
+    dist['c'] = TracedList()
+    assert variable._values(dist)[1:] == [("dist['a']", 2), ("dist['c']", [])]
+    dist['b'] = [1, 2]
+    # but the traced containers are found by their versions
+    dist['c'].append(1)
+    assert variable._values(dist)[1:] == [("dist['b']", [1, 2]), ("dist['c']", [1])]
+
+    del dist['a']
+    assert variable._values(dist) == [('dist', ExplodedSummary('dict', 2)), ("dist['a']", RemovedEntry())]
+    # a removed entry is given again when it's added back with the same value
+    dist['a'] = 2
+    assert variable._values(dist)[1:] == [("dist['a']", 2)]
+    assert repr(RemovedEntry()) == '<removed>'
+
+    # another value has its own snapshot
+    assert len(variable._values({'a': 2})) == 2
+
+
+def test_limited_entries():
+    assert Indices('items', max_entries=2)._values([5, 6, 7, 8]) == [
+        ('items', ExplodedSummary('list', 4)), ('items[0]', 5), ('items[1]', 6), ('items[...]', Overflow(2))
+    ]
+    assert repr(Overflow(2)) == '<2 more entries>'
+
+    variable = Attrs('point', incremental=True, max_entries=1)
+    point = SimpleNamespace(x=1, y=2)
+    assert variable._values(point)[1:] == [('point.x', 1), ('point[...]', Overflow(1))]
+    assert variable._values(point)[1:] == [('point[...]', Overflow(1))]
+
+    sliced = Indices('items', incremental=True)[1:]
+    assert sliced._values([5, 6])[1:] == [('items[1]', 6)]
+
+
+def _trace_distances(variable):
+    recorder = Recorder()
+    tracer.set_new_recorder(recorder)
+
+    @tracer(variable, output=lambda s: None)
+    def relax():
+        dist = {node: 100 for node in range(5)}
+        for node in range(5):
+            dist[node] = node
+        dist[0] = TracedList([0])
+        dist[0].append(1)
+        del dist[4]
+        return dist
+
+    relax()
+    identifiers = recorder.identifiers
+    # the containers of the runs have different ids
+    return [(step, identifiers[variable_id][1], repr(value._replace(container_id=None))
+             if isinstance(value, ContainerState) else repr(value))
+            for step, variable_id, value in zip(recorder.vc_steps, recorder.vc_variable_ids, recorder.vc_values)
+            if identifiers[variable_id][1].startswith('dist[')]
+
+
+def test_incremental_records_the_same_entry_changes():
+    original_recorder = tracer.get_recorder()
+    try:
+        expected = _trace_distances(Exploding('dist'))
+        assert expected
+        result = _trace_distances(Exploding('dist', incremental=True))
+        # the removed entries are only given in the incremental mode
+        assert result[-1][1:] == ('dist[4]', '<removed>')
+        assert result[:-1] == expected
+    finally:
+        tracer.set_new_recorder(original_recorder)
+
+
+@pytest.mark.benchmark
+def test_incremental_benchmark():
+    results = run_benchmarks([200, 1000], repeat=5, max_entries=20)
+    assert [result['size'] for result in results] == [200, 1000]
+    assert all(result['fullSeconds'] > 0 and result['incrementalSeconds'] > 0 for result in results)
+    assert 'incremental ms' in format_results(results)
@@ -0,0 +1,83 @@
+import textwrap
+
+from bundle.controller import ExecutionSession
+from bundle.seeker import tracer, sight
+from bundle.seeker.instrumentation import TracerStats, PHASES
+from bundle.server_utils.utils import execute
+
+
+def _loop(tracer_instance):
+    @tracer_instance
+    def loop():
+        total = 0
+        for i in range(3):
+            total += i
+        return total
+
+    return loop
+
+
+def test_tracer_without_stats_is_not_instrumented():
+    tracer_instance = tracer('total', output=lambda s: None)
+
+    assert tracer_instance.trace.__func__ is sight.Tracer.trace
+    assert sight.Tracer.trace.__defaults__ == (sight.get_local_values, sight.copy_value)
+
+
+def test_session_stats():
+    session = ExecutionSession(instrument=True)
+    with session:
+        loop = _loop(tracer('total', 'i', output=lambda s: None))
+        with session.measure_wall_time():
+            assert loop() == 3
+
+    stats = session.get_tracer_stats()
+    # call, 'total = 0', 3 * ('for', 'total += i'), the last 'for', 'return' (line and return events)
+    assert stats['events'] == {'call': 1, 'line': 9, 'return': 1}
+    # the trace function is also called for the frames which are not traced, eg. `Tracer.__exit__`
+    assert stats['phaseCalls']['trace'] == 11 + stats['skippedEvents']
+    assert stats['phaseCalls']['locals'] == 11
+    assert stats['phaseCalls']['recorder'] >= 10
+    assert stats['phaseCalls']['write'] > 0
+    assert all(stats['phaseTimes'][phase] >= 0 for phase in PHASES)
+    assert stats['wallTime'] >= stats['phaseTimes']['trace'] > 0
+    assert stats['userTime'] == stats['wallTime'] - stats['phaseTimes']['trace']
+
+
+def _helper():
+    return 1
+
+
+def test_skipped_events():
+    stats = TracerStats()
+    with sight.Tracer.bind(ExecutionSession().recorder, stats=stats):
+        @tracer(output=lambda s: None)
+        def call_helper():
+            # the frame of the helper is not traced since the depth is 1
+            return _helper()
+
+        call_helper()
+
+    assert stats.event_counts['call'] == 1
+    assert stats.skipped_events >= 1
+
+
+def test_execution_info_under_debug_flag():
+    code = textwrap.dedent('''\
+        from bundle.seeker import tracer
+        from bundle.utils.dummy_graph import graph_object
+
+
+        @tracer('value', output=lambda s: None)
+        def main() -> None:
+            value = 0
+            for _ in range(3):
+                value += 1
+        ''')
+
+    _, _, info = execute(code, {'elements': {'nodes': [], 'edges': []}}, stream=False)
+    assert 'tracerStats' not in info
+
+    _, _, info = execute(code, {'elements': {'nodes': [], 'edges': []}}, debug=True, stream=False)
+    assert info['tracerStats']['events']['line'] > 0
+    assert info['tracerStats']['wallTime'] > 0
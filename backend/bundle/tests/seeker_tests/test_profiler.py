@@ -0,0 +1,138 @@
+import inspect
+import textwrap
+import time
+
+import pytest
+
+from bundle.controller import ExecutionSession
+from bundle.seeker import tracer, sight
+from bundle.seeker.profiler import LineProfiler
+from bundle.server_utils.utils import execute
+from bundle.utils.recorder import RecordLimitExceeded
+
+
+def _sleep_loop(tracer_instance):
+    @tracer_instance
+    def helper():
+        time.sleep(0.01)
+
+    @tracer_instance
+    def loop():
+        total = 0
+        for i in range(3):
+            total += i
+        helper()
+        return total
+
+    return loop
+
+
+def _line_of(function, text):
+    lines, start = inspect.getsourcelines(function)
+    return start + next(index for index, line in enumerate(lines) if text in line)
+
+
+def test_tracer_without_profiler_is_not_profiled():
+    tracer_instance = tracer('total', output=lambda s: None)
+    assert tracer_instance.trace.__func__ is sight.Tracer.trace
+
+
+def test_session_profile():
+    session = ExecutionSession(profile=True)
+    with session:
+        loop = _sleep_loop(tracer('total', 'i', output=lambda s: None))
+        assert loop() == 3
+    session.generate_processed_record()
+
+    profile = session.get_profile()
+    lines = {(line['function'], line['line']): line for line in profile['lines']}
+    assert lines['loop', _line_of(loop, 'total += i')]['hits'] == 3
+    assert lines['loop', _line_of(loop, 'for i in range(3)')]['hits'] == 4
+    # the helper is the hottest line, and its time is not counted as the time of its caller
+    assert profile['lines'][0]['function'] == 'helper'
+    assert profile['lines'][0]['time'] >= 10 ** 7
+    assert lines['loop', _line_of(loop, 'helper()')]['time'] < 10 ** 7
+    assert profile['totalHits'] == sum(line['hits'] for line in profile['lines'])
+    assert session.get_execution_info()['profile'] == profile
+    assert len(session.get_profile(limit=1)['lines']) == 1
+    assert session.get_processed_result()
+
+
+def test_profile_without_recording():
+    session = ExecutionSession(profile=True, record=False)
+    with session:
+        loop = _sleep_loop(tracer('total', 'i', output=lambda s: None))
+        assert loop() == 3
+    session.generate_processed_record()
+
+    assert session.get_processed_result() == []
+    assert session.recorder.get_summary()['steps'] == 0
+    # 'total = 0', 4 * 'for', 3 * 'total += i', 'helper()', 'return total' and the line of the helper
+    assert session.get_profile()['totalHits'] == 11
+
+
+def test_execute_profile():
+    code = textwrap.dedent('''\
+        from bundle.seeker import tracer
+        from bundle.utils.dummy_graph import graph_object
+
+
+        @tracer('value', output=lambda s: None)
+        def main() -> None:
+            value = 0
+            for node in graph_object.nodes:
+                value += 1
+        ''')
+    graph_json = {'elements': {'nodes': [{'data': {'id': f'n{index}'}} for index in range(50)], 'edges': []}}
+
+    _, records, info = execute(code, graph_json, profile=True, stream=False)
+    assert records and 'profile' in info
+    assert {(line['line'], line['hits']) for line in info['profile']['lines']} >= {(8, 51), (9, 50)}
+
+    _, records, info = execute(code, graph_json, profile=True, record=False, stream=False)
+    assert records == [] and info['steps'] == 0
+    assert {(line['line'], line['hits']) for line in info['profile']['lines']} >= {(8, 51), (9, 50)}
+    assert 'profile' not in execute(code, graph_json, stream=False)[2]
+
+
+def test_profiler_ranking():
+    profiler = LineProfiler()
+    profiler.hits.update({('main.py', 1, 1): 1, ('main.py', 1, 2): 5, ('main.py', 1, 3): 5})
+    profiler.times.update({('main.py', 1, 1): 10, ('main.py', 1, 2): 10, ('main.py', 1, 3): 30})
+    assert [line['line'] for line in profiler.as_dict()['lines']] == [3, 2, 1]
+    assert profiler.as_dict()['totalTime'] == 50
+
+
+def _frame_of_work(file_name):
+    namespace = {}
+    exec(compile('import sys\n\n\ndef work():\n    return sys._getframe()\n', file_name, 'exec'), namespace)
+    return namespace['work']()
+
+
+def test_functions_of_the_same_name():
+    profiler = LineProfiler()
+
+    def trace(frame, event, arg):
+        return trace
+
+    profiled_trace = profiler.profiled_trace(trace)
+    first_frame, second_frame = _frame_of_work('/server/first.py'), _frame_of_work('/server/second.py')
+    for frame in (first_frame, second_frame, second_frame):
+        profiled_trace(frame, 'line', None)
+
+    # the functions have the same name and the same lines, but they are not merged
+    assert sorted((line['file'], line['function'], line['line'], line['hits'])
+                  for line in profiler.as_dict()['lines']) == [('first.py', 'work', 5, 1), ('second.py', 'work', 5, 2)]
+
+
+def test_frames_are_dropped_when_the_tracer_exits():
+    session = ExecutionSession(profile=True)
+    session.set_record_limits(max_steps=5)
+    with session:
+        loop = _sleep_loop(tracer('total', 'i', output=lambda s: None))
+        with pytest.raises(RecordLimitExceeded):
+            loop()
+
+    profiler = session.profiler
+    assert profiler.hits
+    assert not profiler._frame_lines and not profiler._frame_starts and not profiler._frame_stack
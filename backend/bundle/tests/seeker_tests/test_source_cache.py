@@ -0,0 +1,76 @@
+import inspect
+import os
+
+import pytest
+
+from bundle.seeker import sight
+from bundle.seeker.sight import SourceCache, get_path_and_source_from_frame
+
+
+@pytest.fixture()
+def empty_source_cache(monkeypatch):
+    cache = SourceCache(capacity=2)
+    monkeypatch.setattr(sight, 'source_cache', cache)
+    return cache
+
+
+def frame_of_file(path, module_name):
+    namespace = {'__name__': module_name}
+    exec(compile(path.read_text(), str(path), 'exec'), namespace)
+    return namespace['get_frame']()
+
+
+def write_module(path, body):
+    path.write_text('import inspect\n'
+                    'def get_frame():\n'
+                    '    return inspect.currentframe()\n' + body)
+
+
+def test_lru_eviction():
+    cache = SourceCache(capacity=2)
+    for name in 'abc':
+        cache.put(('module', name), None, (name, [name]))
+        if name == 'b':
+            assert cache.get(('module', 'a'), None) == ('a', ['a'])
+
+    # `b` is the least recently used one when `c` is added
+    assert cache.get(('module', 'b'), None) is None
+    assert cache.get(('module', 'a'), None) is not None
+    assert len(cache) == 2
+    assert cache.stats() == {'size': 2, 'capacity': 2, 'hits': 2, 'misses': 1, 'invalidations': 0}
+
+    with pytest.raises(ValueError):
+        SourceCache(capacity=0)
+
+
+def test_changed_file_is_reloaded(tmp_path, empty_source_cache):
+    entry = tmp_path / 'entry.py'
+    write_module(entry, 'x = 1\n')
+    frame = frame_of_file(entry, 'entry')
+    assert get_path_and_source_from_frame(frame)[1][-1] == 'x = 1'
+    assert get_path_and_source_from_frame(frame)[1][-1] == 'x = 1'
+    assert (empty_source_cache.hits, empty_source_cache.misses) == (1, 1)
+
+    write_module(entry, 'x = 2  # changed\n')
+    stat = entry.stat()
+    # make sure the modification time changes even on coarse file systems
+    os.utime(entry, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    frame = frame_of_file(entry, 'entry')
+    assert get_path_and_source_from_frame(frame)[1][-1] == 'x = 2  # changed'
+    assert empty_source_cache.invalidations == 1
+
+
+def test_sources_are_bounded(tmp_path, empty_source_cache):
+    for index in range(5):
+        folder = tmp_path / str(index)
+        folder.mkdir()
+        write_module(folder / 'entry.py', f'x = {index}\n')
+        get_path_and_source_from_frame(frame_of_file(folder / 'entry.py', 'entry'))
+
+    assert len(empty_source_cache) == 2
+
+
+def test_source_without_file(empty_source_cache):
+    frame = inspect.currentframe()
+    assert get_path_and_source_from_frame(frame)[0] == __file__
+    assert empty_source_cache.get_file_stamp('<string>') is None
@@ -0,0 +1,59 @@
+import sys
+
+import pytest
+
+from bundle import seeker
+from bundle.seeker.variables import CommonVariable, WatchBatch
+from bundle.tests.benchmark_tests.watch_benchmark import make_frame, run_benchmarks
+
+
+def _evaluate_separately(variables, frame):
+    return [variable.values(frame) for variable in variables]
+
+
+def test_batch_values_match_separate_evaluation():
+    a, b = 1, [1, 2]
+    c = {'x': 1}
+    variables = [CommonVariable('a'), CommonVariable('b'), seeker.Keys('c'), seeker.Indices('b')]
+    frame = sys._getframe()
+
+    assert WatchBatch(variables).values(frame) == _evaluate_separately(variables, frame)
+
+
+def test_batch_isolates_failing_expression():
+    a, b = 1, [2]
+    variables = [CommonVariable('a'), CommonVariable('not_defined'), CommonVariable('b[0]')]
+
+    assert WatchBatch(variables).values(sys._getframe()) == [[('a', 1)], (), [('b[0]', 2)]]
+
+
+def test_empty_batch():
+    assert WatchBatch().values(sys._getframe()) == []
+
+
+def test_unassigned_locals_and_expressions():
+    frame = make_frame(['a', 'b', 'c'], assigned=1)
+    variables = [CommonVariable('a'), CommonVariable('b'), CommonVariable('str(a)'), CommonVariable('c[0]'),
+                 CommonVariable('len')]
+
+    batch = WatchBatch(variables)
+    assert [index for index, _ in batch.names] == [0, 1, 4]
+    assert batch.values(frame) == _evaluate_separately(variables, frame)
+    # the locals of the frame are not changed by the batch
+    assert set(frame.f_locals) == {'a'}
+
+
+def test_batch_without_code():
+    a = 1
+    variables = [CommonVariable('a'), CommonVariable('str(a)')]
+    batch = WatchBatch(variables)
+    batch.code = None
+
+    assert batch.values(sys._getframe()) == [[('a', 1)], [('str(a)', '1')]]
+
+
+@pytest.mark.benchmark
+def test_watch_benchmark():
+    results = run_benchmarks([1, 3], repeat=10)
+    assert [(result['watches'], result['assigned']) for result in results] == [(1, 1), (3, 1), (3, 3)]
+    assert all(result['batchSeconds'] > 0 and result['separateSeconds'] > 0 for result in results)
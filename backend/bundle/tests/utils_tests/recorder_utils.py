@@ -1,6 +1,14 @@
 from typing import Tuple
 
 from copy import copy
+
+import pytest
+
+from bundle.GraphObjects.Graph import MutableGraph
+from bundle.seeker import tracer
+from bundle.utils.processor import Processor
+from bundle.utils.recorder import Recorder
+
 INDEX_PLACE_HOLDER = '___'
 
 
@@ -54,3 +62,70 @@ class ChangeList:
         if isinstance(other, list):
             return self.change_list == other
         return False
+
+
+@pytest.fixture()
+def bound_recorder():
+    """
+    a new recorder used by the tracers during a test
+    """
+    original_recorder = tracer.get_recorder()
+    recorder = Recorder()
+    tracer.set_new_recorder(recorder)
+    yield recorder
+    tracer.set_new_recorder(original_recorder)
+
+
+def trace_bubble_sort(recorder, policy=None, store=None):
+    """
+    trace a bubble sort with a recorder
+    @param recorder: the recorder of the tracers
+    @param policy: the recording policy of the tracer
+    @param store: the trace store of the recorder
+    @return: the processed result, in which every step has its variables
+    """
+    @tracer('arr', 'i', 'j', output=lambda s: None, policy=policy)
+    def bubble_sort():
+        arr = [5, 3, 4, 1, 2]
+        for i in range(len(arr)):
+            for j in range(len(arr) - i - 1):
+                if arr[j] > arr[j + 1]:
+                    arr[j], arr[j + 1] = arr[j + 1], arr[j]
+        return arr
+
+    recorder.purge()
+    recorder.set_store(store)
+    bubble_sort()
+    processor = Processor()
+    processor.load_data(recorder)
+
+    # steps without changes have `None` variables, which means the states of the last step
+    states = None
+    for step in processor.result:
+        states = step['variables'] = step['variables'] or states
+    return processor.result
+
+
+def trace_graph_usage(recorder, store=None):
+    """
+    trace a function which uses the elements of a graph, which is also used out of the function
+    @param recorder: the recorder of the tracers
+    @param store: the trace store of the recorder
+    @return: the recorder
+    """
+    recorder.purge()
+    recorder.set_store(store)
+    graph = MutableGraph()
+    graph.add_edge('e1', ('n1', 'n2'))
+    # the graph is used out of any traced function
+    graph.get_node('n1')['weight'] = 1
+
+    @tracer(output=lambda s: None)
+    def relax():
+        node = graph.get_node('n1')
+        node['weight'] = node['weight'] + 1
+        edge = graph.get_edge('e1')
+        return edge['length'] if 'length' in edge else node['weight']
+
+    assert relax() == 2
+    return recorder
@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+
+from bundle.server_utils.main_functions import application
+from bundle.server_utils.params import VERSION, BINARY_RESULT_FORMAT
+from bundle.tests.utils_tests.test_delta_result import _process_loop
+from bundle.tests.utils_tests.test_execution_session import graph_json, counting_code
+from bundle.tests.utils_tests.recorder_utils import bound_recorder, trace_graph_usage
+from bundle.utils.binary_trace import encode_trace, decode_trace, encode_result, is_binary_trace, \
+    BinaryTrace, HEADER, CONTENT_TYPE
+from bundle.utils.loop_folding import encode_loops
+from bundle.utils.processor import Processor
+
+
+def _json_round_trip(value):
+    return json.loads(json.dumps(value))
+
+
+def test_round_trip():
+    records = _process_loop()
+    data = encode_trace(records, metadata={'codeHash': 'abc'})
+
+    assert is_binary_trace(data)
+    assert decode_trace(data) == BinaryTrace(_json_round_trip(records), {'codeHash': 'abc'})
+    assert decode_trace(encode_result(encode_loops(records))).records == records
+    assert len(data) * 5 < len(json.dumps(records))
+
+
+def test_graph_elements(bound_recorder):
+    records = Processor().load_data(trace_graph_usage(bound_recorder))
+    assert decode_trace(encode_trace(records)).records == records
+
+
+def test_json_values():
+    values = [None, True, False, 0, -1, 1 << 70, -(1 << 70), 1.5, float('inf'), '', 'text 中',
+              [1, [2, {}]], {'type': 'normal_var', 'repr': '1', 'extra': 2}, {'repr': 'x', 'type': 'normal_var'},
+              {'id': 1, 'color': '#fff'}, {'type': 'graph_element', 'id': 'v1', 'color': '#fff', 'repr': 'v1'}]
+    records = [{'line': -1, 'variables': None}, {'line': 3, 'variables': {}}] + \
+              [{'line': index, 'variables': {'main#a': value, f'main#{index}': index}}
+               for index, value in enumerate(values)]
+
+    decoded = decode_trace(encode_trace(records, metadata=values))
+    assert decoded.records == records
+    assert decoded.metadata == values
+    # the orders of the keys are kept
+    decoded_values = [record['variables']['main#a'] for record in decoded.records[2:]]
+    assert [list(value) for value in decoded_values if isinstance(value, dict)] == \
+           [list(value) for value in values if isinstance(value, dict)]
+
+
+def test_wide_ids():
+    records = [{'line': index, 'variables': {'main#a': str(index)}} for index in range(1 << 16)]
+    data = encode_trace(records)
+    assert HEADER.unpack_from(data)[2] == 4
+    assert decode_trace(data).records == records
+
+
+def test_invalid_traces():
+    with pytest.raises(TypeError):
+        encode_trace([{'line': 1, 'variables': {'main#a': {1}}}])
+    with pytest.raises(ValueError):
+        decode_trace(b'{"version": 1}')
+    data = bytearray(encode_trace([]))
+    data[4] = 0xFF
+    with pytest.raises(ValueError):
+        decode_trace(data)
+
+
+@pytest.mark.parametrize('result_format', [BINARY_RESULT_FORMAT, None])
+def test_application_binary_response(result_format):
+    body = json.dumps({'code': counting_code('apple', 3), 'graph': graph_json(),
+                       'version': VERSION, 'resultFormat': result_format}).encode()
+    headers = []
+    response = b''.join(application({'REQUEST_METHOD': 'POST', 'PATH_INFO': '/run',
+                                     'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body)},
+                                    lambda status, response_headers: headers.extend(response_headers)))
+
+    if result_format is None:
+        assert ('Content-Type', 'application/json') in headers
+        assert json.loads(response)['data']['execResult']
+    else:
+        assert ('Content-Type', CONTENT_TYPE) in headers
+        records, metadata = decode_trace(response)
+        assert records and set(metadata) == {'codeHash', 'execInfo'}
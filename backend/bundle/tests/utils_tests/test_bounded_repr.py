@@ -0,0 +1,66 @@
+from collections import OrderedDict, defaultdict, deque
+
+import pytest
+
+from bundle.GraphObjects.Edge import Edge, EdgeSet
+from bundle.GraphObjects.Graph import Graph, MutableGraph
+from bundle.GraphObjects.Node import Node, NodeSet
+from bundle.seeker import TracedHeap, TracedList
+from bundle.seeker.utils import get_shortish_repr
+from bundle.utils.bounded_repr import BoundedRepr, bounded_repr, truncate
+
+
+class Point:
+    def __repr__(self):
+        return 'Point()'
+
+
+@pytest.mark.parametrize('value', [
+    [1, [2, (3,)], {'a': {1, 2}}, None], (1,), (), 'it\'s "quoted"', b'bytes', 2 ** 100,
+    deque([1, 2], maxlen=3), deque(), defaultdict(list, {1: [2]}), OrderedDict(a=1), frozenset(),
+    TracedList([1, 'x']), TracedHeap([2, 1]), [Point()] * 3, {Node('1'): 1.5}, [[]] * 40, list(range(1000)),
+])
+def test_values_within_limits(value):
+    assert bounded_repr.repr(value) == repr(value)
+
+
+def test_limits():
+    limited = BoundedRepr(maxlist=3, maxdict=1, maxlevel=2)
+    assert limited.repr(list(range(10))) == '[0, 1, 2, ...]'
+    assert limited.repr({'a': [[1]], 'b': 2}) == "{'a': [[...]], ...}"
+    assert limited.repr(TracedList(range(5))) == '[0, 1, 2, ...]'
+    assert BoundedRepr(maxstring=10).repr('a' * 100) == "'aa...aaa'"
+    assert BoundedRepr(maxother=5).repr(Point()) == 'P...)'
+    assert bounded_repr.repr(2 ** 10_000) == '<int of 10001 bits>'
+
+    with pytest.raises(ValueError):
+        BoundedRepr(maxitems=1)
+
+
+def test_total_size():
+    nested = [list(range(100))] * 5
+    assert BoundedRepr(max_size=20).repr(nested) == '[[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, ...], ...]'
+    assert BoundedRepr(max_size=None).repr(nested) == repr(nested)
+
+
+def test_graph_objects():
+    node_1, node_2 = Node('1'), Node('2')
+    edge = Edge('1<->2', (node_1, node_2))
+    graph = MutableGraph([node_1, node_2], [edge])
+
+    assert bounded_repr.repr(node_1) == 'Node(id: 1)'
+    assert bounded_repr.repr(edge) == repr(edge)
+    assert bounded_repr.repr(graph) == 'MutableGraph(nodes: 2, edges: 1)'
+    assert bounded_repr.repr(Graph([], [])) == 'Graph(nodes: 0, edges: 0)'
+    assert bounded_repr.repr(EdgeSet([edge])) == repr(EdgeSet([edge]))
+    assert BoundedRepr(maxset=1).repr(NodeSet([node_1, node_2])) in ('{Node(id: 1), ...}', '{Node(id: 2), ...}')
+    assert bounded_repr.repr(NodeSet([])) == 'set()'
+
+
+def test_long_values_are_not_represented_entirely():
+    values = list(range(1_000_000))
+    assert len(bounded_repr.repr(values)) < 10_000
+    # the head and the tail are the same as the truncated full repr
+    for max_length in (5, 100, 201):
+        assert bounded_repr.repr(values, max_length) == truncate(repr(values), max_length)
+        assert get_shortish_repr(tuple(values), max_length=max_length) == truncate(repr(tuple(values)), max_length)
@@ -0,0 +1,68 @@
+import io
+import json
+import zlib
+
+import pytest
+
+from bundle.server_utils.main_functions import application
+from bundle.server_utils.params import VERSION
+from bundle.tests.utils_tests.test_delta_result import _process_loop
+from bundle.tests.utils_tests.test_execution_session import graph_json, counting_code
+from bundle.utils.compression import compress, decompress, iter_compressed, negotiate_encoding, \
+    GZIP_ENCODING, DEFLATE_ENCODING
+from bundle.utils.json_stream import iter_json
+
+
+@pytest.mark.parametrize('encoding', [GZIP_ENCODING, DEFLATE_ENCODING])
+def test_round_trip(encoding):
+    data = json.dumps(_process_loop()).encode()
+    compressed = compress(data, encoding)
+
+    assert decompress(compressed, encoding) == data
+    assert len(compressed) * 10 < len(data)
+    # the same result is always compressed into the same bytes
+    assert compress(data, encoding) == compressed
+    streamed = b''.join(iter_compressed(iter_json(json.loads(data)), encoding))
+    assert json.loads(decompress(streamed, encoding)) == json.loads(data)
+    assert len(compress(data, encoding, level=0)) > len(data)
+
+
+def test_invalid_encoding():
+    with pytest.raises(ValueError):
+        compress(b'', 'br')
+    with pytest.raises(zlib.error):
+        decompress(b'{}')
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('', None),
+    ('identity', None),
+    ('gzip, deflate, br', GZIP_ENCODING),
+    ('deflate', DEFLATE_ENCODING),
+    ('gzip;q=0.5, deflate', DEFLATE_ENCODING),
+    ('GZIP', GZIP_ENCODING),
+    ('gzip;q=0', None),
+    ('*', GZIP_ENCODING),
+    ('*, gzip;q=0', DEFLATE_ENCODING),
+    ('gzip;q=invalid', None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def _run(**environ):
+    body = json.dumps({'code': counting_code('apple', 3), 'graph': graph_json(), 'version': VERSION}).encode()
+    headers = []
+    response = b''.join(application({'REQUEST_METHOD': 'POST', 'PATH_INFO': '/run',
+                                     'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body), **environ},
+                                    lambda status, response_headers: headers.extend(response_headers)))
+    return headers, response
+
+
+def test_application_compressed_response():
+    headers, response = _run(HTTP_ACCEPT_ENCODING='gzip, deflate')
+    plain_headers, plain_response = _run()
+
+    assert ('Content-Encoding', GZIP_ENCODING) in headers
+    assert all(name != 'Content-Encoding' for name, _ in plain_headers)
+    assert json.loads(decompress(response)) == json.loads(plain_response)
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from bundle.seeker import tracer
+from bundle.server_utils.utils import execute
+from bundle.tests.utils_tests.test_execution_session import graph_json, counting_code
+from bundle.utils.delta_result import DeltaResult, encode_delta, get_changes
+from bundle.utils.processor import Processor
+from bundle.utils.recorder import Recorder
+
+
+def _process_loop():
+    recorder = Recorder()
+    original_recorder = tracer.get_recorder()
+    tracer.set_new_recorder(recorder)
+
+    @tracer('total', 'index', 'names', 'table', 'unchanged', output=lambda s: None)
+    def loop():
+        unchanged = list(range(50))
+        table = {}
+        names = []
+        total = 0
+        for index in range(100):
+            total += index
+            if index % 10 == 0:
+                names.append(str(index))
+                table[index] = names[-1]
+        return total
+
+    try:
+        loop()
+        return Processor().load_data(recorder)
+    finally:
+        tracer.set_new_recorder(original_recorder)
+
+
+def test_get_changes():
+    assert get_changes(None, {'a': 1}) == {'a': 1}
+    assert get_changes({'a': 1, 'b': [1]}, {'a': 1, 'b': [1, 2]}) == {'b': [1, 2]}
+
+
+@pytest.mark.parametrize('keyframe_interval', [1, 3, 64])
+def test_round_trip(keyframe_interval):
+    records = _process_loop()
+    records[0]['variables'] = None
+    result = DeltaResult(json.loads(json.dumps(encode_delta(records, keyframe_interval))))
+
+    assert len(result) == len(records)
+    assert list(result) == records
+    for step in (0, 1, keyframe_interval, len(records) // 2, len(records) - 1, -1):
+        assert result.get_record(step) == records[step]
+        if records[step]['variables'] is not None:
+            assert result.get_state(step) == records[step]['variables']
+    # the keyframes without changes still carry the state
+    assert result.get_state(0) is None
+    assert result.get_state(1) == records[1]['variables']
+
+
+def test_delta_result_is_smaller():
+    records = _process_loop()
+    full_size = len(json.dumps(records))
+    delta_size = len(json.dumps(encode_delta(records)))
+    assert delta_size * 5 < full_size
+
+
+def test_invalid_results():
+    with pytest.raises(ValueError):
+        encode_delta([], keyframe_interval=0)
+    with pytest.raises(ValueError):
+        DeltaResult({'version': 1})
+    with pytest.raises(IndexError):
+        DeltaResult(encode_delta([])).get_state(0)
+
+
+def test_execute_delta_result():
+    code = counting_code('apple', 5)
+    records = execute(code, graph_json(), stream=False)[1]
+    delta_result = execute(code, graph_json(), keyframe_interval=4, stream=False)[1]
+    assert delta_result['keyframeInterval'] == 4
+    assert list(DeltaResult(delta_result)) == records
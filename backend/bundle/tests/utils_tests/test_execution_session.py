@@ -0,0 +1,67 @@
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bundle.controller import ExecutionSession, controller
+from bundle.seeker import tracer
+from bundle.server_utils.utils import execute
+
+
+def graph_json() -> dict:
+    return {'elements': {'nodes': [{'data': {'id': 'v1', 'displayed': {}}, 'style': [{}]},
+                                   {'data': {'id': 'v2', 'displayed': {}}, 'style': [{}]}],
+                         'edges': [{'data': {'id': 'e1', 'source': 'v1', 'target': 'v2', 'displayed': {}},
+                                    'style': [{}, {}]}]}}
+
+
+def counting_code(name: str, times: int) -> str:
+    return textwrap.dedent(f'''\
+        from bundle.seeker import tracer
+        from bundle.utils.dummy_graph import graph_object
+
+
+        @tracer('{name}')
+        def main() -> None:
+            {name} = 0
+            for _ in range({times}):
+                {name} += 1
+        ''')
+
+
+def test_sessions_in_threads_do_not_mix():
+    barrier = threading.Barrier(2)
+
+    @tracer('value', output=lambda s: None)
+    def count(start):
+        value = start
+        for _ in range(20):
+            value += 1
+            if value == start + 10:
+                # make sure both executions are traced at the same time
+                barrier.wait()
+        return value
+
+    def run(start):
+        session = ExecutionSession()
+        with session:
+            count(start)
+        return session.recorder
+
+    default_steps = controller.recorder.step_number
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first, second = executor.map(run, [0, 100])
+
+    assert first.step_number == second.step_number
+    assert [value for value in first.vc_values] == list(range(21))
+    assert [value for value in second.vc_values] == list(range(100, 121))
+    assert controller.recorder.step_number == default_steps
+
+
+def test_concurrent_executions():
+    codes = [counting_code('apple', 5), counting_code('banana', 8)] * 4
+    expected = [execute(code, graph_json(), stream=False)[1] for code in codes[:2]] * 4
+
+    with ThreadPoolExecutor(max_workers=len(codes)) as executor:
+        results = list(executor.map(lambda code: execute(code, graph_json(), stream=False)[1], codes))
+
+    assert results == expected
@@ -0,0 +1,138 @@
+import io
+import json
+import os
+import tempfile
+import types
+
+import pytest
+
+from bundle.controller import ExecutionSession
+from bundle.seeker import tracer
+from bundle.server_utils import utils as server_utils
+from bundle.server_utils.main_functions import application
+from bundle.server_utils.params import VERSION
+from bundle.server_utils.utils import execute
+from bundle.tests.utils_tests.test_delta_result import _process_loop
+from bundle.tests.utils_tests.test_execution_session import graph_json, counting_code
+from bundle.utils.json_stream import iter_json, read_json_file, RawJson
+from bundle.utils.processor import Processor
+from bundle.utils.serializers import available_serializers
+
+
+@pytest.mark.parametrize('serializer', list(available_serializers().values()), ids=repr)
+@pytest.mark.parametrize('chunk_size', [1, 100, 1 << 20])
+def test_same_as_dumps(chunk_size, serializer):
+    value = {'data': {'execResult': [{'line': 1, 'variables': {'a': '1', 'b': None}}] * 100,
+                      'pair': (1, 2), 1: True, None: 'null', 2.5: [set()]}}
+    chunks = list(iter_json(value, chunk_size, serializer, default=str))
+    assert ''.join(chunks) == serializer.dumps(value, default=str)
+    assert json.loads(''.join(chunks)) == json.loads(json.dumps(value, default=str))
+    assert all(len(chunk) >= chunk_size for chunk in chunks[:-1])
+    if chunk_size > 1000:
+        assert len(chunks) == 1
+
+
+def test_raw_json(tmp_path):
+    path = tmp_path / 'result.json'
+    path.write_text('[{"line": 1}]')
+
+    value = {'records': read_json_file(path, chunk_size=2, delete=True), 'raw': RawJson(['{', '}'])}
+    assert json.loads(''.join(iter_json(value))) == {'records': [{'line': 1}], 'raw': {}}
+    assert not path.exists()
+
+
+def test_iterators_are_arrays():
+    assert json.loads(''.join(iter_json({'records': (index for index in range(3)), 'empty': iter(())}))) == \
+           {'records': [0, 1, 2], 'empty': []}
+    assert list(iter_json([])) == ['[]']
+
+
+@pytest.mark.parametrize('keyframe_interval', [None, 8])
+def test_processor_result_json(keyframe_interval):
+    processor = Processor()
+    processor.result = _process_loop()
+    processor.generate_result_json(keyframe_interval)
+
+    chunks = list(processor.iter_result_json(keyframe_interval, chunk_size=1024))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == processor.get_result_json()
+    assert json.loads(processor.get_result_json()) == json.loads(json.dumps(processor._encode_result(
+        processor.result, keyframe_interval, fold_loops=False), default=list))
+
+
+def _count_in_session() -> ExecutionSession:
+    session = ExecutionSession()
+    with session:
+        @tracer('total', output=lambda s: None)
+        def count():
+            total = 0
+            for index in range(3):
+                total += index
+
+        count()
+    return session
+
+
+def test_result_json_can_be_skipped():
+    session = _count_in_session()
+    session.generate_processed_record()
+    assert json.loads(session.get_processed_result_json()) == session.get_processed_result()
+    session.processor.purge()
+    session.generate_processed_record(result_json=False)
+    assert session.get_processed_result() and session.get_processed_result_json() is None
+
+
+def test_write_processed_record(tmp_path):
+    expected_session, session = _count_in_session(), _count_in_session()
+    expected_session.generate_processed_record()
+
+    session.write_processed_record(tmp_path / 'result.json')
+    assert json.loads((tmp_path / 'result.json').read_text()) == expected_session.get_processed_result()
+    # the processed records are not kept
+    assert session.get_processed_result() == []
+
+
+@pytest.mark.parametrize('result_format', [{}, {'keyframe_interval': 4}, {'fold_loops': True}],
+                         ids=['records', 'delta', 'folded'])
+@pytest.mark.parametrize('store_threshold', [server_utils.TRACE_STORE_THRESHOLD, 0], ids=['memory', 'spilled'])
+def test_execute_into_file(tmp_path, monkeypatch, result_format, store_threshold):
+    monkeypatch.setattr(server_utils, 'TRACE_STORE_THRESHOLD', store_threshold)
+    code = counting_code('apple', 20)
+    _, expected, expected_info = execute(code, graph_json(), trace_index=True, stream=False, **result_format)
+
+    result_path = tmp_path / 'result.json'
+    _, path, info = execute(code, graph_json(), trace_index=True, result_path=result_path, **result_format)
+    assert path == result_path
+    assert json.loads(result_path.read_text()) == json.loads(json.dumps(expected))
+    assert info['traceIndex'] == expected_info['traceIndex']
+
+
+def test_application_streams_result_file():
+    body = json.dumps({'code': counting_code('apple', 3), 'graph': graph_json(), 'version': VERSION}).encode()
+    result_files = set(os.listdir(tempfile.gettempdir()))
+    response = application({'REQUEST_METHOD': 'POST', 'PATH_INFO': '/run',
+                            'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body)}, lambda *args: None)
+
+    records = json.loads(b''.join(response))['data']['execResult']
+    assert records == execute(counting_code('apple', 3), graph_json(), stream=False)[1]
+    # the file of the result is deleted once it's sent
+    assert set(os.listdir(tempfile.gettempdir())) == result_files
+
+
+def test_execute_streams_by_default():
+    _, path, _ = execute(counting_code('apple', 3), graph_json())
+    try:
+        assert path.name.startswith('graphery_result_')
+        assert json.loads(path.read_text()) == execute(counting_code('apple', 3), graph_json(), stream=False)[1]
+    finally:
+        path.unlink()
+
+
+def test_application_streams_response():
+    statuses = []
+    response = application({'REQUEST_METHOD': 'GET', 'PATH_INFO': '/nowhere'},
+                           lambda status, headers: statuses.append(status))
+
+    assert statuses == ['200 OK']
+    assert isinstance(response, types.GeneratorType)
+    assert json.loads(b''.join(response)) == {'errors': [{'message': 'Bad Request: Wrong Methods.'}]}
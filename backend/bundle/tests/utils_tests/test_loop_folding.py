@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from bundle.server_utils.utils import execute
+from bundle.tests.utils_tests.test_delta_result import _process_loop
+from bundle.tests.utils_tests.test_execution_session import graph_json, counting_code
+from bundle.utils.loop_folding import LoopResult, encode_loops, find_loop
+from bundle.utils.processor import Processor
+
+
+def test_find_loop():
+    lines = [1, 2, 3, 2, 3, 2, 3, 4, 4, 4, 4]
+    assert find_loop(lines, 0) == (0, 0)
+    assert find_loop(lines, 1) == (2, 3)
+    # a partial iteration is not folded
+    assert find_loop(lines, 2) == (0, 0)
+    assert find_loop(lines, 7) == (1, 4)
+    assert find_loop(lines, 7, min_iterations=5) == (0, 0)
+    assert find_loop(lines, 1, max_period=1) == (0, 0)
+
+
+@pytest.mark.parametrize('max_period, min_iterations', [(1, 2), (4, 3), (64, 3)])
+def test_round_trip(max_period, min_iterations):
+    records = _process_loop()
+    records[0]['variables'] = None
+    folded = encode_loops(records, max_period, min_iterations)
+    result = LoopResult(json.loads(json.dumps(folded)))
+
+    assert len(result) == len(records)
+    assert list(result) == records
+    for step in (0, 1, 2, len(records) // 2, len(records) - 1, -1):
+        assert result.get_record(step) == records[step]
+
+
+def test_loops_are_folded():
+    records = _process_loop()
+    folded = encode_loops(records)
+    loops = [record['loop'] for record in folded['records'] if 'loop' in record]
+
+    assert loops and sum(len(loop['lines']) * loop['iterations'] for loop in loops) > len(records) // 2
+    assert len(json.dumps(folded)) * 5 < len(json.dumps(records))
+
+    result = LoopResult(folded)
+    first_loop = loops[0]
+    end = first_loop['step'] + len(first_loop['lines']) * first_loop['iterations']
+    assert result.get_loop(first_loop['step']) == (first_loop['step'], end)
+    assert result.get_loop(end - 1) == (first_loop['step'], end)
+    assert result.get_loop(0) is None
+
+
+def test_invalid_results():
+    with pytest.raises(ValueError):
+        encode_loops([], max_period=0)
+    with pytest.raises(ValueError):
+        encode_loops([], min_iterations=1)
+    with pytest.raises(ValueError):
+        LoopResult({'version': 2})
+    with pytest.raises(IndexError):
+        LoopResult(encode_loops([])).get_record(0)
+    with pytest.raises(ValueError):
+        Processor().generate_result_json(keyframe_interval=4, fold_loops=True)
+
+
+def test_processor_result_json():
+    processor = Processor()
+    processor.result = _process_loop()
+    processor.generate_result_json(fold_loops=True)
+
+    assert json.loads(processor.get_result_json()) == json.loads(json.dumps(encode_loops(processor.result)))
+    assert ''.join(processor.iter_result_json(chunk_size=1024, fold_loops=True)) == processor.get_result_json()
+
+
+def test_execute_folded_result():
+    code = counting_code('apple', 20)
+    records = execute(code, graph_json(), stream=False)[1]
+    folded_result = execute(code, graph_json(), fold_loops=True, stream=False)[1]
+    assert any('loop' in record for record in folded_result['records'])
+    assert list(LoopResult(folded_result)) == records
@@ -0,0 +1,119 @@
+import logging
+import textwrap
+import tracemalloc
+
+import pytest
+
+from bundle.controller import ExecutionSession
+from bundle.seeker import tracer
+from bundle.server_utils.utils import execute
+from bundle.utils.memory_monitor import MemoryMonitor
+from bundle.utils.recorder import Recorder, RecordLimitExceeded
+
+allocating_code = textwrap.dedent('''\
+    from bundle.seeker import tracer
+    from bundle.utils.dummy_graph import graph_object
+
+
+    @tracer('count', output=lambda s: None)
+    def main() -> None:
+        blocks = []
+        for count in range(20):
+            blocks.append(bytearray(100_000))
+    ''')
+
+empty_graph_json = {'elements': {'nodes': [], 'edges': []}}
+
+
+def _allocate(session: ExecutionSession, **kwargs):
+    with session:
+        @tracer('count', output=lambda s: None)
+        def allocate():
+            blocks = []
+            for count in range(20):
+                blocks.append(bytearray(100_000))
+            return len(blocks)
+
+        with session.measure_memory(**kwargs):
+            return allocate()
+
+
+def test_measure_memory():
+    session = ExecutionSession()
+    assert _allocate(session, source_file=__file__) == 20
+
+    info = session.get_execution_info()['memory']
+    assert info['peakBytes'] >= 20 * 100_000
+    # the snapshot is taken within `SNAPSHOT_GROWTH` of the largest memory
+    assert info['userBytes'] >= 20 * 100_000 / MemoryMonitor.SNAPSHOT_GROWTH
+    assert info['topAllocations'][0]['file'] == 'test_memory_monitor.py'
+    assert info['traceBytes'] == session.recorder.recorded_bytes > 0
+    assert not info['exceeded']
+    assert info['topAllocations'] and all(allocation['file'] for allocation in info['topAllocations'])
+    # tracemalloc is stopped by the monitor which starts it
+    assert not tracemalloc.is_tracing()
+    assert session.recorder.memory_monitor is None
+
+
+def test_memory_limit():
+    session = ExecutionSession()
+    with pytest.raises(RecordLimitExceeded) as exception_info:
+        _allocate(session, max_memory=500_000)
+
+    assert exception_info.value.limit_name == Recorder.MEMORY_LIMIT_NAME
+    assert session.get_execution_info()['memory']['exceeded']
+    assert session.recorder.get_summary()['truncated']
+
+
+def test_memory_limit_without_recording():
+    session = ExecutionSession(record=False)
+    with pytest.raises(RecordLimitExceeded):
+        _allocate(session, max_memory=500_000)
+
+
+def test_execute_memory(caplog):
+    with caplog.at_level(logging.INFO, logger='execution_request'):
+        _, records, info = execute(allocating_code, empty_graph_json, memory=True, stream=False)
+
+    assert records and info['memory']['userBytes'] >= 20 * 100_000 / MemoryMonitor.SNAPSHOT_GROWTH
+    assert info['memory']['topAllocations'][0]['file'] == 'entry.py'
+    assert 'bytes at peak' in caplog.text
+    assert 'memory' not in execute(allocating_code, empty_graph_json, stream=False)[2]
+
+
+def test_execute_memory_limit():
+    _, records, info = execute(allocating_code, empty_graph_json, max_memory=500_000, stream=False)
+
+    # the records made before the execution is stopped are kept
+    assert records and info['truncated'] and info['memory']['exceeded']
+    assert 'memory' in info['truncationReason']
+    assert not tracemalloc.is_tracing()
+
+
+def test_monitor_keeps_running_tracemalloc():
+    tracemalloc.start()
+    try:
+        monitor = MemoryMonitor(Recorder())
+        with monitor.measure():
+            data = bytearray(100_000)
+        assert tracemalloc.is_tracing()
+        assert monitor.current_memory >= len(data)
+    finally:
+        tracemalloc.stop()
+
+
+def test_peak_without_reset_peak(monkeypatch):
+    # `tracemalloc.reset_peak` doesn't exist before Python 3.9
+    monkeypatch.setattr('bundle.utils.memory_monitor._CAN_RESET_PEAK', False)
+    # a peak reached before the monitor starts isn't counted
+    tracemalloc.start()
+    try:
+        data = bytearray(5_000_000)
+        del data
+        session = ExecutionSession()
+        assert _allocate(session) == 20
+    finally:
+        tracemalloc.stop()
+
+    peak = session.get_execution_info()['memory']['peakBytes']
+    assert 20 * 100_000 <= peak < 5_000_000
@@ -0,0 +1,51 @@
+import pytest
+
+from bundle.seeker import tracer
+from bundle.tests.utils_tests.recorder_utils import bound_recorder
+from bundle.utils.processor import Processor
+from bundle.utils.recorder import RecordLimitExceeded
+
+
+def test_step_limit(bound_recorder):
+    bound_recorder.set_limits(max_steps=50)
+
+    @tracer('i', output=lambda s: None)
+    def runaway():
+        i = 0
+        while True:
+            try:
+                i += 1
+            except Exception:
+                # user code should not be able to swallow the limit
+                pass
+
+    with pytest.raises(RecordLimitExceeded) as exc_info:
+        runaway()
+
+    assert exc_info.value.limit_name == bound_recorder.STEP_LIMIT_NAME
+    assert len(bound_recorder.changes) == 50
+    assert bound_recorder.get_summary()['truncated']
+
+    # the truncated records are still processable
+    processor = Processor()
+    processor.load_data(bound_recorder)
+    assert len(processor.result) == 50
+
+
+def test_size_limit(bound_recorder):
+    bound_recorder.set_limits(max_bytes=10_000)
+
+    @tracer('arr', output=lambda s: None)
+    def grow():
+        arr = []
+        for i in range(10_000):
+            arr.append(i)
+
+    with pytest.raises(RecordLimitExceeded) as exc_info:
+        grow()
+
+    assert exc_info.value.limit_name == bound_recorder.SIZE_LIMIT_NAME
+    assert bound_recorder.recorded_bytes <= 10_000
+
+    bound_recorder.purge()
+    assert not bound_recorder.is_truncated
@@ -1,5 +1,7 @@
 import pytest
 from bundle.controller import controller
+from bundle.utils.processor import Processor
+from bundle.tests.utils_tests.recorder_utils import ChangeList
 
 
 @pytest.fixture()
@@ -38,3 +40,72 @@ def test_simple_while_loop_trace_index(use_samples):
            .record(17) \
            .record(18, {'i': 0})
     # TODO sigh
+
+
+def test_columns_and_compatible_view():
+    from bundle.utils.recorder import Recorder
+
+    recorder = Recorder()
+    recorder.add_record(1)
+    recorder.add_vc_to_last_record(('main', 'a'), 1)
+    recorder.add_record(2)
+    recorder.add_vc_to_previous_record(('main', 'b'), 2)
+    recorder.get_last_vc()[('main', 'a')] = 3
+    recorder.add_ac_to_last_record('accessed')
+
+    assert list(recorder.lines) == [1, 2]
+    assert recorder.identifiers == [('main', 'a'), ('main', 'b')]
+    assert list(recorder.vc_steps) == [0, 0, 1]
+    assert list(recorder.vc_variable_ids) == [0, 1, 0]
+    assert recorder.vc_values == [1, 2, 3]
+    assert list(recorder.ac_steps) == [1]
+
+    assert recorder.get_previous_vc() == {('main', 'a'): 1, ('main', 'b'): 2}
+    assert recorder.get_last_ac() == ['accessed']
+    assert recorder.changes == ChangeList() \
+        .record(1, {('main', 'a'): 1, ('main', 'b'): 2}) \
+        .record(2, {('main', 'a'): 3}, ['accessed']) \
+        .change_list
+
+
+def test_load_change_list():
+    from bundle.utils.recorder import Recorder
+
+    recorder = Recorder()
+    recorder.add_record(1)
+    recorder.add_vc_to_last_record(('main', 'a'), 1)
+    recorder.add_record(2)
+    recorder.add_vc_to_last_record(('main', 'a'), 2)
+    recorder.add_ac_to_last_record('accessed')
+
+    expected = Processor().load_data(recorder)
+    # the records in the format of a list are still accepted
+    assert Processor().load_data(recorder.changes, recorder.identifiers) == expected
+    assert Processor().load_change_list(recorder.changes, recorder.identifiers) == expected
+    with pytest.raises(ValueError):
+        Processor().load_data(recorder.changes)
+
+
+def test_step_columns_stay_sorted():
+    from bundle.utils.recorder import Recorder
+
+    recorder = Recorder()
+    recorder.add_record(1)
+    recorder.add_record(2)
+    recorder.add_vc_to_last_record(('main', 'a'), 1)
+    recorder.add_ac_to_last_record('last')
+    # the changes of the previous step made after the ones of the last step
+    recorder.add_vc_to_previous_record(('main', 'b'), 2)
+    recorder.add_vc_to_previous_record(('main', 'c'), 3)
+    recorder.add_ac_to_step(0, 'previous')
+
+    assert list(recorder.vc_steps) == [0, 0, 1]
+    assert recorder.vc_values == [2, 3, 1]
+    assert list(recorder.ac_steps) == [0, 1]
+    assert recorder.get_previous_vc() == {('main', 'b'): 2, ('main', 'c'): 3}
+    assert list(recorder.get_previous_vc()) == [('main', 'b'), ('main', 'c')]
+    assert recorder.get_last_vc() == {('main', 'a'): 1}
+    assert recorder.changes == ChangeList() \
+        .record(1, {('main', 'b'): 2, ('main', 'c'): 3}, ['previous']) \
+        .record(2, {('main', 'a'): 1}, ['last']) \
+        .change_list
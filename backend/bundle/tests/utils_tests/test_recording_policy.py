@@ -0,0 +1,31 @@
+import pytest
+
+from bundle.tests.utils_tests.recorder_utils import bound_recorder, trace_bubble_sort
+from bundle.utils.recorder import SamplingPolicy, BreakpointPolicy, ChangePolicy
+
+
+@pytest.mark.parametrize('policy_factory, is_expected', [
+    pytest.param(lambda lines: SamplingPolicy(3),
+                 lambda index, line, policy: index % 3 == 0,
+                 id='sampling'),
+    pytest.param(lambda lines: BreakpointPolicy([lines[1], lines[-1]]),
+                 lambda index, line, policy: line in policy.breakpoints,
+                 id='breakpoints'),
+])
+def test_recording_policy_keeps_consistent_states(bound_recorder, policy_factory, is_expected):
+    full_result = trace_bubble_sort(bound_recorder)
+    policy = policy_factory([step['line'] for step in full_result])
+    expected = [step for index, step in enumerate(full_result) if is_expected(index, step['line'], policy)]
+
+    assert trace_bubble_sort(bound_recorder, policy) == expected
+
+
+def test_change_policy(bound_recorder):
+    full_result = trace_bubble_sort(bound_recorder)
+    full_changes = bound_recorder.changes
+    changed_records = [record for record in full_changes if record['variables'] or record['accesses']]
+
+    trace_bubble_sort(bound_recorder, ChangePolicy())
+    assert len(bound_recorder.changes) < len(full_changes)
+    # the last two steps may still receive changes when the tracing stops, so they are never dropped
+    assert bound_recorder.changes[:-2] == changed_records[:len(bound_recorder.changes) - 2]
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from bundle.GraphObjects.Graph import MutableGraph
+from bundle.GraphObjects.Node import Node
+from bundle.tests.benchmark_tests.serializer_benchmark import run_benchmarks
+from bundle.utils import serializers
+from bundle.utils.serializers import get_serializer, available_serializers, StdlibSerializer, OrjsonSerializer
+
+VALUE = {'line': 1, 'variables': {'main#a': {'id': 'v1', 'color': '#A6CEE3'}, 'main#b': None,
+                                  'global#accessed var': ['1', 2.5, True]},
+         1: 'int key', None: 'null key'}
+
+
+@pytest.mark.parametrize('serializer', list(available_serializers().values()), ids=repr)
+def test_serializers_are_interchangeable(serializer):
+    expected = json.loads(json.dumps(VALUE))
+    assert json.loads(serializer.dumps(VALUE)) == expected
+    assert serializer.loads(serializer.dumps_bytes(VALUE)) == expected
+    assert serializer.loads(json.dumps(VALUE)) == expected
+    assert serializer.dumps({'object': object()}, default=lambda value: 'object') == \
+           serializer.dumps({'object': 'object'})
+    # the values out of the range of some backends
+    assert serializer.loads(serializer.dumps([2 ** 70])) == [2 ** 70]
+    assert json.loads(serializer.dumps(VALUE, indent=4)) == expected
+
+    with pytest.raises(TypeError):
+        serializer.dumps({'object': object()})
+    with pytest.raises(ValueError):
+        serializer.loads('{')
+
+
+def test_default_serializer(monkeypatch):
+    assert isinstance(get_serializer('json'), StdlibSerializer)
+    assert get_serializer() is get_serializer(get_serializer().name)
+    with pytest.raises(KeyError):
+        get_serializer('pickle')
+
+    monkeypatch.setattr(serializers, 'orjson', None)
+    monkeypatch.setattr(serializers, '_instances', {})
+    assert isinstance(get_serializer(), StdlibSerializer)
+    with pytest.raises(ImportError):
+        OrjsonSerializer()
+    assert list(available_serializers()) == ['json']
+
+
+def test_graph_json():
+    graph = MutableGraph([Node('v1')])
+    graph_json = json.loads(graph.generate_json(indent=2))
+    assert [node['data']['id'] for node in graph_json['elements']['nodes']] == ['v1']
+    assert graph.generate_json_object() == graph_json
+
+
+@pytest.mark.benchmark
+def test_serializer_benchmark():
+    results = run_benchmarks(['bfs'], sizes=[6], repeat=1)
+    assert [result['serializer'] for result in results] == list(available_serializers())
+    assert all(result['jsonBytes'] > 0 and result['dumpsSpeedup'] > 0 for result in results)
+    assert results[0]['dumpsSpeedup'] == 1
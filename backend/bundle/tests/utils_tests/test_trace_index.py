@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from bundle.server_utils.utils import execute
+from bundle.tests.utils_tests.test_delta_result import _process_loop
+from bundle.tests.utils_tests.test_execution_session import graph_json, counting_code
+from bundle.tests.utils_tests.recorder_utils import bound_recorder, trace_graph_usage
+from bundle.utils.delta_result import encode_delta
+from bundle.utils.loop_folding import encode_loops
+from bundle.utils.processor import Processor
+from bundle.utils.trace_index import TraceIndex, ACCESSED_VARIABLE_NAME
+
+
+def _scan(records, predicate):
+    return [step for step, record in enumerate(records) if predicate(record)]
+
+
+def test_accessed_variable_name():
+    assert ACCESSED_VARIABLE_NAME == Processor.ACCESSED_ID_NAME
+
+
+def test_line_and_variable_steps():
+    records = _process_loop()
+    index = TraceIndex.from_records(records)
+
+    for line in {record['line'] for record in records}:
+        assert list(index.line_steps(line)) == _scan(records, lambda record: record['line'] == line)
+    assert list(index.line_steps(-1)) == []
+
+    total_steps = index.variable_steps('loop#total')
+    assert len(total_steps) == len({record['variables']['loop#total']['repr'] for record in records
+                                    if record['variables'] and record['variables']['loop#total']})
+    assert ACCESSED_VARIABLE_NAME not in index.variables
+
+
+def test_element_steps(bound_recorder):
+    processor = Processor()
+    records = processor.load_data(trace_graph_usage(bound_recorder))
+    index = processor.generate_trace_index()
+
+    def accesses(element_id):
+        return lambda record: any(access['id'] == element_id
+                                  for access in (record['variables'] or {}).get(ACCESSED_VARIABLE_NAME) or ())
+
+    assert list(index.element_steps('n1')) == _scan(records, accesses('n1'))
+    assert list(index.element_steps('e1')) == _scan(records, accesses('e1'))
+
+
+def test_queries():
+    records = _process_loop()
+    index = TraceIndex.from_records(records)
+    steps = index.line_steps(records[10]['line'])
+
+    assert index.next_step(steps, steps[0]) == steps[1]
+    assert index.next_step(steps, steps[0] - 1) == steps[0]
+    assert index.next_step(steps, steps[-1]) is None
+    assert index.previous_step(steps, steps[1]) == steps[0]
+    assert index.previous_step(steps, steps[0]) is None
+
+    lines = [records[10]['line'], records[11]['line']]
+    assert index.next_line_step(lines, 10) == 11
+    assert index.previous_line_step(lines, 11) == 10
+    assert index.next_line_step([-1], 0) is None
+
+
+@pytest.mark.parametrize('encode', [list, encode_delta, encode_loops])
+def test_round_trip(encode):
+    records = _process_loop()
+    expected = TraceIndex.from_records(records).as_dict()
+
+    assert TraceIndex.from_result(encode(records)).as_dict() == expected
+    assert TraceIndex.from_dict(json.loads(json.dumps(expected))).as_dict() == expected
+    with pytest.raises(ValueError):
+        TraceIndex.from_result({'version': 0})
+
+
+def test_execute_trace_index():
+    code = counting_code('apple', 5)
+    _, records, info = execute(code, graph_json(), trace_index=True, stream=False)
+    assert info['traceIndex'] == TraceIndex.from_records(records).as_dict()
+    assert len(info['traceIndex']['variables']['main#apple']) == 6
+    assert 'traceIndex' not in execute(code, graph_json(), stream=False)[2]
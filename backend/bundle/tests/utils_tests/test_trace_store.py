@@ -0,0 +1,52 @@
+import pytest
+
+from bundle.GraphObjects.Node import Node
+from bundle.tests.utils_tests.recorder_utils import bound_recorder, trace_bubble_sort
+from bundle.utils.recorder import Recorder, SamplingPolicy, ChangePolicy
+from bundle.utils.trace_store import TraceStore, TraceChunk, RecordedValue
+
+
+@pytest.mark.parametrize('policy', [None, SamplingPolicy(2), ChangePolicy()], ids=['all', 'sampling', 'change'])
+def test_spilled_records(bound_recorder, tmp_path, policy):
+    expected = trace_bubble_sort(bound_recorder, policy)
+    expected_summary = bound_recorder.get_summary()
+
+    # a tiny threshold makes the recorder spill after every few steps
+    store = TraceStore(tmp_path / TraceStore.FILE_NAME, threshold=bound_recorder.RECORD_SIZE * 4)
+    assert trace_bubble_sort(bound_recorder, policy, store) == expected
+    assert len(store) > 1
+    assert len(bound_recorder.lines) <= bound_recorder.KEPT_STEPS + 1
+    assert bound_recorder.get_summary()['steps'] == expected_summary['steps']
+
+    bound_recorder.purge()
+    assert store.closed and not store.path.exists()
+
+
+def test_memory_of_kept_steps(tmp_path):
+    recorder = Recorder()
+    large_value = 'x' * 10_000
+    with TraceStore(tmp_path / TraceStore.FILE_NAME, threshold=Recorder.RECORD_SIZE * 4) as store:
+        recorder.set_store(store)
+        for line in range(6):
+            recorder.add_record(line)
+        recorder.add_vc_to_last_record(('main', 'a'), large_value)
+        recorder.add_record(6)
+
+        assert len(store) and recorder.step_offset > 0
+        # the value of a kept step is still counted after the older steps are spilled
+        assert recorder.memory_bytes >= len(recorder.lines) * Recorder.RECORD_SIZE + len(large_value)
+        recorder.purge()
+
+
+def test_trace_store_round_trip(tmp_path):
+    node = Node('1')
+    with TraceStore(tmp_path / TraceStore.FILE_NAME, threshold=0) as store:
+        assert list(store) == []
+        store.append(TraceChunk(0, [1, 2], [0, 1], [0, 0], ['a', node], [1], [node]))
+        store.append(TraceChunk(2, [3], [2], [1], [[1, 2]], [], []))
+        first, second = store
+
+        assert first.lines == [1, 2] and first.vc_steps == [0, 1]
+        assert first.vc_values == [RecordedValue("'a'"), RecordedValue(repr(node), node.identity)]
+        assert first.ac_values == [RecordedValue(repr(node), node.identity)]
+        assert second.step_offset == 2 and second.vc_values == [RecordedValue('[1, 2]')]
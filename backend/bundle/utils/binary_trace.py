@@ -0,0 +1,353 @@
+"""
+binary encoding of processed results
+
+In the json of a result, every step repeats the names of the variables,
+the keys like `'type'` and `'repr'`, the types and the colors. The binary
+trace keeps every string once, every distinct variable value once, and a
+step as a fixed-width record::
+
+    header      magic `GTRC`, version, the size of ids, and the numbers of
+                steps, strings, values and columns, and the id of the metadata
+    strings     the interned strings, each of which is a varint length and utf-8 bytes
+    columns     the string ids of the variable names
+    values      the distinct values, each of which is tagged, see `TAG_*`
+    records     the line of each step, a flag telling whether its variables are `None`,
+                and the value id of each column, in which 0 means the variable is absent
+
+The ids are 2 bytes when they fit, and 4 bytes otherwise. A value can be
+any json value, and the common ones, ie. the normal variables, the graph
+elements and the accesses, have their own tags. The metadata is a json
+value sent along with the records, eg. the hash of the code.
+
+Usage::
+
+    data = encode_trace(processor.result, metadata={'codeHash': code_hash})
+    records, metadata = decode_trace(data)
+
+The json form of the result is still the default for the clients which
+don't ask for the binary one.
+"""
+import struct
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from bundle.utils.trace_index import iter_result_records
+
+BINARY_FORMAT_VERSION = 1
+MAGIC = b'GTRC'
+CONTENT_TYPE = 'application/vnd.graphery.trace'
+
+# magic, version, id size, steps, strings, values, columns, metadata id
+HEADER = struct.Struct('<4sHBxIIIII')
+FLOAT = struct.Struct('<d')
+# the flags of a record
+VARIABLES_NONE = 1
+
+TAG_NULL = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STRING = 5
+TAG_LIST = 6
+TAG_DICT = 7
+# {'type': 'normal_var', 'repr': str}
+TAG_NORMAL_VAR = 8
+# {'type': 'graph_element', 'id': str, 'color': str, 'repr': str}
+TAG_GRAPH_ELEMENT = 9
+# {'id': str, 'color': str}, ie. an accessed graph element
+TAG_ACCESS = 10
+
+_NORMAL_VAR_KEYS = ('type', 'repr')
+_GRAPH_ELEMENT_KEYS = ('type', 'id', 'color', 'repr')
+_ACCESS_KEYS = ('id', 'color')
+
+
+class BinaryTrace(NamedTuple):
+    records: List[dict]
+    metadata: Any = None
+
+
+def is_binary_trace(data: Union[bytes, bytearray, memoryview]) -> bool:
+    """
+    @param data:
+    @return: whether the data is a binary trace
+    """
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def _write_varint(buffer: bytearray, number: int) -> None:
+    while number > 0x7F:
+        buffer.append((number & 0x7F) | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def _read_varint(data: memoryview, position: int) -> Tuple[int, int]:
+    number, shift = 0, 0
+    while True:
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, position
+        shift += 7
+
+
+def _has_keys(value: Mapping, keys: Tuple[str, ...]) -> bool:
+    # the keys are compared in order, so that the decoded dict is the same as the encoded one
+    return len(value) == len(keys) and tuple(value) == keys and all(isinstance(value[key], str) for key in keys)
+
+
+class _Encoder:
+    def __init__(self):
+        self.strings: List[str] = []
+        self.string_ids: Dict[str, int] = {}
+        self.values = bytearray()
+        self.value_count = 0
+        # the values are looked up by identity first, since the records of a processor share them
+        self.value_ids_by_identity: Dict[int, Tuple[Any, int]] = {}
+        self.value_ids: Dict[Any, int] = {}
+
+    def intern(self, string: str) -> int:
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = self.string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def _key(self, value: Any) -> Any:
+        # the types are a part of the key, since 1 == 1.0 == True
+        if isinstance(value, Mapping):
+            return dict, tuple((key, self._key(item)) for key, item in value.items())
+        if isinstance(value, (list, tuple)):
+            return list, tuple(self._key(item) for item in value)
+        return type(value), value
+
+    def add_value(self, value: Any) -> int:
+        """
+        @param value:
+        @return: the id of the value, which starts from 1
+        """
+        cached = self.value_ids_by_identity.get(id(value))
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        key = self._key(value)
+        value_id = self.value_ids.get(key)
+        if value_id is None:
+            self.write_value(self.values, value)
+            self.value_count += 1
+            value_id = self.value_ids[key] = self.value_count
+        # the value is kept along with its id, so that its id is not reused
+        self.value_ids_by_identity[id(value)] = (value, value_id)
+        return value_id
+
+    def write_value(self, buffer: bytearray, value: Any) -> None:
+        if value is None:
+            buffer.append(TAG_NULL)
+        elif value is True:
+            buffer.append(TAG_TRUE)
+        elif value is False:
+            buffer.append(TAG_FALSE)
+        elif isinstance(value, int):
+            buffer.append(TAG_INT)
+            # zigzag, so that the small negative numbers are small
+            _write_varint(buffer, value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif isinstance(value, float):
+            buffer.append(TAG_FLOAT)
+            buffer += FLOAT.pack(value)
+        elif isinstance(value, str):
+            buffer.append(TAG_STRING)
+            _write_varint(buffer, self.intern(value))
+        elif isinstance(value, (list, tuple)):
+            buffer.append(TAG_LIST)
+            _write_varint(buffer, len(value))
+            for item in value:
+                self.write_value(buffer, item)
+        elif isinstance(value, Mapping):
+            self.write_mapping(buffer, value)
+        else:
+            raise TypeError(f'Object of type {type(value).__name__} cannot be encoded into a binary trace')
+
+    def write_mapping(self, buffer: bytearray, value: Mapping) -> None:
+        if value.get('type') == 'normal_var' and _has_keys(value, _NORMAL_VAR_KEYS):
+            buffer.append(TAG_NORMAL_VAR)
+            _write_varint(buffer, self.intern(value['repr']))
+        elif value.get('type') == 'graph_element' and _has_keys(value, _GRAPH_ELEMENT_KEYS):
+            buffer.append(TAG_GRAPH_ELEMENT)
+            for key in _GRAPH_ELEMENT_KEYS[1:]:
+                _write_varint(buffer, self.intern(value[key]))
+        elif _has_keys(value, _ACCESS_KEYS):
+            buffer.append(TAG_ACCESS)
+            for key in _ACCESS_KEYS:
+                _write_varint(buffer, self.intern(value[key]))
+        else:
+            buffer.append(TAG_DICT)
+            _write_varint(buffer, len(value))
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f'keys must be str, not {type(key).__name__}')
+                _write_varint(buffer, self.intern(key))
+                self.write_value(buffer, item)
+
+
+def encode_trace(records: Sequence[Mapping], metadata: Any = None) -> bytes:
+    """
+    encode processed records into a binary trace
+    @param records: the records of the version 1, see `Processor.generate_record_template`
+    @param metadata: a json value sent along with the records, `None` means nothing
+    @return: the binary trace
+    @raise TypeError: if a value is not a json value
+    """
+    encoder = _Encoder()
+    columns: List[str] = []
+    column_ids: Dict[str, int] = {}
+    # the value ids of the records, `None` if the variables are `None`
+    record_values: List[Optional[Dict[int, int]]] = []
+    for record in records:
+        variables = record['variables']
+        if variables is None:
+            record_values.append(None)
+            continue
+        values = {}
+        for name, value in variables.items():
+            column = column_ids.get(name)
+            if column is None:
+                column = column_ids[name] = len(columns)
+                columns.append(name)
+            values[column] = encoder.add_value(value)
+        record_values.append(values)
+    column_string_ids = [encoder.intern(name) for name in columns]
+    metadata_id = encoder.add_value(metadata) if metadata is not None else 0
+
+    id_size = 2 if max(len(encoder.strings), encoder.value_count) < 1 << 16 else 4
+    id_code = 'H' if id_size == 2 else 'I'
+    record_struct = struct.Struct(f'<iB{len(columns)}{id_code}')
+    empty_values = [0] * len(columns)
+
+    buffer = bytearray(HEADER.pack(MAGIC, BINARY_FORMAT_VERSION, id_size, len(records), len(encoder.strings),
+                                   encoder.value_count, len(columns), metadata_id))
+    for string in encoder.strings:
+        encoded_string = string.encode('UTF-8')
+        _write_varint(buffer, len(encoded_string))
+        buffer += encoded_string
+    buffer += struct.pack(f'<{len(columns)}{id_code}', *column_string_ids)
+    buffer += encoder.values
+    for record, values in zip(records, record_values):
+        if values is None:
+            buffer += record_struct.pack(record['line'], VARIABLES_NONE, *empty_values)
+        else:
+            value_ids = list(empty_values)
+            for column, value_id in values.items():
+                value_ids[column] = value_id
+            buffer += record_struct.pack(record['line'], 0, *value_ids)
+    return bytes(buffer)
+
+
+class _Decoder:
+    def __init__(self, data: memoryview, strings: List[str]):
+        self.data = data
+        self.strings = strings
+
+    def read_value(self, position: int) -> Tuple[Any, int]:
+        data, strings = self.data, self.strings
+        tag = data[position]
+        position += 1
+        if tag == TAG_NULL:
+            return None, position
+        if tag == TAG_TRUE:
+            return True, position
+        if tag == TAG_FALSE:
+            return False, position
+        if tag == TAG_INT:
+            number, position = _read_varint(data, position)
+            return (number >> 1) if not number & 1 else -((number + 1) >> 1), position
+        if tag == TAG_FLOAT:
+            return FLOAT.unpack_from(data, position)[0], position + FLOAT.size
+        if tag == TAG_STRING:
+            string_id, position = _read_varint(data, position)
+            return strings[string_id], position
+        if tag == TAG_LIST:
+            length, position = _read_varint(data, position)
+            items = []
+            for _ in range(length):
+                item, position = self.read_value(position)
+                items.append(item)
+            return items, position
+        if tag == TAG_DICT:
+            length, position = _read_varint(data, position)
+            items = {}
+            for _ in range(length):
+                key_id, position = _read_varint(data, position)
+                items[strings[key_id]], position = self.read_value(position)
+            return items, position
+        if tag == TAG_NORMAL_VAR:
+            repr_id, position = _read_varint(data, position)
+            return {'type': 'normal_var', 'repr': strings[repr_id]}, position
+        if tag == TAG_GRAPH_ELEMENT:
+            element_id, position = _read_varint(data, position)
+            color_id, position = _read_varint(data, position)
+            repr_id, position = _read_varint(data, position)
+            return {'type': 'graph_element', 'id': strings[element_id],
+                    'color': strings[color_id], 'repr': strings[repr_id]}, position
+        if tag == TAG_ACCESS:
+            element_id, position = _read_varint(data, position)
+            color_id, position = _read_varint(data, position)
+            return {'id': strings[element_id], 'color': strings[color_id]}, position
+        raise ValueError(f'unknown tag {tag} at {position - 1}')
+
+
+def decode_trace(data: Union[bytes, bytearray, memoryview]) -> BinaryTrace:
+    """
+    decode a binary trace
+    @param data:
+    @return: the records of the version 1 and the metadata
+    @raise ValueError: if the data is not a binary trace of a supported version
+    """
+    data = memoryview(data)
+    if len(data) < HEADER.size or not is_binary_trace(data):
+        raise ValueError('the data is not a binary trace')
+    magic, version, id_size, step_count, string_count, value_count, column_count, metadata_id = \
+        HEADER.unpack_from(data)
+    if version != BINARY_FORMAT_VERSION:
+        raise ValueError(f'unsupported binary trace version {version}')
+    position = HEADER.size
+
+    strings = []
+    for _ in range(string_count):
+        length, position = _read_varint(data, position)
+        strings.append(str(data[position:position + length], 'UTF-8'))
+        position += length
+
+    id_code = 'H' if id_size == 2 else 'I'
+    column_struct = struct.Struct(f'<{column_count}{id_code}')
+    columns = [strings[string_id] for string_id in column_struct.unpack_from(data, position)]
+    position += column_struct.size
+
+    decoder = _Decoder(data, strings)
+    # the value of id 0 is the absent one
+    values: List[Any] = [None]
+    for _ in range(value_count):
+        value, position = decoder.read_value(position)
+        values.append(value)
+
+    record_struct = struct.Struct(f'<iB{column_count}{id_code}')
+    records = []
+    for line, flags, *value_ids in record_struct.iter_unpack(data[position:position + record_struct.size * step_count]):
+        if flags & VARIABLES_NONE:
+            records.append({'line': line, 'variables': None})
+        else:
+            records.append({'line': line, 'variables': {column: values[value_id]
+                                                        for column, value_id in zip(columns, value_ids)
+                                                        if value_id}})
+    return BinaryTrace(records, values[metadata_id] if metadata_id else None)
+
+
+def encode_result(result: Union[Sequence[Mapping], Mapping], metadata: Any = None) -> bytes:
+    """
+    encode a result in any format into a binary trace
+    @param result: the records of the version 1, or a delta-encoded or loop-folded result
+    @param metadata: a json value sent along with the records
+    @return: the binary trace
+    """
+    records = iter_result_records(result)
+    return encode_trace(records if isinstance(records, Sequence) else list(records), metadata)
@@ -0,0 +1,315 @@
+"""
+bounded representations, which never build the whole repr of a huge value
+
+`repr` of a container builds the reprs of all its items, so the repr of a
+list of a million items is megabytes long even if only a hundred characters
+of it are displayed. `BoundedRepr` works like `reprlib.Repr`: each type has
+its own limit of items or characters, and the items beyond the limit are
+replaced by `...`. A total size is also kept, so that the nested values stop
+being represented once the result is long enough::
+
+    >>> BoundedRepr(maxlist=3).repr(list(range(10)))
+    '[0, 1, 2, ...]'
+
+The values within the limits are represented exactly as `repr` does, so
+the limits are generous by default.
+"""
+import builtins
+import itertools
+import reprlib
+import threading
+from array import array
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from bundle.GraphObjects.Edge import Edge, EdgeSet
+from bundle.GraphObjects.Graph import Graph
+from bundle.GraphObjects.Node import Node, NodeSet
+
+FILL = '...'
+
+# the types whose reprs are short, and the usual size of the short values
+_SHORT_TYPES = frozenset((bool, float, complex, type(None), Node, Edge))
+_SHORT_SIZE = 24
+_SHORT_INT = 10 ** (_SHORT_SIZE - 2)
+
+
+class BoundedRepr(reprlib.Repr):
+    """
+    A `reprlib.Repr` whose cost is bounded by its limits instead of the sizes of the values.
+
+    The handlers are found by the types of the values like `reprlib.Repr`,
+    ie. `repr_list` for lists, but the subclasses which don't override
+    `__repr__` use the handlers of their bases. The graph objects have their
+    own handlers, which don't go through all the nodes or the edges.
+    """
+    # the graph objects are matched by `isinstance`, since the mutable ones are subclasses
+    GRAPH_HANDLERS = ((Node, 'repr_node'), (Edge, 'repr_edge'), (Graph, 'repr_graph'),
+                      (NodeSet, 'repr_node_set'), (EdgeSet, 'repr_edge_set'))
+
+    def __init__(self, max_size: Optional[int] = 100_000, **limits: int):
+        """
+        @param max_size: the total size of a representation, `None` means no limit
+        @param limits: the limits of `reprlib.Repr`, ie. `maxlevel`, `maxlist`, `maxdict`, `maxstring`, etc.
+        @raise ValueError: if a limit is unknown
+        """
+        super().__init__()
+        self.maxlevel = 6
+        self.maxtuple = self.maxlist = self.maxarray = self.maxdict = 1000
+        self.maxset = self.maxfrozenset = self.maxdeque = 1000
+        self.maxstring = self.maxother = 10_000
+        self.maxlong = 1000
+        for name, limit in limits.items():
+            if not (name.startswith('max') and hasattr(self, name)):
+                raise ValueError(f'unknown limit {name}')
+            setattr(self, name, limit)
+
+        self.max_size = max_size
+        self._handlers: Dict[type, Callable[[Any, int], str]] = {}
+        self._local = threading.local()
+
+    def repr(self, x: Any, max_length: Optional[int] = None) -> str:
+        """
+        represent a value within the limits
+        @param x: the value
+        @param max_length: the length of the result, the middle of a longer representation is replaced by `...`
+        @return: the representation
+        """
+        if self._is_short(x):
+            return truncate(builtins.repr(x), max_length)
+
+        if max_length and isinstance(x, (list, tuple)) and len(x) > max_length \
+                and self._get_handler(type(x)) in (self.repr_list, self.repr_tuple):
+            # only the head and the tail of a long sequence are displayed, and each item takes
+            # at least a character, so the first and the last `max_length` items are enough
+            left = (max_length - 3) // 2
+            right = max_length - 3 - left
+            head, tail = self._repr(x[:max_length]), self._repr(x[-max_length:])
+            return head[:left] + FILL + tail[len(tail) - right:]
+
+        return truncate(self._repr(x), max_length)
+
+    def _is_short(self, x: Any) -> bool:
+        """
+        whether `repr` of a value is within the limits, so that `repr` can be used directly
+        @param x: the value
+        @return:
+        """
+        if type(x) in _SHORT_TYPES:
+            return True
+        limits = {list: self.maxlist, tuple: self.maxtuple, set: self.maxset,
+                  frozenset: self.maxfrozenset, deque: self.maxdeque, dict: self.maxdict}
+        budget = self.max_size if self.max_size is not None else float('inf')
+        return self._fit(x, self.maxlevel, budget, limits) >= 0
+
+    def _fit(self, x: Any, level: int, budget: float, limits: Dict[type, int]) -> float:
+        """
+        estimate the size of the repr of a value, which is much cheaper than representing it
+        @param x: the value
+        @param level: the level of the value
+        @param budget: the size left
+        @param limits: the limits of the built-in containers
+        @return: the size left after the value, or a negative number if the value is out of the limits
+        """
+        value_type = type(x)
+        if value_type in _SHORT_TYPES:
+            return budget - _SHORT_SIZE
+        if value_type is int:
+            bits = x.bit_length()
+            # a decimal digit takes more than three bits
+            return budget - bits // 3 - 2 if bits <= self.maxlong * 3 else -1
+        if value_type is str:
+            return budget - len(x) - 2 if len(x) <= self.maxstring else -1
+
+        limit = limits.get(value_type)
+        if limit is None or level <= 0 or len(x) > limit:
+            return -1
+        budget -= 2 * len(x) + 2
+        for item in (itertools.chain.from_iterable(x.items()) if value_type is dict else x):
+            # the common items are measured here rather than by calls
+            item_type = type(item)
+            if item_type in _SHORT_TYPES:
+                budget -= _SHORT_SIZE
+            elif item_type is str and len(item) <= _SHORT_SIZE or item_type is int and -_SHORT_INT < item < _SHORT_INT:
+                budget -= _SHORT_SIZE
+            else:
+                budget = self._fit(item, level - 1, budget, limits)
+                if budget < 0:
+                    return budget
+        return budget
+
+    def _repr(self, x: Any) -> str:
+        local = self._local
+        previous = getattr(local, 'remaining', None)
+        local.remaining = self.max_size
+        try:
+            return self.repr1(x, self.maxlevel)
+        finally:
+            local.remaining = previous
+
+    def _is_exhausted(self) -> bool:
+        remaining = getattr(self._local, 'remaining', None)
+        return remaining is not None and remaining <= 0
+
+    def _get_handler(self, value_type: type) -> Callable[[Any, int], str]:
+        handler = self._handlers.get(value_type)
+        if handler is not None:
+            return handler
+
+        for base, name in self.GRAPH_HANDLERS:
+            if issubclass(value_type, base):
+                handler = getattr(self, name)
+                break
+        else:
+            handler = self.repr_instance
+            for base in value_type.__mro__:
+                base_handler = getattr(self, 'repr_' + base.__name__, None)
+                if base_handler is not None:
+                    handler = base_handler
+                    break
+                if '__repr__' in vars(base):
+                    # the handlers of the bases don't know how this class is represented
+                    break
+
+        self._handlers[value_type] = handler
+        return handler
+
+    def repr1(self, x: Any, level: int) -> str:
+        local = self._local
+        remaining = getattr(local, 'remaining', None)
+        if remaining is not None and remaining <= 0:
+            return FILL
+
+        result = self._get_handler(type(x))(x, level)
+        if remaining is not None:
+            # the items counted during the call are parts of the result, which are not counted twice
+            local.remaining = remaining - len(result)
+        return result
+
+    def _repr_items(self, items: Iterable, size: int, level: int,
+                    left: str, right: str, max_items: int, trail: str = '') -> str:
+        if not size:
+            return left + right
+        if level <= 0:
+            return left + FILL + right
+
+        pieces = []
+        for item in itertools.islice(items, max_items):
+            if self._is_exhausted():
+                break
+            pieces.append(self.repr1(item, level - 1))
+        if len(pieces) < size:
+            pieces.append(FILL)
+        elif size == 1:
+            pieces[-1] += trail
+        return left + ', '.join(pieces) + right
+
+    def _repr_pairs(self, pairs: Iterable, size: int, level: int, left: str, right: str) -> str:
+        if not size:
+            return left + right
+        if level <= 0:
+            return left + FILL + right
+
+        pieces = []
+        for key, value in itertools.islice(pairs, self.maxdict):
+            if self._is_exhausted():
+                break
+            pieces.append(f'{self.repr1(key, level - 1)}: {self.repr1(value, level - 1)}')
+        if len(pieces) < size:
+            pieces.append(FILL)
+        return left + ', '.join(pieces) + right
+
+    def _shorten(self, string: str, limit: int) -> str:
+        if len(string) <= limit:
+            return string
+        left = max(0, (limit - len(FILL)) // 2)
+        right = max(0, limit - len(FILL) - left)
+        return string[:left] + FILL + string[len(string) - right:]
+
+    def repr_tuple(self, x: tuple, level: int) -> str:
+        return self._repr_items(x, len(x), level, '(', ')', self.maxtuple, ',')
+
+    def repr_list(self, x: list, level: int) -> str:
+        return self._repr_items(x, len(x), level, '[', ']', self.maxlist)
+
+    def repr_array(self, x: array, level: int) -> str:
+        if not x:
+            return f"array('{x.typecode}')"
+        return self._repr_items(x, len(x), level, f"array('{x.typecode}', [", '])', self.maxarray)
+
+    def repr_set(self, x: set, level: int) -> str:
+        if not x:
+            return 'set()'
+        return self._repr_items(x, len(x), level, '{', '}', self.maxset)
+
+    def repr_frozenset(self, x: frozenset, level: int) -> str:
+        if not x:
+            return 'frozenset()'
+        return self._repr_items(x, len(x), level, 'frozenset({', '})', self.maxfrozenset)
+
+    def repr_deque(self, x: deque, level: int) -> str:
+        right = '])' if x.maxlen is None else f'], maxlen={x.maxlen})'
+        return self._repr_items(x, len(x), level, f'{type(x).__name__}([', right, self.maxdeque)
+
+    def repr_dict(self, x: dict, level: int) -> str:
+        return self._repr_pairs(x.items(), len(x), level, '{', '}')
+
+    def repr_defaultdict(self, x: defaultdict, level: int) -> str:
+        return self._repr_pairs(x.items(), len(x), level,
+                                f'{type(x).__name__}({self.repr1(x.default_factory, level - 1)}, {{', '})')
+
+    def repr_str(self, x: str, level: int) -> str:
+        if len(x) <= self.maxstring:
+            return builtins.repr(x)
+        # only the both ends of the string are represented, which keeps the quotes of `repr`
+        left = max(0, (self.maxstring - len(FILL)) // 2)
+        right = max(0, self.maxstring - len(FILL) - left)
+        string = builtins.repr(x[:left] + x[len(x) - right:])
+        return string[:left] + FILL + string[len(string) - right:]
+
+    def repr_bytes(self, x: bytes, level: int) -> str:
+        if len(x) <= self.maxstring:
+            return builtins.repr(x)
+        return self._shorten(builtins.repr(x[:self.maxstring] + x[len(x) - self.maxstring:]), self.maxstring)
+
+    def repr_int(self, x: int, level: int) -> str:
+        if x.bit_length() > self.maxlong * 4:
+            # converting a huge integer to decimal takes quadratic time
+            return f'<int of {x.bit_length()} bits>'
+        return self._shorten(builtins.repr(x), self.maxlong)
+
+    def repr_instance(self, x: Any, level: int) -> str:
+        return self._shorten(builtins.repr(x), self.maxother)
+
+    def repr_node(self, x: Node, level: int) -> str:
+        return builtins.repr(x)
+
+    def repr_edge(self, x: Edge, level: int) -> str:
+        return builtins.repr(x)
+
+    def repr_graph(self, x: Graph, level: int) -> str:
+        return f'{type(x).__name__}(nodes: {len(x.nodes)}, edges: {len(x.edges)})'
+
+    def repr_node_set(self, x: NodeSet, level: int) -> str:
+        if not x.elements:
+            return 'set()'
+        return self._repr_items(x.elements, len(x.elements), level, '{', '}', self.maxset)
+
+    repr_edge_set = repr_node_set
+
+
+def truncate(string: str, max_length: Optional[int]) -> str:
+    """
+    replace the middle of a long string by `...`
+    @param string:
+    @param max_length: the length of the result, `None` or `0` means no limit
+    @return: the string within the length
+    """
+    if not max_length or len(string) <= max_length:
+        return string
+    left = (max_length - 3) // 2
+    right = max_length - 3 - left
+    return string[:left] + FILL + string[len(string) - right:]
+
+
+bounded_repr = BoundedRepr()
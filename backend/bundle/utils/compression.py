@@ -0,0 +1,99 @@
+"""
+compression of results, with `zlib` of the standard library
+
+A result is compressed once, when it's written, and the compressed bytes
+are sent as they are with the `Content-Encoding` header::
+
+    data = compress(serializer.dumps_bytes(result), GZIP_ENCODING)
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+
+The gzip streams don't carry the time they are made, so the same result
+is always compressed into the same bytes.
+"""
+import zlib
+from typing import Iterable, Iterator, Optional, Union
+
+GZIP_ENCODING = 'gzip'
+DEFLATE_ENCODING = 'deflate'
+# the encodings in the order of preference
+ENCODINGS = (GZIP_ENCODING, DEFLATE_ENCODING)
+DEFAULT_COMPRESSION_LEVEL = 6
+
+_WINDOW_BITS = {
+    GZIP_ENCODING: 16 + zlib.MAX_WBITS,
+    DEFLATE_ENCODING: zlib.MAX_WBITS,
+}
+
+
+def _window_bits(encoding: str) -> int:
+    try:
+        return _WINDOW_BITS[encoding]
+    except KeyError:
+        raise ValueError(f'unsupported encoding {encoding}') from None
+
+
+def iter_compressed(chunks: Iterable[Union[str, bytes]], encoding: str = GZIP_ENCODING,
+                    level: int = DEFAULT_COMPRESSION_LEVEL) -> Iterator[bytes]:
+    """
+    compress a stream of chunks, eg. the ones of `iter_json`
+    @param chunks: the strings are encoded in utf-8
+    @param encoding: one of `ENCODINGS`
+    @param level: the compression level, from 0 (no compression) to 9 (the smallest)
+    @return: iterator of compressed chunks
+    @raise ValueError: if the encoding is not supported
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _window_bits(encoding))
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode('UTF-8') if isinstance(chunk, str) else chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def compress(data: Union[str, bytes], encoding: str = GZIP_ENCODING, level: int = DEFAULT_COMPRESSION_LEVEL) -> bytes:
+    """
+    @param data: a string is encoded in utf-8
+    @param encoding: one of `ENCODINGS`
+    @param level: the compression level, from 0 (no compression) to 9 (the smallest)
+    @return: the compressed data
+    @raise ValueError: if the encoding is not supported
+    """
+    return b''.join(iter_compressed((data,), encoding, level))
+
+
+def decompress(data: bytes, encoding: str = GZIP_ENCODING) -> bytes:
+    """
+    @param data: the compressed data
+    @param encoding: one of `ENCODINGS`
+    @return: the data
+    @raise ValueError: if the encoding is not supported
+    @raise zlib.error: if the data is not compressed in the encoding
+    """
+    return zlib.decompress(data, _window_bits(encoding))
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """
+    choose an encoding accepted by a client
+    @param accept_encoding: the value of the `Accept-Encoding` header
+    @param encodings: the encodings the server can send, in the order of preference
+    @return: the encoding, `None` if the client accepts none of them
+    """
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, parameters = item.strip().partition(';')
+        quality = 1.0
+        parameter_name, _, parameter_value = parameters.strip().partition('=')
+        if parameter_name.strip() == 'q':
+            try:
+                quality = float(parameter_value)
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    wildcard_quality = accepted.get('*', 0.0)
+    candidates = [(accepted.get(encoding, wildcard_quality), -index, encoding)
+                  for index, encoding in enumerate(encodings)]
+    quality, _, encoding = max(candidates, default=(0.0, 0, None))
+    return encoding if quality > 0 else None
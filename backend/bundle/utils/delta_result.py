@@ -0,0 +1,172 @@
+"""
+delta-encoded processed results
+
+Each record processed by `Processor` carries all the variables, so the
+size of a result is O(steps x variables). In the delta format, which is
+the version 2 of the result, a record only carries the variables changed
+in its step, and every `keyframeInterval`-th record, starting from the
+first one, is a keyframe carrying all the variables::
+
+    {
+        'version': 2,
+        'keyframeInterval': 64,
+        'records': [
+            {'line': 1, 'variables': {'main#a': None, 'main#b': None, ...}},      # a keyframe
+            {'line': 2, 'changes': {'main#a': '1'}},
+            {'line': 3, 'variables': None},                                      # nothing changed
+            ...
+            {'line': 7, 'variables': None, 'state': {'main#a': '1', ...}},       # a keyframe without changes
+        ]
+    }
+
+The records of the version 1 are restored by `DeltaResult`, in which the
+state of any step is rebuilt from its last keyframe, ie. in O(K).
+"""
+from typing import Mapping, Iterable, Iterator, List, Optional, Any, Dict
+
+DELTA_FORMAT_VERSION = 2
+DEFAULT_KEYFRAME_INTERVAL = 64
+
+_MISSING = object()
+
+
+def get_changes(previous: Optional[Mapping[str, Any]], variables: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    get the variables which are different from the previous ones
+    @param previous: the previous variables, `None` if nothing is recorded before
+    @param variables: the current variables
+    @return: the changed variables
+    """
+    if previous is None:
+        return dict(variables)
+    changes = {}
+    for name, value in variables.items():
+        previous_value = previous.get(name, _MISSING)
+        if previous_value is not value and previous_value != value:
+            changes[name] = value
+    return changes
+
+
+def iter_delta_records(records: Iterable[Mapping],
+                       keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> Iterator[Mapping]:
+    """
+    encode processed records into the delta format as a stream
+    @param records: the records of the version 1, see `Processor.generate_record_template`
+    @param keyframe_interval: the number of records between two keyframes
+    @return: iterator of delta records
+    @raise ValueError: if the interval is not positive
+    """
+    if keyframe_interval < 1:
+        raise ValueError('the keyframe interval must be positive')
+
+    state: Optional[Mapping[str, Any]] = None
+    for step, record in enumerate(records):
+        variables = record['variables']
+        if step % keyframe_interval == 0:
+            if variables is None:
+                yield {'line': record['line'], 'variables': None, 'state': state}
+            else:
+                state = variables
+                yield {'line': record['line'], 'variables': variables}
+        elif variables is None:
+            yield {'line': record['line'], 'variables': None}
+        else:
+            changes = get_changes(state, variables)
+            state = variables
+            yield {'line': record['line'], 'changes': changes}
+
+
+def encode_delta(records: Iterable[Mapping], keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> dict:
+    """
+    encode processed records into the delta format
+    @param records: the records of the version 1
+    @param keyframe_interval: the number of records between two keyframes
+    @return: the delta-encoded result
+    """
+    return {
+        'version': DELTA_FORMAT_VERSION,
+        'keyframeInterval': keyframe_interval,
+        'records': list(iter_delta_records(records, keyframe_interval))
+    }
+
+
+class DeltaResult:
+    """
+    The reader of a delta-encoded result.
+
+    Usage::
+
+        result = DeltaResult(encode_delta(processor.result))
+        result.get_state(100)    # the variables in effect at the step 100
+        result.get_record(100)   # the same as `processor.result[100]`
+        list(result)             # the same as `processor.result`
+    """
+    def __init__(self, result: Mapping):
+        """
+        @param result: the delta-encoded result
+        @raise ValueError: if the result is not in the delta format
+        """
+        if result.get('version') != DELTA_FORMAT_VERSION:
+            raise ValueError(f'unsupported result version {result.get("version")}')
+        self.keyframe_interval: int = result['keyframeInterval']
+        self.records: List[Mapping] = result['records']
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @staticmethod
+    def _apply(state: Optional[Dict[str, Any]], record: Mapping) -> Optional[Dict[str, Any]]:
+        # the state is updated in place, which is a copy of the keyframe
+        changes = record.get('changes')
+        if changes is None:
+            return state
+        if state is None:
+            return dict(changes)
+        state.update(changes)
+        return state
+
+    @staticmethod
+    def _keyframe_state(record: Mapping) -> Optional[Dict[str, Any]]:
+        state = record['variables'] if record['variables'] is not None else record.get('state')
+        return dict(state) if state is not None else None
+
+    @staticmethod
+    def _to_record(record: Mapping, state: Optional[Mapping[str, Any]]) -> dict:
+        changed = 'changes' in record or record['variables'] is not None
+        return {'line': record['line'], 'variables': dict(state) if changed else None}
+
+    def get_state(self, step: int) -> Optional[Mapping[str, Any]]:
+        """
+        rebuild the variables in effect at a step from its last keyframe
+        @param step: the index of the record
+        @return: the variables, `None` if nothing is recorded before the step
+        @raise IndexError: if the step is out of range
+        """
+        if step < 0:
+            step += len(self.records)
+        if not 0 <= step < len(self.records):
+            raise IndexError(f'step {step} out of range')
+
+        keyframe_step = step - step % self.keyframe_interval
+        state = self._keyframe_state(self.records[keyframe_step])
+        for record in self.records[keyframe_step + 1:step + 1]:
+            state = self._apply(state, record)
+        return state
+
+    def get_record(self, step: int) -> dict:
+        """
+        restore a record of the version 1
+        @param step: the index of the record
+        @return: the record
+        @raise IndexError: if the step is out of range
+        """
+        return self._to_record(self.records[step], self.get_state(step))
+
+    def __iter__(self) -> Iterator[dict]:
+        state = None
+        for step, record in enumerate(self.records):
+            if step % self.keyframe_interval == 0:
+                state = self._keyframe_state(record)
+            else:
+                state = self._apply(state, record)
+            yield self._to_record(record, state)
@@ -0,0 +1,108 @@
+"""
+streaming json encoding, which yields the json of a large result in chunks
+
+`json.dumps` builds the whole string of a result next to the result itself,
+and nothing can be sent before it's done. `iter_json` walks the mappings
+key by key and the other iterables item by item, in which each item is
+encoded by the serializer as a whole, and the encoded pieces are joined into
+chunks of about `chunk_size` characters::
+
+    for chunk in iter_json({'data': {'execResult': processor.result}}):
+        send(chunk)
+
+The joined chunks are the same as `dumps` of the same serializer.
+Iterators and generators are encoded as arrays, so the records can also be
+produced while they are sent. The json encoded somewhere else, eg. in the
+file written by another process, is put into the stream as `RawJson`::
+
+    for chunk in iter_json({'data': {'execResult': read_json_file(path, delete=True)}}):
+        send(chunk)
+"""
+import collections.abc
+import os
+from typing import Any, Callable, Iterator, Mapping, Optional, Iterable, Union
+
+from bundle.utils.serializers import Serializer, Default, get_serializer
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class RawJson:
+    """
+    The chunks of an encoded json value, which are sent as they are
+    """
+    def __init__(self, chunks: Iterable[str]):
+        self.chunks = chunks
+
+
+def read_json_file(path: Union[str, os.PathLike], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   delete: bool = False) -> RawJson:
+    """
+    read the json in a file in chunks
+    @param path:
+    @param chunk_size: the size of the chunks, in characters
+    @param delete: whether the file is deleted once it's read
+    @return: the raw json, which is read when it's iterated
+    """
+    def iter_chunks() -> Iterator[str]:
+        try:
+            with open(path, encoding='utf-8') as file:
+                for chunk in iter(lambda: file.read(chunk_size), ''):
+                    yield chunk
+        finally:
+            if delete:
+                os.remove(path)
+
+    return RawJson(iter_chunks())
+
+
+def _encode_key(key: Any, encode: Callable[[Any], str]) -> str:
+    # the same as `json.dumps`, the keys which are not strings are converted to strings
+    return encode(key) if isinstance(key, str) else encode(encode(key))
+
+
+def _iter_pieces(value: Any, serializer: Serializer, default: Default) -> Iterator[str]:
+    def encode(item: Any) -> str:
+        return serializer.dumps(item, default)
+
+    if isinstance(value, RawJson):
+        yield from value.chunks
+    elif isinstance(value, Mapping):
+        yield '{'
+        for index, (key, item) in enumerate(value.items()):
+            if index:
+                yield serializer.item_separator
+            yield _encode_key(key, encode) + serializer.key_separator
+            yield from _iter_pieces(item, serializer, default)
+        yield '}'
+    elif isinstance(value, (list, tuple, collections.abc.Iterator)):
+        yield '['
+        for index, item in enumerate(value):
+            if index:
+                yield serializer.item_separator
+            # the items, ie. the records, are small enough to be encoded as a whole
+            yield encode(item)
+        yield ']'
+    else:
+        yield encode(value)
+
+
+def iter_json(value: Any, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              serializer: Optional[Serializer] = None, default: Default = None) -> Iterator[str]:
+    """
+    encode a value into json in chunks
+    @param value: the value, in which the iterators are encoded as arrays, and `RawJson` is put as it is
+    @param chunk_size: the size of the chunks, in characters, the last one may be smaller
+    @param serializer: the serializer of the items, the default one if it's `None`
+    @param default: the function converting the values which cannot be encoded, like `json.dumps`
+    @return: iterator of json chunks
+    """
+    buffer, size = [], 0
+    for piece in _iter_pieces(value, serializer or get_serializer(), default):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,242 @@
+"""
+loop-folded processed results
+
+A tight loop produces a long run of records whose lines repeat the same
+cycle, eg. `6, 7, 6, 7, ...`, while only a few variables change. In the
+loop-folded format, which is the version 3 of the result, such a run is
+folded into a loop block, which keeps the lines of one iteration, the
+number of iterations, the variables before the loop and the changes made
+in every step of every iteration. The other records are kept in the form
+of the version 1::
+
+    {
+        'version': 3,
+        'records': [
+            {'line': 5, 'variables': {'main#i': None, ...}},      # a record of the version 1
+            {'loop': {
+                'step': 1,                                        # the step of the first record in the loop
+                'lines': [6, 7],                                  # the lines of an iteration
+                'iterations': 100,
+                'state': {'main#i': None, ...},                   # the variables before the loop
+                'changes': [                                      # the changes of the steps in every iteration,
+                    [{'main#i': {...}}, None],                    # `None` if nothing happens in the step
+                    ...
+                ]
+            }},
+            {'line': 8, 'variables': {...}},
+            ...
+        ]
+    }
+
+Only the records in a row are folded, ie. a nested loop is folded as the
+inner loop, or as the outer one if every iteration of the outer loop runs
+the same lines. The records of the version 1 are restored by `LoopResult`
+on demand, which also tells the steps of the loop containing a step, so
+that a loop can be skipped.
+"""
+import bisect
+from typing import Mapping, Sequence, Iterator, List, Optional, Any, Dict, Tuple
+
+from bundle.utils.delta_result import get_changes
+
+LOOP_FORMAT_VERSION = 3
+# the maximum number of records in an iteration
+DEFAULT_MAX_PERIOD = 64
+# the minimum number of iterations of a folded loop
+DEFAULT_MIN_ITERATIONS = 3
+
+
+def find_loop(lines: Sequence[int], start: int,
+              max_period: int = DEFAULT_MAX_PERIOD,
+              min_iterations: int = DEFAULT_MIN_ITERATIONS) -> Tuple[int, int]:
+    """
+    find the repeated cycle of lines starting from a step, which covers the most steps
+    @param lines: the lines of the records
+    @param start: the first step of the cycle
+    @param max_period: the maximum length of the cycle
+    @param min_iterations: the minimum number of repetitions
+    @return: (the length of the cycle, the number of repetitions), (0, 0) if no cycle is found
+    """
+    best_period, best_iterations = 0, 0
+    length = len(lines)
+    first_line = lines[start]
+    for period in range(1, max_period + 1):
+        if start + period * min_iterations > length:
+            break
+        if lines[start + period] != first_line:
+            continue
+        template = lines[start:start + period]
+        iterations, position = 1, start + period
+        while lines[position:position + period] == template:
+            iterations += 1
+            position += period
+        # the shorter cycle is kept if they cover the same steps
+        if iterations >= min_iterations and period * iterations > best_period * best_iterations:
+            best_period, best_iterations = period, iterations
+    return best_period, best_iterations
+
+
+def iter_folded_records(records: Sequence[Mapping],
+                        max_period: int = DEFAULT_MAX_PERIOD,
+                        min_iterations: int = DEFAULT_MIN_ITERATIONS) -> Iterator[Mapping]:
+    """
+    fold the loops in processed records as a stream
+    @param records: the records of the version 1, see `Processor.generate_record_template`
+    @param max_period: the maximum number of records in an iteration
+    @param min_iterations: the minimum number of iterations of a folded loop
+    @return: iterator of the records of the version 1 and loop blocks
+    @raise ValueError: if the period is not positive or a loop has less than two iterations
+    """
+    if max_period < 1:
+        raise ValueError('the period of loops must be positive')
+    if min_iterations < 2:
+        raise ValueError('a loop has at least two iterations')
+
+    lines = [record['line'] for record in records]
+    state: Optional[Mapping[str, Any]] = None
+    step = 0
+    while step < len(records):
+        period, iterations = find_loop(lines, step, max_period, min_iterations)
+        if not iterations:
+            record = records[step]
+            if record['variables'] is not None:
+                state = record['variables']
+            yield record
+            step += 1
+            continue
+
+        loop_state, changes = state, []
+        for iteration_start in range(step, step + period * iterations, period):
+            iteration_changes = []
+            for record in records[iteration_start:iteration_start + period]:
+                variables = record['variables']
+                if variables is None:
+                    iteration_changes.append(None)
+                else:
+                    iteration_changes.append(get_changes(state, variables))
+                    state = variables
+            changes.append(iteration_changes)
+
+        yield {'loop': {
+            'step': step,
+            'lines': lines[step:step + period],
+            'iterations': iterations,
+            'state': loop_state,
+            'changes': changes
+        }}
+        step += period * iterations
+
+
+def encode_loops(records: Sequence[Mapping],
+                 max_period: int = DEFAULT_MAX_PERIOD,
+                 min_iterations: int = DEFAULT_MIN_ITERATIONS) -> dict:
+    """
+    fold the loops in processed records
+    @param records: the records of the version 1
+    @param max_period: the maximum number of records in an iteration
+    @param min_iterations: the minimum number of iterations of a folded loop
+    @return: the loop-folded result
+    """
+    return {
+        'version': LOOP_FORMAT_VERSION,
+        'records': list(iter_folded_records(records, max_period, min_iterations))
+    }
+
+
+class LoopResult:
+    """
+    The reader of a loop-folded result.
+
+    Usage::
+
+        result = LoopResult(encode_loops(processor.result))
+        result.get_record(100)   # the same as `processor.result[100]`
+        result.get_loop(100)     # the steps of the loop containing the step 100, eg. (90, 290)
+        list(result)             # the same as `processor.result`
+    """
+    def __init__(self, result: Mapping):
+        """
+        @param result: the loop-folded result
+        @raise ValueError: if the result is not in the loop-folded format
+        """
+        if result.get('version') != LOOP_FORMAT_VERSION:
+            raise ValueError(f'unsupported result version {result.get("version")}')
+        self.records: List[Mapping] = result['records']
+        # the first step of each record or loop
+        self._steps: List[int] = []
+        step = 0
+        for record in self.records:
+            self._steps.append(step)
+            step += self._size(record)
+        self._length: int = step
+
+    @staticmethod
+    def _size(record: Mapping) -> int:
+        loop = record.get('loop')
+        return len(loop['lines']) * loop['iterations'] if loop is not None else 1
+
+    def __len__(self) -> int:
+        return self._length
+
+    @staticmethod
+    def _expand(loop: Mapping, stop: Optional[int] = None) -> Iterator[dict]:
+        # the state is updated in place, which is a copy of the state before the loop
+        state: Optional[Dict[str, Any]] = dict(loop['state']) if loop['state'] is not None else None
+        lines = loop['lines']
+        count = 0
+        for iteration_changes in loop['changes']:
+            for line, changes in zip(lines, iteration_changes):
+                if stop is not None and count == stop:
+                    return
+                count += 1
+                if changes is None:
+                    yield {'line': line, 'variables': None}
+                    continue
+                if state is None:
+                    state = dict(changes)
+                else:
+                    state.update(changes)
+                yield {'line': line, 'variables': dict(state)}
+
+    def _locate(self, step: int) -> Tuple[int, int]:
+        if step < 0:
+            step += self._length
+        if not 0 <= step < self._length:
+            raise IndexError(f'step {step} out of range')
+        index = bisect.bisect_right(self._steps, step) - 1
+        return index, step - self._steps[index]
+
+    def get_record(self, step: int) -> dict:
+        """
+        restore a record of the version 1, the records in a loop before it are replayed
+        @param step: the index of the record
+        @return: the record
+        @raise IndexError: if the step is out of range
+        """
+        index, offset = self._locate(step)
+        record = self.records[index]
+        if 'loop' not in record:
+            return {'line': record['line'], 'variables': record['variables']}
+        *_, last = self._expand(record['loop'], offset + 1)
+        return last
+
+    def get_loop(self, step: int) -> Optional[Tuple[int, int]]:
+        """
+        get the steps of the loop containing a step
+        @param step: the index of the record
+        @return: (the first step of the loop, the step after the loop), `None` if the step is not in a loop
+        @raise IndexError: if the step is out of range
+        """
+        index, _ = self._locate(step)
+        record = self.records[index]
+        if 'loop' not in record:
+            return None
+        first_step = self._steps[index]
+        return first_step, first_step + self._size(record)
+
+    def __iter__(self) -> Iterator[dict]:
+        for record in self.records:
+            if 'loop' in record:
+                yield from self._expand(record['loop'])
+            else:
+                yield {'line': record['line'], 'variables': record['variables']}
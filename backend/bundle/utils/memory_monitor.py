@@ -0,0 +1,145 @@
+"""
+memory accounting of executions, with `tracemalloc` of the standard library
+"""
+import contextlib
+import os
+import tracemalloc
+from typing import Optional, Mapping, Any, Iterator, List
+
+from bundle.utils.recorder import Recorder
+
+# `tracemalloc.reset_peak` is new in Python 3.9
+_CAN_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+
+class MemoryMonitor:
+    """
+    The memory allocated while the traced code runs.
+
+    While the monitor is measuring, the allocations are traced by
+    `tracemalloc`, which makes the execution slower. The recorder lets
+    the monitor observe the traced memory whenever a step is traced (see
+    `Recorder.check_memory`), and stops the execution once the memory
+    exceeds `max_memory`. The allocation sites are taken from a snapshot
+    of the traces at the largest memory observed, since the objects of the
+    user's code are freed when it returns.
+
+    `tracemalloc.reset_peak` only exists since Python 3.9. On older
+    versions the peak of the process can't be reset, so the peak is the
+    largest memory observed by the monitor instead.
+
+    `tracemalloc` traces the whole process, so the executions measured at
+    the same time should run in different processes, eg. the pool of
+    `time_out_execute`.
+
+    Usage::
+
+        monitor = MemoryMonitor(recorder, max_memory=256 * 1024 * 1024, source_file=entry_file)
+        with monitor.measure():
+            main()
+
+        monitor.as_dict()
+    """
+    # the number of allocation sites in the summary
+    TOP_ALLOCATIONS = 10
+    # a new snapshot is taken when the memory grows by this factor since the last one
+    SNAPSHOT_GROWTH = 1.5
+    # the allocations of tracemalloc itself and of the import system are left out
+    EXCLUDED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>',
+                      '<frozen importlib._bootstrap_external>', '<unknown>')
+
+    def __init__(self, recorder: Recorder, max_memory: Optional[int] = None, source_file: Optional[str] = None):
+        """
+        @param recorder: the recorder of the execution, which lets the monitor observe the memory
+        @param max_memory: the limit of the memory allocated by the execution in bytes, `None` means no limit
+        @param source_file: the file of the user's code, whose allocations are counted as the user's
+        """
+        self.recorder = recorder
+        self.max_memory = max_memory
+        self.source_file = source_file
+        self.peak_memory: int = 0
+        self.current_memory: int = 0
+        self.user_memory: int = 0
+        self.top_allocations: List[Mapping[str, Any]] = []
+        self._baseline: int = 0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_memory: int = 0
+        self._observed_peak: int = 0
+
+    def observe(self) -> bool:
+        """
+        measure the memory allocated since the monitor starts, and take a snapshot if it grows
+        @return: whether the memory exceeds the limit
+        """
+        memory = tracemalloc.get_traced_memory()[0] - self._baseline
+        if memory > self._observed_peak:
+            self._observed_peak = memory
+        if memory > self._snapshot_memory * self.SNAPSHOT_GROWTH:
+            self._snapshot, self._snapshot_memory = tracemalloc.take_snapshot(), memory
+        return self.max_memory is not None and memory > self.max_memory
+
+    @contextlib.contextmanager
+    def measure(self) -> Iterator['MemoryMonitor']:
+        """
+        trace the allocations made in the `with` block
+        """
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        self._baseline, _ = tracemalloc.get_traced_memory()
+        self._snapshot, self._snapshot_memory = None, 0
+        self._observed_peak = 0
+        if _CAN_RESET_PEAK:
+            tracemalloc.reset_peak()
+        self.recorder.set_memory_monitor(self)
+        try:
+            yield self
+        finally:
+            self.recorder.set_memory_monitor(None)
+            current_memory, peak_memory = tracemalloc.get_traced_memory()
+            self.current_memory = max(current_memory - self._baseline, 0)
+            if _CAN_RESET_PEAK:
+                self.peak_memory = max(peak_memory - self._baseline, 0)
+            else:
+                # the peak of the process may be reached before the monitor starts
+                self.peak_memory = max(self._observed_peak, self.current_memory)
+            if self._snapshot is None or self.current_memory >= self._snapshot_memory:
+                self._snapshot = tracemalloc.take_snapshot()
+            self._summarize(self._snapshot)
+            self._snapshot = None
+            if started:
+                tracemalloc.stop()
+
+    def _summarize(self, snapshot: tracemalloc.Snapshot) -> None:
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, file_name) for file_name in self.EXCLUDED_FILES])
+        statistics = snapshot.statistics('lineno')
+        self.top_allocations = [{
+            # only the name of the file is kept, the folders of the server are not exposed
+            'file': os.path.basename(statistic.traceback[0].filename),
+            'line': statistic.traceback[0].lineno,
+            'bytes': statistic.size,
+            'count': statistic.count,
+        } for statistic in statistics[:self.TOP_ALLOCATIONS]]
+        if self.source_file is not None:
+            self.user_memory = sum(statistic.size for statistic in statistics
+                                   if statistic.traceback[0].filename == self.source_file)
+
+    def as_dict(self) -> Mapping[str, Any]:
+        """
+        summarize the memory of the execution, in bytes
+        @return:
+        """
+        store = self.recorder.store
+        exceeded_limit = self.recorder.exceeded_limit
+        return {
+            'peakBytes': self.peak_memory,
+            'currentBytes': self.current_memory,
+            # the memory held by the user's code when the largest memory is observed
+            'userBytes': self.user_memory,
+            'recorderBytes': self.recorder.memory_bytes,
+            'traceBytes': self.recorder.recorded_bytes,
+            'traceStoreBytes': store.size if store is not None else 0,
+            'maxBytes': self.max_memory,
+            'exceeded': exceeded_limit is not None and exceeded_limit.limit_name == Recorder.MEMORY_LIMIT_NAME,
+            'topAllocations': self.top_allocations,
+        }
@@ -1,22 +1,53 @@
 from copy import copy
 from random import randint
-from typing import Tuple, Mapping, List, Any, Iterable, MutableMapping, Optional, Set, Union
-import json
+from typing import Tuple, Mapping, List, Any, Iterable, MutableMapping, Optional, Union, Sequence, Iterator, Dict
 
 from bundle.GraphObjects.Edge import Edge
 from bundle.GraphObjects.Node import Node
+from bundle.utils.bounded_repr import bounded_repr
+from bundle.utils.delta_result import iter_delta_records, DELTA_FORMAT_VERSION
+from bundle.utils.json_stream import iter_json, DEFAULT_CHUNK_SIZE
+from bundle.utils.loop_folding import iter_folded_records, LOOP_FORMAT_VERSION
+from bundle.utils.serializers import Serializer, get_serializer
+from bundle.utils.recorder import Recorder
+from bundle.utils.trace_index import TraceIndex
+from bundle.utils.trace_store import RecordedValue, ContainerState
 
 
 def identifier_to_name(identifier: Tuple[str, str]) -> str:
     return '{}#{}'.format(*identifier)
 
 
+def group_by_step(steps: Sequence[int]) -> Iterator[Tuple[int, List[int]]]:
+    """
+    group the indices of a step column by steps
+    @param steps: a column of steps, which is mostly sorted
+    @return: iterator of (step, indices of the step) in the order of steps,
+             and the indices keep the order of insertion
+    """
+    indices = range(len(steps))
+    if any(steps[index] > steps[index + 1] for index in range(len(steps) - 1)):
+        indices = sorted(indices, key=steps.__getitem__)
+
+    group_step, group = None, []
+    for index in indices:
+        step = steps[index]
+        if step != group_step:
+            if group:
+                yield group_step, group
+            group_step, group = step, []
+        group.append(index)
+    if group:
+        yield group_step, group
+
+
 class Processor:
     COLOR_PALETTE = ["#A6CEE3", "#1F78B4", "#B2DF8A", "#33A02C",
                      "#FB9A99", "#E31A1C", "#FDBF6F", "#FF7F00",
                      "#CAB2D6", "#6A3D9A", "#FFFF99", ]
 
     ACCESSED_COLOR = "#B15928"
+    MUTATED_COLOR = "#D95F02"
     ACCESSED_IDENTIFIER = ('global', 'accessed var')
     ACCESSED_ID_NAME = identifier_to_name(ACCESSED_IDENTIFIER)
     """
@@ -25,17 +56,25 @@ class Processor:
     value will be set to none.
     """
 
-    def __init__(self, variable_number_limit: int = 10):
+    def __init__(self, variable_number_limit: int = 10, serializer: Optional[Serializer] = None):
+        """
+        @param variable_number_limit: the number of variables which can be watched
+        @param serializer: the serializer of the result json, the fastest one installed if it's `None`
+        """
         self.variable_number_limit = variable_number_limit
+        self.serializer: Serializer = serializer or get_serializer()
         self._no_limit = False
         self.variable_color_map: dict = {}
         self.result: List[MutableMapping] = []
         self.result_json: Optional[str] = None
+        self.trace_index: Optional[TraceIndex] = None
+        # the operations on traced containers which are not rendered yet, by container ids
+        self._container_operations: Dict[int, List[Tuple[int, list]]] = {}
 
     def _no_limit_override(self, flag: bool) -> None:
         self._no_limit = flag
 
-    def load_variables_and_create_color_map(self, variables: Set[Tuple[str, str]]) -> None:
+    def load_variables_and_create_color_map(self, variables: Sequence[Tuple[str, str]]) -> None:
         if len(variables) > self.variable_number_limit and not self._no_limit:
             raise AssertionError('The number of variable input cannot exceed {}!'.format(self.variable_number_limit))
 
@@ -57,7 +96,7 @@ class Processor:
             color_list.append(hex_color)
         return color_list
 
-    def create_color_map(self, variables: Set[Tuple[str, str]]) -> None:
+    def create_color_map(self, variables: Sequence[Tuple[str, str]]) -> None:
         diff = len(variables) - len(self.COLOR_PALETTE)
         if diff > 0:
             Processor.generate_hex_list(diff, self.COLOR_PALETTE)
@@ -68,16 +107,186 @@ class Processor:
     def get_result_json(self) -> str:
         return self.result_json
 
-    def generate_result_json(self) -> None:
-        self.result_json = json.dumps(self.result)
+    @staticmethod
+    def _encode_result(records: Iterable[MutableMapping], keyframe_interval: Optional[int], fold_loops: bool) -> Any:
+        # the records are encoded while they are produced
+        if keyframe_interval is not None and fold_loops:
+            raise ValueError('a result is either delta-encoded or loop-folded')
+        if keyframe_interval is not None:
+            return {
+                'version': DELTA_FORMAT_VERSION,
+                'keyframeInterval': keyframe_interval,
+                'records': iter_delta_records(records, keyframe_interval)
+            }
+        if fold_loops:
+            # the loops are found by looking ahead, so the records are kept
+            return {
+                'version': LOOP_FORMAT_VERSION,
+                'records': iter_folded_records(records if isinstance(records, Sequence) else list(records))
+            }
+        return records
+
+    def generate_result_json(self, keyframe_interval: Optional[int] = None, fold_loops: bool = False) -> None:
+        """
+        dump the result into json
+        @param keyframe_interval: the interval of keyframes if the result is delta-encoded, see `delta_result`,
+                                  `None` means the records carry all the variables
+        @param fold_loops: whether the loops are folded, see `loop_folding`
+        @return: None
+        @raise ValueError: if the result is both delta-encoded and loop-folded
+        """
+        self.result_json = ''.join(self.iter_result_json(keyframe_interval, fold_loops=fold_loops))
+
+    def iter_result_json(self, keyframe_interval: Optional[int] = None,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE, fold_loops: bool = False) -> Iterator[str]:
+        """
+        encode the result into json step by step, without the whole json string in memory
+        @param keyframe_interval: the interval of keyframes if the result is delta-encoded, see `delta_result`,
+                                  `None` means the records carry all the variables
+        @param chunk_size: the size of the chunks, in characters
+        @param fold_loops: whether the loops are folded, see `loop_folding`
+        @return: iterator of json chunks, which are joined into the same json as `generate_result_json`
+        @raise ValueError: if the result is both delta-encoded and loop-folded
+        """
+        return iter_json(self._encode_result(self.result, keyframe_interval, fold_loops), chunk_size, self.serializer)
+
+    def iter_recorder_json(self, recorder: Recorder, keyframe_interval: Optional[int] = None,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE, fold_loops: bool = False,
+                           trace_index: bool = False) -> Iterator[str]:
+        """
+        process the records of a recorder and encode them into json as a stream, without keeping the result
+        @param recorder:
+        @param keyframe_interval: the interval of keyframes if the result is delta-encoded, see `delta_result`,
+                                  `None` means the records carry all the variables
+        @param chunk_size: the size of the chunks, in characters
+        @param fold_loops: whether the loops are folded, see `loop_folding`, which keeps the records to find them
+        @param trace_index: whether the records are indexed into `trace_index`, which is complete once
+                            the iterator is exhausted
+        @return: iterator of json chunks, which are joined into the json of the result of `load_data`
+        @raise ValueError: if the result is both delta-encoded and loop-folded
+        """
+        records = self.iter_records(recorder)
+        if trace_index:
+            self.trace_index = TraceIndex()
+            records = self.trace_index.iter_indexed(records)
+        return iter_json(self._encode_result(records, keyframe_interval, fold_loops), chunk_size, self.serializer)
+
+    def generate_trace_index(self) -> TraceIndex:
+        """
+        index the lines, the variable changes and the graph element accesses of the result
+        @return: the index, see `trace_index`
+        """
+        self.trace_index = TraceIndex.from_records(self.result)
+        return self.trace_index
 
-    def load_data(self, change_list: List[Mapping], variables: Set[Tuple[str, str]]) -> object:
+    def _init_record_mapping(self, variables: Sequence[Tuple[str, str]]) -> MutableMapping[str, Any]:
         self.load_variables_and_create_color_map(variables=variables)
+        return self._empty_record_mapping(variables)
 
+    @classmethod
+    def _empty_record_mapping(cls, variables: Sequence[Tuple[str, str]]) -> MutableMapping[str, Any]:
         # init the mapping with None values, indicating at the beginning of the program nothing is initialized
-        record_mapping: MutableMapping[str, Any] = {self.ACCESSED_ID_NAME: None}
+        record_mapping: MutableMapping[str, Any] = {cls.ACCESSED_ID_NAME: None}
         record_mapping.update(zip([identifier_to_name(var) for var in variables], [None] * len(variables)))
+        return record_mapping
+
+    def _fill_initial_states(self, init_mapping: MutableMapping[str, Any]) -> None:
+        # insert
+        if self.result and self.result[0]['variables'] is None:
+            self.result[0]['variables'] = init_mapping
+
+    def iter_data(self, recorder: Recorder) -> Iterator[MutableMapping]:
+        """
+        process the records of a recorder as a stream, including the ones spilled into its trace store
 
+        Different from `load_data`, the result is not kept, and the variables of the first record
+        are not filled with the initial states if nothing happens in it.
+        @param recorder:
+        @return: iterator of processed records
+        """
+        identifiers = recorder.identifiers
+        record_mapping = self._init_record_mapping(identifiers)
+        self._container_operations = {}
+
+        for chunk in recorder.iter_chunks():
+            vc_variable_ids, vc_values, ac_values = chunk.vc_variable_ids, chunk.vc_values, chunk.ac_values
+            ac_kinds = chunk.ac_kinds or [Recorder.VALUE_ACCESS] * len(ac_values)
+            vc_groups = group_by_step(chunk.vc_steps)
+            ac_groups = group_by_step(chunk.ac_steps)
+            vc_step, vc_indices = next(vc_groups, (None, None))
+            ac_step, ac_indices = next(ac_groups, (None, None))
+
+            for step, line in enumerate(chunk.lines, start=chunk.step_offset):
+                variable_changes = None
+                if vc_step == step:
+                    variable_changes = [(identifiers[vc_variable_ids[index]], vc_values[index])
+                                        for index in vc_indices]
+                    vc_step, vc_indices = next(vc_groups, (None, None))
+
+                accessed_variables = access_kinds = None
+                if ac_step == step:
+                    accessed_variables, access_kinds = [], []
+                    for index in ac_indices:
+                        if ac_kinds[index] == Recorder.CONTAINER_DELTA:
+                            # the operations are collected before the states of the containers are resolved
+                            self.add_container_delta(ac_values[index])
+                        else:
+                            accessed_variables.append(ac_values[index])
+                            access_kinds.append(ac_kinds[index])
+                    if not accessed_variables:
+                        accessed_variables = access_kinds = None
+                    ac_step, ac_indices = next(ac_groups, (None, None))
+
+                yield self.generate_record_template(
+                    record_mapping=record_mapping,
+                    line=line,
+                    variable_changes=variable_changes,
+                    accessed_variables=accessed_variables,
+                    access_kinds=access_kinds
+                )
+
+    def iter_records(self, recorder: Recorder) -> Iterator[MutableMapping]:
+        """
+        process the records of a recorder as a stream, which are the same as the result of `load_data`
+        @param recorder:
+        @return: iterator of processed records
+        """
+        records = self.iter_data(recorder)
+        first_record = next(records, None)
+        if first_record is None:
+            return
+        if first_record['variables'] is None:
+            first_record['variables'] = self._empty_record_mapping(recorder.identifiers)
+        yield first_record
+        yield from records
+
+    def load_data(self, data: Union[Recorder, List[Mapping]],
+                  variables: Optional[Sequence[Tuple[str, str]]] = None) -> List[MutableMapping]:
+        """
+        process the columns of a recorder, or the records in the format of a list (see `load_change_list`)
+        @param data: the recorder, or the records
+        @param variables: the variable identifiers, only needed by the records in the format of a list
+        @return: the processed result
+        @raise ValueError: if the records in the format of a list come without their variables
+        """
+        if not isinstance(data, Recorder):
+            if variables is None:
+                raise ValueError('the variables of the change list are not given')
+            return self.load_change_list(data, variables)
+
+        self.result.extend(self.iter_data(data))
+        self._fill_initial_states(self._empty_record_mapping(data.identifiers))
+
+        return self.result
+
+    def load_change_list(self, change_list: List[Mapping], variables: Sequence[Tuple[str, str]]) -> object:
+        """
+        process records in the format of a list containing dictionaries
+        @param change_list: the records, see `Recorder.changes`
+        @param variables: the variable identifiers
+        @return: the processed result
+        """
+        record_mapping = self._init_record_mapping(variables)
         init_mapping = copy(record_mapping)
 
         # append it in the first item of the list?
@@ -87,21 +296,20 @@ class Processor:
                 self.generate_record_template(
                     record_mapping=record_mapping,
                     line=mapping['line'],
-                    variable_changes=mapping['variables'],
+                    variable_changes=mapping['variables'].items() if mapping['variables'] is not None else None,
                     accessed_variables=mapping['accesses']
                 ))
 
-        # insert
-        if self.result and self.result[0]['variables'] is None:
-            self.result[0]['variables'] = init_mapping
+        self._fill_initial_states(init_mapping)
 
         return self.result
 
     def generate_record_template(self,
                                  record_mapping: MutableMapping[str, Any],
                                  line: int,
-                                 variable_changes: Mapping[Tuple[str, str], Any],
-                                 accessed_variables: List) -> MutableMapping:
+                                 variable_changes: Optional[Iterable[Tuple[Tuple[str, str], Any]]],
+                                 accessed_variables: Optional[List],
+                                 access_kinds: Optional[Sequence[int]] = None) -> MutableMapping:
         """
         the result will be::
 
@@ -120,44 +328,106 @@ class Processor:
 
         :param record_mapping:
         :param line:
-        :param variable_changes:
+        :param variable_changes: (identifier, value) pairs in the order they are made
         :param accessed_variables:
+        :param access_kinds: the kinds of the accesses, all of them are values if it's None
         :return:
         """
 
         if variable_changes is None and accessed_variables is None:
             return {'line': line, 'variables': None}
 
-        if isinstance(variable_changes, Mapping):
+        if variable_changes is not None:
             # only update the changes by looping through variable change list
-            for key, value in variable_changes.items():
+            for key, value in variable_changes:
                 record_mapping[identifier_to_name(key)] = self.resolve_variable(key, value)
 
-        record_mapping[self.ACCESSED_ID_NAME] = self.resolve_accessed(accessed_variables=accessed_variables)
+        record_mapping[self.ACCESSED_ID_NAME] = self.resolve_accessed(accessed_variables=accessed_variables,
+                                                                      access_kinds=access_kinds)
 
         # only save a copy of the dict or all the `variables` will point to one thing
         return {'line': line, 'variables': copy(record_mapping)}
 
     def resolve_variable(self, name: Tuple[str, str], value: Any) -> Union[str, Mapping]:
-        representation = repr(value)
+        if isinstance(value, ContainerState):
+            return self.process_containers(value, name)
+
+        if isinstance(value, RecordedValue):
+            # the value is frozen when it's spilled into the trace store
+            representation, element_id = value
+        else:
+            representation = bounded_repr.repr(value)
+            element_id = value.identity if isinstance(value, (Node, Edge)) else None
+
         # TODO use graph elements' parent class
         # TODO add `displayed` properties to var obj
-        if isinstance(value, (Node, Edge)):
+        if element_id is not None:
             # TODO create an interface here. Using str and dict is not a long-term solution
-            variable_value = self.process_graph_elements(value, representation, name)
+            variable_value = self.process_graph_elements(element_id, representation, name)
         else:
             variable_value = self.process_normal_variables(representation)
 
         return variable_value
 
-    def process_graph_elements(self, element: Union[Node, Edge], representation: str, name: Tuple[str, str]) -> dict:
+    def process_graph_elements(self, element_id: str, representation: str, name: Tuple[str, str]) -> dict:
         return {
                 'type': 'graph_element',
-                'id': element.identity,
+                'id': element_id,
                 'color': self.variable_color_map[name],
                 'repr': representation
             }
 
+    def add_container_delta(self, delta: Sequence) -> None:
+        """
+        collect an operation on a traced container, which is rendered with the next state of the container
+        @param delta: (container id, version after the operation, operation, *arguments)
+        @return: None
+        """
+        container_id, version, *operation = delta
+        self._container_operations.setdefault(container_id, []).append((version, operation))
+
+    def process_containers(self, state: ContainerState, name: Tuple[str, str]) -> dict:
+        """
+        render the state of a traced container with the operations made since its last state, ie.::
+
+            {
+                'type': 'container',
+                'container': 'list',
+                'id': 3,
+                'color': '#123456',
+                'size': 2,
+                'version': 5,
+                'operations': [['append', "'a'"], ['pop', 0]]
+            }
+
+        When the container is observed for the first time, the operations
+        are replaced by a `reset` containing all the items.
+        @param state:
+        @param name:
+        @return:
+        """
+        pending = self._container_operations.get(state.container_id, [])
+        # the operations made after the state is taken are left for the next state
+        split = 0
+        while split < len(pending) and pending[split][0] <= state.version:
+            split += 1
+        self._container_operations[state.container_id] = pending[split:]
+
+        if state.items is not None:
+            operations = [['reset', *state.items]]
+        else:
+            operations = [operation for _, operation in pending[:split]]
+
+        return {
+            'type': 'container',
+            'container': state.kind,
+            'id': state.container_id,
+            'color': self.variable_color_map[name],
+            'size': state.size,
+            'version': state.version,
+            'operations': operations
+        }
+
     @staticmethod
     def process_normal_variables(representation: str) -> dict:
         return {
@@ -166,17 +436,41 @@ class Processor:
         }
 
     @classmethod
-    def resolve_accessed(cls, accessed_variables) -> Optional[List]:
+    def resolve_accessed(cls, accessed_variables, access_kinds: Optional[Sequence[int]] = None) -> Optional[List]:
+        """
+        resolve the accesses of a step. An element accessed more than once in
+        a step is listed once, and it's colored as mutated if it's ever mutated.
+        @param accessed_variables: the accessed values, or the ids of graph elements
+        @param access_kinds: the kinds of the accesses, all of them are values if it's None
+        @return: the resolved accesses
+        """
         if isinstance(accessed_variables, Iterable):
             record = []
-            for element in accessed_variables:
-                if isinstance(element, (Node, Edge)):
+            # the positions of the element accesses in the record
+            element_positions = {}
+            if access_kinds is None:
+                access_kinds = [Recorder.VALUE_ACCESS] * len(accessed_variables)
+            for element, kind in zip(accessed_variables, access_kinds):
+                if kind != Recorder.VALUE_ACCESS:
+                    color = cls.MUTATED_COLOR if kind == Recorder.ELEMENT_MUTATION else cls.ACCESSED_COLOR
+                    if element not in element_positions:
+                        element_positions[element] = len(record)
+                        record.append({'id': element, 'color': color})
+                    elif kind == Recorder.ELEMENT_MUTATION:
+                        record[element_positions[element]]['color'] = color
+                    continue
+                if isinstance(element, RecordedValue):
+                    variable_value = {
+                        'id': element.element_id,
+                        'color': cls.ACCESSED_COLOR
+                    } if element.element_id is not None else element.repr
+                elif isinstance(element, (Node, Edge)):
                     variable_value = {
                         'id': element.identity,
                         'color': cls.ACCESSED_COLOR
                     }
                 else:
-                    variable_value = repr(element)
+                    variable_value = bounded_repr.repr(element)
                 record.append(variable_value)
 
             return record
@@ -186,3 +480,5 @@ class Processor:
         self.variable_color_map: dict = {}
         self.result = []
         self.result_json = None
+        self.trace_index = None
+        self._container_operations = {}
@@ -1,10 +1,187 @@
-from typing import Tuple, Any, List, Set
+import bisect
+import sys
+from array import array
+from typing import Tuple, Any, List, Optional, Mapping, Iterable, Dict, Iterator, MutableMapping, Sequence, \
+    Set, TYPE_CHECKING
+
+from bundle.utils.trace_store import TraceStore, TraceChunk, RecordedValue
+
+if TYPE_CHECKING:
+    from bundle.utils.memory_monitor import MemoryMonitor
+
+
+class RecordLimitExceeded(BaseException):
+    """
+    Raised when a recorder runs out of its step or size budget, or the execution runs out of memory.
+
+    It derives from `BaseException` instead of `Exception`, so that
+    a broad `except Exception` in user code cannot swallow it and keep
+    a runaway program running.
+    """
+    def __init__(self, message: str, limit_name: str, limit: int):
+        super().__init__(message)
+        self.limit_name = limit_name
+        self.limit = limit
+
+
+class RecordingPolicy:
+    """
+    A recording policy decides which steps are kept by a recorder.
+
+    The variable changes made in the skipped steps are not lost. They are
+    carried to the next recorded step, so the variable states of the
+    recorded steps stay consistent. The base policy records everything.
+    """
+    # whether the steps without variable changes and accesses are kept
+    keep_unchanged: bool = True
+
+    def should_record(self, line_no: int, step: int) -> bool:
+        """
+        decide whether a step should be recorded
+        @param line_no: the line number of the step
+        @param step: the index of the step among all the traced steps
+        @return: whether the step should be recorded
+        """
+        return True
+
+
+class BreakpointPolicy(RecordingPolicy):
+    """Only record the steps on the given lines"""
+    def __init__(self, breakpoints: Iterable[int]):
+        self.breakpoints = frozenset(breakpoints)
+
+    def should_record(self, line_no: int, step: int) -> bool:
+        return line_no in self.breakpoints
+
+
+class SamplingPolicy(RecordingPolicy):
+    """Record every n-th step"""
+    def __init__(self, interval: int):
+        if interval < 1:
+            raise ValueError(f'The sampling interval must be positive. You gave {interval}')
+        self.interval = interval
+
+    def should_record(self, line_no: int, step: int) -> bool:
+        return step % self.interval == 0
+
+
+class ChangePolicy(RecordingPolicy):
+    """Only keep the steps in which watched variables change or elements are accessed"""
+    keep_unchanged = False
+
+
+class _StepVariables(MutableMapping):
+    """
+    Dict-like view of the variable changes recorded in one step.
+
+    Items are written through to the columns of the recorder.
+    """
+    def __init__(self, recorder: 'Recorder', step: int):
+        self._recorder = recorder
+        self._step = step
+
+    def _items(self) -> Dict[Tuple[str, str], Any]:
+        return dict(self._recorder.iter_step_variable_changes(self._step))
+
+    def __getitem__(self, identifier: Tuple[str, str]) -> Any:
+        return self._items()[identifier]
+
+    def __setitem__(self, identifier: Tuple[str, str], value: Any) -> None:
+        self._recorder.add_vc_to_step(self._step, identifier, value)
+
+    def __delitem__(self, identifier: Tuple[str, str]) -> None:
+        raise TypeError('Recorded variable changes cannot be deleted')
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(self._items())
+
+    def __len__(self) -> int:
+        return len(self._items())
+
+    def __repr__(self):
+        return repr(self._items())
+
+
+class _StepAccesses(Sequence):
+    """
+    List-like view of the accesses recorded in one step.
+
+    New accesses can be appended, and they are written through to the
+    columns of the recorder.
+    """
+    def __init__(self, recorder: 'Recorder', step: int):
+        self._recorder = recorder
+        self._step = step
+
+    def _items(self) -> List:
+        return list(self._recorder.iter_step_accesses(self._step))
+
+    def __getitem__(self, index):
+        return self._items()[index]
+
+    def __len__(self) -> int:
+        return len(self._items())
+
+    def append(self, access: Any) -> None:
+        self._recorder.add_ac_to_step(self._step, access)
+
+    def __eq__(self, other):
+        return self._items() == list(other)
+
+    def __repr__(self):
+        return repr(self._items())
 
 
 class Recorder:
     """
-    The recoder is used to record variable changes in each step
-    the format is a list containing dictionaries::
+    The recoder is used to record the line, variable changes and accesses in each step.
+
+    The records are stored in columns rather than one dictionary per step::
+
+        lines           = array('i', [20, 18, ...])         # the line of each step
+        vc_steps        = array('i', [0, 0, 1, ...])        # the step of each variable change
+        vc_variable_ids = array('i', [0, 1, 1, ...])        # the interned variable of each change
+        vc_values       = [value, value, value, ...]        # the value of each change
+        ac_steps        = array('i', [0, 1, 1, ...])        # the step of each access
+        ac_kinds        = array('b', [0, 1, 2, ...])        # the kind of each access
+        ac_values       = [obj2, 'n1', 'e3', ...]           # what's accessed
+
+    A variable identifier `(name_space, variable_name)` is interned to its
+    index in `identifiers`, so a change costs three appends instead of a dict.
+    The step columns are sorted, so the changes of a step are found by a
+    binary search, and the changes of one step are stored in the order they
+    are made.
+
+    An access is either a value returned by a function wrapped by
+    `Tracer.look_at` (`VALUE_ACCESS`), or the id of a graph element whose
+    properties are read (`ELEMENT_ACCESS`) or written (`ELEMENT_MUTATION`),
+    which is recorded automatically when the graph elements are used.
+    The operations on traced containers (see `bundle.seeker.containers`)
+    are also kept in the access columns as `CONTAINER_DELTA`, whose value
+    is `(container id, version, operation, *arguments)`. They are not
+    accesses, so they are left out of the views of accesses. Only the
+    operations on the containers in `observed_containers` are recorded,
+    since the items of a container are recorded when this recorder
+    observes it for the first time.
+
+    If a trace store is set, the old steps are spilled into it once the
+    estimated size of the in-memory records exceeds the threshold of the
+    store. The steps in the step columns are always global, and `lines[0]`
+    is the line of step `step_offset`. Only the in-memory steps can be
+    looked up by `get_last_record` and the other views, while `iter_chunks`
+    walks all the steps.
+
+    If `freeze_values` is set, the tracers record the changed values and
+    the accessed values as `RecordedValue`, built from the reprs computed
+    while tracing, instead of copies. The processor uses the reprs as they
+    are, so the values are not represented twice and the recorder holds no
+    references to the objects of the traced program.
+
+    If `recording` is unset, nothing is recorded and the tracers skip the
+    variables and the log, eg. when the lines are only profiled.
+
+    The previous format, a list containing dictionaries, is still available
+    through `changes`, but it is built on demand::
 
         [
             {
@@ -24,11 +201,180 @@ class Recorder:
             ...
         ]
     """
-    def __init__(self):
-        self.changes: List[dict] = []
-        self.variables: Set[Tuple[str, str]] = set()
+    STEP_LIMIT_NAME = 'steps'
+    SIZE_LIMIT_NAME = 'bytes'
+    MEMORY_LIMIT_NAME = 'memory'
+    # rough size of a step, ie. a line number and the column items of a few changes
+    RECORD_SIZE = 4 * array('i').itemsize + 2 * sys.getsizeof(0)
+    # the step of the changes made in the skipped steps which have not been assigned a recorded step
+    PENDING_STEP = -1
+    # the number of latest steps kept in memory when spilling, since the last two steps
+    # still receive changes and the one before them may be dropped by the policy
+    KEPT_STEPS = 3
+    # the kinds of accesses
+    VALUE_ACCESS = 0
+    ELEMENT_ACCESS = 1
+    ELEMENT_MUTATION = 2
+    CONTAINER_DELTA = 3
+
+    def __init__(self, max_steps: Optional[int] = None, max_bytes: Optional[int] = None,
+                 policy: Optional[RecordingPolicy] = None, freeze_values: bool = False, recording: bool = True):
+        self.identifiers: List[Tuple[str, str]] = []
+        self.identifier_ids: Dict[Tuple[str, str], int] = {}
+        self._init_columns()
+        self.max_steps: Optional[int] = max_steps
+        self.max_bytes: Optional[int] = max_bytes
+        self.recorded_bytes: int = 0
+        self.exceeded_limit: Optional[RecordLimitExceeded] = None
+        # the monitor of the memory traced by `tracemalloc`, which is checked when a step is traced
+        self.memory_monitor: Optional['MemoryMonitor'] = None
+        self.policy: Optional[RecordingPolicy] = policy
+        self.store: Optional[TraceStore] = None
+        self.freeze_values: bool = freeze_values
+        self.recording: bool = recording
+        self._init_event_states()
+
+    def _init_columns(self) -> None:
+        # the global step of `lines[0]`, ie. the number of spilled steps
+        self.step_offset: int = 0
+        self.memory_bytes: int = 0
+        self.lines: array = array('i')
+        self.vc_steps: array = array('i')
+        self.vc_variable_ids: array = array('i')
+        self.vc_values: List[Any] = []
+        self.ac_steps: array = array('i')
+        self.ac_kinds: array = array('b')
+        self.ac_values: List[Any] = []
+
+    def _init_event_states(self) -> None:
+        self.step_count: int = 0
+        # the steps of the last two traced events, `PENDING_STEP` if the event is skipped by the policy
+        self._last_event_step: int = self.PENDING_STEP
+        self._previous_event_step: int = self.PENDING_STEP
+        # the changes of skipped steps which are carried to the next recorded step
+        self._pending_vcs: List[Tuple[int, Any]] = []
+        self._pending_acs: List[Tuple[int, Any]] = []
+        # the ids of the traced containers whose items are recorded, see `TracedContainer.get_state`
+        self.observed_containers: Set[int] = set()
+
+    def set_limits(self, max_steps: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        """Set the budget of this recorder
+
+        Once a budget is used up, the recorder raises `RecordLimitExceeded`
+        and refuses to record anything else. The records made before that
+        are kept, so they still form a valid (truncated) trace.
+        @param max_steps: the maximum number of records, `None` means no limit
+        @param max_bytes: the maximum estimated size of the records, `None` means no limit
+        """
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+
+    def set_memory_monitor(self, monitor: Optional['MemoryMonitor']) -> None:
+        """
+        set the monitor of the memory, `None` means the memory is not checked
+        @param monitor:
+        """
+        self.memory_monitor = monitor
+
+    def check_memory(self) -> None:
+        """
+        let the memory monitor measure the memory
+        @raise RecordLimitExceeded: if the memory exceeds the limit of the monitor
+        """
+        if self.memory_monitor.observe():
+            max_memory = self.memory_monitor.max_memory
+            self._exceed(self.MEMORY_LIMIT_NAME, max_memory,
+                         f'The execution is stopped since it uses more than {max_memory} bytes of memory.')
+
+    def set_policy(self, policy: Optional[RecordingPolicy]) -> None:
+        """
+        set the default recording policy, `None` means recording every step
+        @param policy:
+        """
+        self.policy = policy
+
+    def set_store(self, store: Optional[TraceStore]) -> None:
+        """
+        set the trace store into which the old steps are spilled, `None` means keeping everything in memory
+        @param store: an empty store
+        """
+        self.store = store
+
+    def set_freeze_values(self, flag: bool) -> None:
+        """
+        set whether the values are recorded as their reprs rather than copies
+        @param flag:
+        """
+        self.freeze_values = flag
+
+    def set_recording(self, flag: bool) -> None:
+        """
+        set whether anything is recorded
+        @param flag:
+        """
+        self.recording = flag
+
+    def _exceed(self, limit_name: str, limit: int, message: Optional[str] = None) -> None:
+        self.exceeded_limit = RecordLimitExceeded(
+            message or f'The execution is stopped since it exceeds the limit of {limit} recorded {limit_name}.',
+            limit_name, limit
+        )
+        raise self.exceeded_limit
+
+    def _account(self, size: int) -> None:
+        """
+        count the size of a new record item against the size budget
+        @param size: the estimated size of the new item
+        @raise RecordLimitExceeded: if the size budget is used up
+        """
+        if self.exceeded_limit:
+            raise self.exceeded_limit
+        if self.max_bytes is not None and self.recorded_bytes + size > self.max_bytes:
+            self._exceed(self.SIZE_LIMIT_NAME, self.max_bytes)
+        self.recorded_bytes += size
+        self.memory_bytes += size
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        # a frozen value is mostly its repr
+        if isinstance(value, RecordedValue):
+            return sys.getsizeof(value) + sys.getsizeof(value.repr)
+        return sys.getsizeof(value)
+
+    @property
+    def is_truncated(self) -> bool:
+        return self.exceeded_limit is not None
+
+    def get_summary(self) -> Mapping[str, Any]:
+        """
+        summarize the records
+        @return: the number of steps, the estimated size and the reason of truncation
+        """
+        return {
+            'steps': self.step_number,
+            'tracedSteps': self.step_count,
+            'recordedBytes': self.recorded_bytes,
+            'truncated': self.is_truncated,
+            'truncationReason': str(self.exceeded_limit) if self.exceeded_limit else None
+        }
 
-    def register_variable(self, identifier: Tuple[str, str]) -> None:
+    @property
+    def step_number(self) -> int:
+        """
+        the number of recorded steps, including the spilled ones
+        @return:
+        """
+        return self.step_offset + len(self.lines)
+
+    @property
+    def variables(self) -> List[Tuple[str, str]]:
+        """
+        the registered variables, in the order of registration
+        @return: the variable identifiers
+        """
+        return self.identifiers
+
+    def register_variable(self, identifier: Tuple[str, str]) -> int:
         """Register a variable
 
         a variable is identified by a identifier, which is
@@ -37,64 +383,241 @@ class Recorder:
         variable is created. The second string is the variable
         name.
         @param identifier:
-        @return:
+        @return: the interned id of the variable
         """
-        self.variables.add(identifier)
+        try:
+            return self.identifier_ids[identifier]
+        except KeyError:
+            variable_id = self.identifier_ids[identifier] = len(self.identifiers)
+            self.identifiers.append(identifier)
+            return variable_id
 
     # TODO test this
-    def add_record(self, line_no: int = -1) -> None:
+    def add_record(self, line_no: int = -1, policy: Optional[RecordingPolicy] = None) -> None:
         """
         add a record to the change list
         name clarification:
                             - @keyword variables: means variable changes
                             - @keyword accesses: means access changes
         @param line_no: the line number
+        @param policy: the recording policy of this step, the default policy is used if it is `None`
+        @raise RecordLimitExceeded: if the step or size budget is used up
         """
-        self.changes.append({'line': line_no, 'variables': None, 'accesses': None})
+        if self.memory_monitor is not None:
+            self.check_memory()
+        if not self.recording:
+            return
+        policy = policy or self.policy
+        step = self.step_count
+        self.step_count += 1
 
-    def get_last_record(self) -> dict:
+        if policy is not None and not policy.should_record(line_no, step):
+            self._previous_event_step, self._last_event_step = self._last_event_step, self.PENDING_STEP
+            return
+
+        if self.max_steps is not None and self.step_number >= self.max_steps:
+            self._exceed(self.STEP_LIMIT_NAME, self.max_steps)
+        self._account(self.RECORD_SIZE)
+
+        self.lines.append(line_no)
+        if self._pending_vcs or self._pending_acs:
+            self._flush_pending(self.step_number - 1)
+
+        if policy is not None and not policy.keep_unchanged:
+            self._drop_if_unchanged(self._previous_event_step)
+
+        self._previous_event_step, self._last_event_step = self._last_event_step, self.step_number - 1
+
+        if self.store is not None and self.memory_bytes > self.store.threshold:
+            self._spill()
+
+    def _flush_pending(self, step: int) -> None:
+        for variable_id, value in self._pending_vcs:
+            self.vc_steps.append(step)
+            self.vc_variable_ids.append(variable_id)
+            self.vc_values.append(value)
+        for kind, access in self._pending_acs:
+            self.ac_steps.append(step)
+            self.ac_kinds.append(kind)
+            self.ac_values.append(access)
+        self._pending_vcs = []
+        self._pending_acs = []
+
+    # the changes are appended in the order of steps, except that the changes of
+    # the previous step may come after the ones of the last step, which are put
+    # before them. So the columns stay sorted, and only their tail has to be
+    # checked when the latest steps are concerned.
+
+    @staticmethod
+    def _insert_position(steps: array, step: int) -> int:
+        # the changes of a step are put after the ones already made in it
+        if not steps or steps[-1] <= step:
+            return len(steps)
+        return bisect.bisect_right(steps, step)
+
+    @staticmethod
+    def _tail_contains(steps: array, step: int) -> bool:
+        for index in range(len(steps) - 1, -1, -1):
+            if steps[index] == step:
+                return True
+            if steps[index] < step - 1:
+                return False
+        return False
+
+    @staticmethod
+    def _shift_tail(steps: array, step: int) -> None:
+        for index in range(len(steps) - 1, -1, -1):
+            if steps[index] > step:
+                steps[index] -= 1
+            elif steps[index] < step - 1:
+                break
+
+    def _drop_if_unchanged(self, step: int) -> None:
         """
-        get the last record
-        @return: the last record
+        remove a step without changes. The step must not receive
+        changes anymore, ie. it's older than the previous step
+        @param step:
         """
-        return self.changes[-1]
+        # the step is followed by the previous and the last steps
+        if step == self.PENDING_STEP or step != self.step_number - 3 or step < self.step_offset:
+            return
+        if self._tail_contains(self.vc_steps, step) or self._tail_contains(self.ac_steps, step):
+            return
 
-    def get_previous_record(self) -> dict:
-        """Get the second last record in the record list
+        del self.lines[step - self.step_offset]
+        self._shift_tail(self.vc_steps, step)
+        self._shift_tail(self.ac_steps, step)
+        if self._last_event_step > step:
+            self._last_event_step -= 1
+        self.recorded_bytes -= self.RECORD_SIZE
+        self.memory_bytes -= self.RECORD_SIZE
 
-        In general cases, the first input line may not be
-        empty, so `self.changes[-2]` will result in
-        IndexError. In this case, we use `self.changes[-1]`
+    def _spill(self) -> None:
         """
-        # this should not be a problem in official use, since the first line in the main function
-        # ie. `def main()`: has no variables.
-        return self.changes[-2] if len(self.changes) > 1 else self.changes[-1]
+        move the in-memory steps except the latest ones into the trace store
+        """
+        kept_from = len(self.lines) - self.KEPT_STEPS
+        if kept_from <= 0:
+            return
+        boundary = self.step_offset + kept_from
+
+        # the columns are sorted, so they are split at the first change of the kept steps
+        vc_split = bisect.bisect_left(self.vc_steps, boundary)
+        ac_split = bisect.bisect_left(self.ac_steps, boundary)
 
-    def get_last_vc(self) -> dict:
+        self.store.append(TraceChunk(
+            step_offset=self.step_offset,
+            lines=self.lines[:kept_from],
+            vc_steps=self.vc_steps[:vc_split],
+            vc_variable_ids=self.vc_variable_ids[:vc_split],
+            vc_values=self.vc_values[:vc_split],
+            ac_steps=self.ac_steps[:ac_split],
+            ac_values=self.ac_values[:ac_split],
+            ac_kinds=self.ac_kinds[:ac_split],
+        ))
+
+        lines = self.lines[kept_from:]
+        vc_steps = self.vc_steps[vc_split:]
+        vc_variable_ids = self.vc_variable_ids[vc_split:]
+        vc_values = self.vc_values[vc_split:]
+        ac_steps = self.ac_steps[ac_split:]
+        ac_kinds = self.ac_kinds[ac_split:]
+        ac_values = self.ac_values[ac_split:]
+
+        self._init_columns()
+        self.step_offset = boundary
+        self.lines, self.vc_steps, self.vc_variable_ids, self.vc_values = lines, vc_steps, vc_variable_ids, vc_values
+        self.ac_steps, self.ac_kinds, self.ac_values = ac_steps, ac_kinds, ac_values
+        # the values of the kept steps and the pending changes are still in memory
+        estimate_size = self._estimate_size
+        self.memory_bytes = len(lines) * self.RECORD_SIZE \
+            + sum(estimate_size(value) for value in vc_values) \
+            + sum(estimate_size(value) for value in ac_values) \
+            + sum(estimate_size(value) for _, value in self._pending_vcs) \
+            + sum(estimate_size(value) for _, value in self._pending_acs)
+
+    def iter_chunks(self) -> Iterator[TraceChunk]:
         """
-        get the last variable change dict
-        @return: variables dict in the last record
+        iterate all the recorded steps by chunks, the spilled ones first and then the in-memory ones
+        @return: iterator of chunks
+        """
+        if self.store is not None:
+            yield from self.store
+        yield TraceChunk(
+            step_offset=self.step_offset,
+            lines=self.lines,
+            vc_steps=self.vc_steps,
+            vc_variable_ids=self.vc_variable_ids,
+            vc_values=self.vc_values,
+            ac_steps=self.ac_steps,
+            ac_values=self.ac_values,
+            ac_kinds=self.ac_kinds,
+        )
+
+    def get_last_step(self) -> int:
         """
-        if not self.get_last_record()['variables']:
-            self.get_last_record()['variables'] = {}
+        get the step of the last traced event
 
-        return self.get_last_record()['variables']
+        If the last event is skipped by the recording policy,
+        `PENDING_STEP` is returned, whose changes are carried
+        to the next recorded step.
+        @return: the last step
+        """
+        return self._last_event_step
 
-    def get_previous_vc(self) -> dict:
-        """Get the second last dict in the record list"""
-        if not self.get_previous_record()['variables']:
-            self.get_previous_record()['variables'] = {}
+    def get_previous_step(self) -> int:
+        """Get the step of the previous traced event
 
-        return self.get_previous_record()['variables']
+        In general cases, the first input line may not be
+        empty, so there is no previous step. In this case,
+        we use the last step.
 
-    def get_last_ac(self) -> List:
+        If the previous step is skipped by the recording policy,
+        its changes go to the next recorded step.
         """
-        get the access list from the last record 
-        @return: accesses list in the last record
+        # this should not be a problem in official use, since the first line in the main function
+        # ie. `def main()`: has no variables.
+        previous_step = self._previous_event_step
+        return previous_step if previous_step != self.PENDING_STEP else self._last_event_step
+
+    def add_vc_to_step(self, step: int, variable_identifier: Tuple[str, str], variable_state: Any) -> None:
+        """
+        add a variable change to a step
+        @param step: the step, `PENDING_STEP` means the next recorded step
+        @param variable_identifier: (name_space, variable_name)
+        @param variable_state: the variable state
+        @return: None
         """
-        if not self.get_last_record()['accesses']:
-            self.get_last_record()['accesses'] = []
-        return self.get_last_record()['accesses']
+        if not self.recording:
+            return
+        self._account(self._estimate_size(variable_state))
+        variable_id = self.register_variable(variable_identifier)
+        if step == self.PENDING_STEP:
+            self._pending_vcs.append((variable_id, variable_state))
+        else:
+            index = self._insert_position(self.vc_steps, step)
+            self.vc_steps.insert(index, step)
+            self.vc_variable_ids.insert(index, variable_id)
+            self.vc_values.insert(index, variable_state)
+
+    def add_ac_to_step(self, step: int, access_changes: Any, kind: int = VALUE_ACCESS) -> None:
+        """
+        add an access change to a step
+        @param step: the step, `PENDING_STEP` means the next recorded step
+        @param access_changes: what's accessed, the id of the element if it's an element access or mutation
+        @param kind: the kind of the access
+        @return: None
+        """
+        if not self.recording:
+            return
+        self._account(self._estimate_size(access_changes))
+        if step == self.PENDING_STEP:
+            self._pending_acs.append((kind, access_changes))
+        else:
+            index = self._insert_position(self.ac_steps, step)
+            self.ac_steps.insert(index, step)
+            self.ac_kinds.insert(index, kind)
+            self.ac_values.insert(index, access_changes)
 
     def add_vc_to_last_record(self, variable_identifier: Tuple[str, str], variable_state: Any) -> None:
         """
@@ -103,8 +626,7 @@ class Recorder:
         @param variable_state: the variable state
         @return: None
         """
-        # if isinstance(variable_change, Tuple):
-        self.get_last_vc()[variable_identifier] = variable_state
+        self.add_vc_to_step(self._last_event_step, variable_identifier, variable_state)
 
     def add_vc_to_previous_record(self, variable_identifier: Tuple[str, str], variable_state: Any) -> None:
         """Add variable change to previous (second last if possible) record.
@@ -116,8 +638,7 @@ class Recorder:
         @param variable_state:
         @return:
         """
-        # if isinstance(variable_change, Tuple) and len(self.changes) > 1:
-        self.get_previous_vc()[variable_identifier] = variable_state
+        self.add_vc_to_step(self.get_previous_step(), variable_identifier, variable_state)
 
     def add_ac_to_last_record(self, access_changes: Any) -> None:
         """
@@ -125,9 +646,132 @@ class Recorder:
         @param access_changes: what's accessed
         @return: None
         """
-        self.get_last_ac().append(access_changes)
+        self.add_ac_to_step(self._last_event_step, access_changes)
+
+    def add_element_event(self, element_id: str, mutated: bool = False) -> None:
+        """
+        record that a graph element is accessed or mutated in the last record
+        @param element_id: the identity of the element
+        @param mutated: whether the element is mutated
+        @return: None
+        """
+        self.add_ac_to_step(self._last_event_step, element_id,
+                            self.ELEMENT_MUTATION if mutated else self.ELEMENT_ACCESS)
+
+    def add_container_delta(self, delta: Tuple) -> None:
+        """
+        record an operation on a traced container in the last record
+        @param delta: (container id, version after the operation, operation, *arguments)
+        @return: None
+        """
+        self.add_ac_to_step(self._last_event_step, delta, self.CONTAINER_DELTA)
+
+    def iter_step_variable_changes(self, step: int) -> Iterator[Tuple[Tuple[str, str], Any]]:
+        """
+        iterate the variable changes of a step, in the order they are made
+        @param step: the step, `PENDING_STEP` means the changes waiting for the next recorded step
+        @return: iterator of (identifier, value)
+        """
+        identifiers = self.identifiers
+        if step == self.PENDING_STEP:
+            for variable_id, value in self._pending_vcs:
+                yield identifiers[variable_id], value
+            return
+
+        vc_steps = self.vc_steps
+        for index in range(bisect.bisect_left(vc_steps, step), bisect.bisect_right(vc_steps, step)):
+            yield identifiers[self.vc_variable_ids[index]], self.vc_values[index]
+
+    def iter_step_accesses(self, step: int) -> Iterator[Any]:
+        """
+        iterate the accesses of a step, in the order they are made
+        @param step: the step, `PENDING_STEP` means the accesses waiting for the next recorded step
+        @return: iterator of accessed things
+        """
+        if step == self.PENDING_STEP:
+            for kind, access in self._pending_acs:
+                if kind != self.CONTAINER_DELTA:
+                    yield access
+            return
+
+        ac_steps = self.ac_steps
+        for index in range(bisect.bisect_left(ac_steps, step), bisect.bisect_right(ac_steps, step)):
+            if self.ac_kinds[index] != self.CONTAINER_DELTA:
+                yield self.ac_values[index]
+
+    def _get_record(self, step: int) -> dict:
+        return {
+            'line': self.lines[step - self.step_offset] if step != self.PENDING_STEP else None,
+            'variables': _StepVariables(self, step),
+            'accesses': _StepAccesses(self, step)
+        }
+
+    def get_last_record(self) -> dict:
+        """
+        get the last record
+        @return: the last record, whose variables and accesses are views of the columns
+        """
+        return self._get_record(self._last_event_step)
+
+    def get_previous_record(self) -> dict:
+        """Get the second last record in the record list
+
+        @return: the previous record, whose variables and accesses are views of the columns
+        """
+        return self._get_record(self.get_previous_step())
+
+    def get_last_vc(self) -> MutableMapping:
+        """
+        get the last variable change dict
+        @return: view of variable changes in the last record
+        """
+        return _StepVariables(self, self._last_event_step)
+
+    def get_previous_vc(self) -> MutableMapping:
+        """Get the second last variable change dict in the record list"""
+        return _StepVariables(self, self.get_previous_step())
+
+    def get_last_ac(self) -> Sequence:
+        """
+        get the access list from the last record 
+        @return: view of accesses in the last record
+        """
+        return _StepAccesses(self, self._last_event_step)
+
+    @property
+    def changes(self) -> List[dict]:
+        """
+        build the records in the format of a list containing dictionaries
+        @return: the records
+        """
+        changes = []
+        identifiers = self.identifiers
+        for chunk in self.iter_chunks():
+            changes.extend({'line': line, 'variables': None, 'accesses': None} for line in chunk.lines)
+            for step, variable_id, value in zip(chunk.vc_steps, chunk.vc_variable_ids, chunk.vc_values):
+                record = changes[step]
+                if record['variables'] is None:
+                    record['variables'] = {}
+                record['variables'][identifiers[variable_id]] = value
+            ac_kinds = chunk.ac_kinds or [self.VALUE_ACCESS] * len(chunk.ac_values)
+            for step, access, kind in zip(chunk.ac_steps, chunk.ac_values, ac_kinds):
+                if kind == self.CONTAINER_DELTA:
+                    continue
+                record = changes[step]
+                if record['accesses'] is None:
+                    record['accesses'] = []
+                # the elements are recorded by ids, which are frozen so that they are still told from strings
+                record['accesses'].append(access if kind == self.VALUE_ACCESS else RecordedValue(access, access))
+        return changes
 
     def purge(self):
         """Empty previous recorded items"""
-        self.changes: List[dict] = []
-        self.variables: Set[Tuple[str, str]] = set()
+        self.identifiers = []
+        self.identifier_ids = {}
+        self._init_columns()
+        self.recorded_bytes: int = 0
+        self.exceeded_limit: Optional[RecordLimitExceeded] = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        self._init_event_states()
@@ -0,0 +1,146 @@
+"""
+json serializers used at the boundaries, ie. the processed results, the graphs, the server responses and the models
+
+`get_serializer()` returns `orjson` when it's installed, and the `json`
+module of the standard library otherwise::
+
+    from bundle.utils.serializers import get_serializer
+
+    serializer = get_serializer()
+    text = serializer.dumps(result, default=str)
+    result = serializer.loads(text)
+
+The outputs of the serializers are the same json documents, but `orjson`
+doesn't put spaces after the separators. The values `orjson` cannot encode,
+ie. the integers out of 64 bits and the indents other than 2, fall back to
+the standard library.
+"""
+import abc
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Default = Optional[Callable[[Any], Any]]
+
+
+class Serializer(abc.ABC):
+    """
+    The interface of json serializers.
+
+    The separators are the ones put between the items and between the keys
+    and the values, so that a document can be encoded in pieces in the same
+    form, see `json_stream`.
+    """
+    name: str = ''
+    item_separator: str = ', '
+    key_separator: str = ': '
+
+    @abc.abstractmethod
+    def dumps(self, value: Any, default: Default = None, indent: Optional[int] = None) -> str:
+        """
+        encode a value into json
+        @param value:
+        @param default: the function converting the values which cannot be encoded, like `json.dumps`
+        @param indent: the indent of the json, `None` means one line
+        @return: the json string
+        @raise TypeError: if a value cannot be encoded
+        """
+
+    def dumps_bytes(self, value: Any, default: Default = None) -> bytes:
+        """
+        encode a value into utf-8 encoded json
+        @param value:
+        @param default: the function converting the values which cannot be encoded
+        @return: the json bytes
+        """
+        return self.dumps(value, default).encode('UTF-8')
+
+    @abc.abstractmethod
+    def loads(self, document: Union[str, bytes]) -> Any:
+        """
+        decode a json document
+        @param document: the json string or utf-8 encoded bytes
+        @return: the value
+        @raise ValueError: if the document is not valid json
+        """
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} {self.name}>'
+
+
+class StdlibSerializer(Serializer):
+    name = 'json'
+
+    def dumps(self, value: Any, default: Default = None, indent: Optional[int] = None) -> str:
+        return json.dumps(value, default=default, indent=indent)
+
+    def loads(self, document: Union[str, bytes]) -> Any:
+        return json.loads(document)
+
+
+class OrjsonSerializer(Serializer):
+    name = 'orjson'
+    item_separator = ','
+    key_separator = ':'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('orjson is not installed')
+        self._fallback = StdlibSerializer()
+
+    def dumps_bytes(self, value: Any, default: Default = None, indent: Optional[int] = None) -> bytes:
+        if indent not in (None, 2):
+            return self._fallback.dumps(value, default, indent).encode('UTF-8')
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(value, default=default, option=option)
+        except orjson.JSONEncodeError:
+            # the values out of the range of orjson, eg. big integers
+            return self._fallback.dumps(value, default, indent).encode('UTF-8')
+
+    def dumps(self, value: Any, default: Default = None, indent: Optional[int] = None) -> str:
+        return self.dumps_bytes(value, default, indent).decode('UTF-8')
+
+    def loads(self, document: Union[str, bytes]) -> Any:
+        return orjson.loads(document)
+
+
+SERIALIZERS: Dict[str, Callable[[], Serializer]] = {
+    StdlibSerializer.name: StdlibSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+}
+
+_instances: Dict[str, Serializer] = {}
+
+
+def available_serializers() -> Dict[str, Serializer]:
+    """
+    @return: the serializers whose backends are installed, by names
+    """
+    serializers = {}
+    for name in SERIALIZERS:
+        try:
+            serializers[name] = get_serializer(name)
+        except ImportError:
+            pass
+    return serializers
+
+
+def get_serializer(name: Optional[str] = None) -> Serializer:
+    """
+    get a serializer by its name
+    @param name: one of `SERIALIZERS`, `None` means the fastest one installed
+    @return: the serializer
+    @raise KeyError: if the name is unknown
+    @raise ImportError: if the backend of the serializer is not installed
+    """
+    if name is None:
+        name = OrjsonSerializer.name if orjson is not None else StdlibSerializer.name
+    serializer = _instances.get(name)
+    if serializer is None:
+        serializer = _instances[name] = SERIALIZERS[name]()
+    return serializer
@@ -0,0 +1,215 @@
+"""
+inverted indexes of processed results
+
+Finding the steps where a line runs, a variable changes or a graph element
+is used means scanning all the records. A trace index maps each of them
+to the sorted steps in one pass, so that a query, like jumping to the next
+breakpoint, is a binary search::
+
+    index = TraceIndex.from_records(processor.result)
+    index.line_steps(12)                      # array('i', [3, 10, 17, ...])
+    index.next_step(index.line_steps(12), 10) # 17
+    index.next_line_step([12, 15], 10)        # the next step on either line
+    index.element_steps('v3')                 # the steps where `v3` is accessed or watched
+
+The json form of an index, see `as_dict`, is::
+
+    {
+        'lines': {'12': [3, 10, 17, ...], ...},
+        'variables': {'main#current': [4, 11, ...], ...},
+        'elements': {'v3': [4, 5, ...], ...}
+    }
+"""
+import bisect
+from array import array
+from typing import Mapping, Iterable, Iterator, Dict, Sequence, Optional, Any, Union, List
+
+from bundle.utils.delta_result import DeltaResult, DELTA_FORMAT_VERSION, get_changes
+from bundle.utils.loop_folding import LoopResult, LOOP_FORMAT_VERSION
+
+# the variable holding the accesses of a step, see `Processor.ACCESSED_ID_NAME`
+ACCESSED_VARIABLE_NAME = 'global#accessed var'
+GRAPH_ELEMENT_TYPE = 'graph_element'
+
+
+def iter_result_records(result: Union[Sequence[Mapping], Mapping]) -> Iterable[Mapping]:
+    """
+    read the records of the version 1 from a result in any format
+    @param result: the records of the version 1, or a delta-encoded or loop-folded result
+    @return: the records
+    @raise ValueError: if the version of the result is unknown
+    """
+    if not isinstance(result, Mapping):
+        return result
+    version = result.get('version')
+    if version == DELTA_FORMAT_VERSION:
+        return DeltaResult(result)
+    if version == LOOP_FORMAT_VERSION:
+        return LoopResult(result)
+    raise ValueError(f'unsupported result version {version}')
+
+
+def _element_ids(value: Any) -> Iterator[str]:
+    # the accesses of a step are a list of element references and reprs
+    if isinstance(value, list):
+        for access in value:
+            if isinstance(access, Mapping) and access.get('id') is not None:
+                yield access['id']
+    elif isinstance(value, Mapping) and value.get('type') == GRAPH_ELEMENT_TYPE:
+        yield value['id']
+
+
+class TraceIndex:
+    """
+    The inverted indexes of a processed result, ie. the steps of each line,
+    the steps in which each variable changes, and the steps in which each
+    graph element is accessed or assigned to a watched variable. The steps
+    are kept in sorted arrays of ints.
+    """
+    STEP_TYPE = 'i'
+
+    def __init__(self):
+        self.lines: Dict[int, array] = {}
+        self.variables: Dict[str, array] = {}
+        self.elements: Dict[str, array] = {}
+
+    @staticmethod
+    def _add(index: Dict[Any, array], key: Any, step: int) -> None:
+        steps = index.get(key)
+        if steps is None:
+            steps = index[key] = array(TraceIndex.STEP_TYPE)
+        # an element used twice in a step is indexed once
+        if not steps or steps[-1] != step:
+            steps.append(step)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> 'TraceIndex':
+        """
+        index the records
+        @param records: the records of the version 1, see `Processor.generate_record_template`
+        @return: the index
+        """
+        index = cls()
+        for _ in index.iter_indexed(records):
+            pass
+        return index
+
+    def iter_indexed(self, records: Iterable[Mapping]) -> Iterator[Mapping]:
+        """
+        index the records while they pass through, eg. while they are processed and sent as a stream,
+        the index is complete once the iterator is exhausted
+        @param records: the records of the version 1, see `Processor.generate_record_template`
+        @return: iterator of the same records
+        """
+        state: Optional[Mapping[str, Any]] = None
+        for step, record in enumerate(records):
+            self._add(self.lines, record['line'], step)
+            variables = record['variables']
+            if variables is not None:
+                for name, value in get_changes(state, variables).items():
+                    # the variables are not assigned in the initial state
+                    if state is None and value is None:
+                        continue
+                    if name != ACCESSED_VARIABLE_NAME:
+                        self._add(self.variables, name, step)
+                    for element_id in _element_ids(value):
+                        self._add(self.elements, element_id, step)
+                # the accesses are not carried to the next steps
+                for element_id in _element_ids(variables.get(ACCESSED_VARIABLE_NAME)):
+                    self._add(self.elements, element_id, step)
+                state = variables
+            yield record
+
+    @classmethod
+    def from_result(cls, result: Union[Sequence[Mapping], Mapping]) -> 'TraceIndex':
+        """
+        index a result in any format
+        @param result: the records of the version 1, or a delta-encoded or loop-folded result
+        @return: the index
+        """
+        return cls.from_records(iter_result_records(result))
+
+    def as_dict(self) -> Mapping[str, Mapping[str, List[int]]]:
+        """
+        @return: the json form of the index, in which the lines are strings
+        """
+        return {
+            'lines': {str(line): steps.tolist() for line, steps in self.lines.items()},
+            'variables': {name: steps.tolist() for name, steps in self.variables.items()},
+            'elements': {element_id: steps.tolist() for element_id, steps in self.elements.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, index_dict: Mapping[str, Mapping[str, Sequence[int]]]) -> 'TraceIndex':
+        """
+        the reverse of `as_dict`
+        @param index_dict:
+        @return: the index
+        """
+        index = cls()
+        index.lines = {int(line): array(cls.STEP_TYPE, steps) for line, steps in index_dict['lines'].items()}
+        index.variables = {name: array(cls.STEP_TYPE, steps) for name, steps in index_dict['variables'].items()}
+        index.elements = {element_id: array(cls.STEP_TYPE, steps)
+                          for element_id, steps in index_dict['elements'].items()}
+        return index
+
+    def line_steps(self, line: int) -> Sequence[int]:
+        """
+        @param line:
+        @return: the steps in which the line runs
+        """
+        return self.lines.get(line, ())
+
+    def variable_steps(self, name: str) -> Sequence[int]:
+        """
+        @param name: the name of the variable in the result, ie. `name_space#variable_name`
+        @return: the steps in which the variable changes
+        """
+        return self.variables.get(name, ())
+
+    def element_steps(self, element_id: str) -> Sequence[int]:
+        """
+        @param element_id:
+        @return: the steps in which the element is accessed or assigned to a watched variable
+        """
+        return self.elements.get(element_id, ())
+
+    @staticmethod
+    def next_step(steps: Sequence[int], step: int) -> Optional[int]:
+        """
+        @param steps: sorted steps
+        @param step:
+        @return: the first of the steps after the step, `None` if there is none
+        """
+        position = bisect.bisect_right(steps, step)
+        return steps[position] if position < len(steps) else None
+
+    @staticmethod
+    def previous_step(steps: Sequence[int], step: int) -> Optional[int]:
+        """
+        @param steps: sorted steps
+        @param step:
+        @return: the last of the steps before the step, `None` if there is none
+        """
+        position = bisect.bisect_left(steps, step)
+        return steps[position - 1] if position else None
+
+    def next_line_step(self, lines: Iterable[int], step: int) -> Optional[int]:
+        """
+        find the next step on any of the lines, ie. the next breakpoint
+        @param lines:
+        @param step:
+        @return: the step, `None` if there is none
+        """
+        next_steps = [self.next_step(self.line_steps(line), step) for line in lines]
+        return min((next_step for next_step in next_steps if next_step is not None), default=None)
+
+    def previous_line_step(self, lines: Iterable[int], step: int) -> Optional[int]:
+        """
+        find the previous step on any of the lines
+        @param lines:
+        @param step:
+        @return: the step, `None` if there is none
+        """
+        previous_steps = [self.previous_step(self.line_steps(line), step) for line in lines]
+        return max((previous_step for previous_step in previous_steps if previous_step is not None), default=None)
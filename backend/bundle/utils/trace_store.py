@@ -0,0 +1,228 @@
+"""
+trace store, which keeps the old records of a long trace on disk
+"""
+import itertools
+import json
+import mmap
+import pathlib
+import struct
+from typing import NamedTuple, Optional, Any, Iterator, Sequence, BinaryIO, Union
+
+from bundle.GraphObjects.Edge import Edge
+from bundle.GraphObjects.Node import Node
+from bundle.utils.bounded_repr import bounded_repr
+
+
+class RecordedValue(NamedTuple):
+    """
+    The frozen form of a recorded value.
+
+    Only what the processor needs is kept, ie. the representation of the
+    value and the identity of the graph element if the value is one, so the
+    recorded object can be released once its record is written to disk.
+    """
+    repr: str
+    element_id: Optional[str] = None
+
+
+class ContainerState(NamedTuple):
+    """
+    The recorded state of a traced container (see `bundle.seeker.containers`).
+
+    The items are not recorded except for the first time the container is
+    observed, since the changes of a traced container are recorded as deltas.
+    """
+    container_id: int
+    kind: str
+    version: int
+    size: int
+    # the reprs of the items, which is only given when the container is observed for the first time
+    items: Optional[Sequence[str]] = None
+
+
+def freeze_value(value: Any) -> RecordedValue:
+    """
+    freeze a recorded value
+    @param value: a variable state or something accessed
+    @return: the frozen value
+    """
+    if isinstance(value, RecordedValue):
+        return value
+    return RecordedValue(bounded_repr.repr(value), value.identity if isinstance(value, (Node, Edge)) else None)
+
+
+def encode_value(value: Any) -> Any:
+    """
+    freeze a recorded value into a JSON compatible form, the states of containers are kept
+    @param value:
+    @return:
+    """
+    if isinstance(value, ContainerState):
+        return {'container': list(value)}
+    return freeze_value(value)
+
+
+def decode_value(value: Any) -> Union[RecordedValue, ContainerState]:
+    """
+    the reverse of `encode_value`
+    @param value:
+    @return:
+    """
+    if isinstance(value, dict):
+        return ContainerState(*value['container'])
+    return RecordedValue(*value)
+
+
+class TraceChunk(NamedTuple):
+    """
+    A chunk of records in the column format of the recorder.
+
+    The steps in `vc_steps` and `ac_steps` are global, and `lines[0]` is
+    the line of step `step_offset`. `ac_kinds` holds the kinds of the
+    accesses (see `Recorder`), and it's empty if all of them are values.
+    """
+    step_offset: int
+    lines: Sequence[int]
+    vc_steps: Sequence[int]
+    vc_variable_ids: Sequence[int]
+    vc_values: Sequence[Any]
+    ac_steps: Sequence[int]
+    ac_values: Sequence[Any]
+    ac_kinds: Sequence[int] = ()
+
+
+class TraceStore:
+    """
+    Append-only file of trace chunks.
+
+    Each chunk is stored as a JSON document prefixed by its length::
+
+        | length (4 bytes, big endian) | {"step_offset": 0, "lines": [...], ...} |
+        | length (4 bytes, big endian) | {"step_offset": 1024, "lines": [...], ...} |
+        ...
+
+    The values in the chunks are frozen into `RecordedValue`, except the
+    states of traced containers and the recorded ids of graph elements,
+    which are stored as they are. The file is
+    memory-mapped when it's read back, so only one chunk is decoded at a time.
+
+    Usage::
+
+        store = TraceStore(cache_folder / 'trace.store', threshold=4 * 1024 * 1024)
+        recorder.set_store(store)
+        ...  # records are spilled into the store once the threshold is exceeded
+        for chunk in recorder.iter_chunks():
+            ...
+        store.close()
+    """
+    LENGTH_PREFIX = struct.Struct('>I')
+    FILE_NAME = 'trace.store'
+
+    def __init__(self, path: pathlib.Path, threshold: int):
+        """
+        @param path: the file path of the store, the file is truncated
+        @param threshold: the estimated size of in-memory records which triggers spilling
+        """
+        self.path: pathlib.Path = path
+        self.threshold: int = threshold
+        self.chunk_count: int = 0
+        self.spilled_steps: int = 0
+        # the size of the file, in bytes
+        self.size: int = 0
+        self._file: Optional[BinaryIO] = self.path.open('wb')
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def append(self, chunk: TraceChunk) -> None:
+        """
+        freeze a chunk and append it to the end of the file
+        @param chunk:
+        @return: None
+        """
+        if self.closed:
+            raise ValueError('The trace store is closed')
+
+        document = json.dumps({
+            'step_offset': chunk.step_offset,
+            'lines': list(chunk.lines),
+            'vc_steps': list(chunk.vc_steps),
+            'vc_variable_ids': list(chunk.vc_variable_ids),
+            'vc_values': [encode_value(value) for value in chunk.vc_values],
+            'ac_steps': list(chunk.ac_steps),
+            # the accesses of graph elements are recorded as ids, which are kept as they are
+            'ac_values': [freeze_value(value) if not kind else value
+                          for value, kind in zip(chunk.ac_values, self._iter_kinds(chunk))],
+            'ac_kinds': list(chunk.ac_kinds),
+        }).encode('utf-8')
+
+        self._file.write(self.LENGTH_PREFIX.pack(len(document)))
+        self._file.write(document)
+        self.chunk_count += 1
+        self.spilled_steps += len(chunk.lines)
+        self.size += self.LENGTH_PREFIX.size + len(document)
+
+    @staticmethod
+    def _iter_kinds(chunk: TraceChunk) -> Iterator[int]:
+        return iter(chunk.ac_kinds) if chunk.ac_kinds else itertools.repeat(0, len(chunk.ac_values))
+
+    @staticmethod
+    def _load_chunk(document: bytes) -> TraceChunk:
+        mapping = json.loads(document)
+        ac_kinds = mapping['ac_kinds']
+        return TraceChunk(
+            step_offset=mapping['step_offset'],
+            lines=mapping['lines'],
+            vc_steps=mapping['vc_steps'],
+            vc_variable_ids=mapping['vc_variable_ids'],
+            vc_values=[decode_value(value) for value in mapping['vc_values']],
+            ac_steps=mapping['ac_steps'],
+            ac_values=[RecordedValue(*value) if not kind else value
+                       for value, kind in zip(mapping['ac_values'], ac_kinds or itertools.repeat(0))],
+            ac_kinds=ac_kinds,
+        )
+
+    def __iter__(self) -> Iterator[TraceChunk]:
+        """
+        read the chunks back in the order they are appended
+        @return: iterator of chunks
+        """
+        if self.closed:
+            raise ValueError('The trace store is closed')
+
+        self._file.flush()
+        if self.chunk_count == 0:
+            return
+
+        prefix_size = self.LENGTH_PREFIX.size
+        with self.path.open('rb') as store_file, \
+                mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            position, end = 0, len(mapped)
+            while position < end:
+                length, = self.LENGTH_PREFIX.unpack_from(mapped, position)
+                position += prefix_size
+                yield self._load_chunk(mapped[position:position + length])
+                position += length
+
+    def __len__(self) -> int:
+        return self.chunk_count
+
+    def close(self, delete: bool = True) -> None:
+        """
+        close the store
+        @param delete: whether the file is removed
+        @return: None
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if delete and self.path.exists():
+            self.path.unlink()
+
+    def __enter__(self) -> 'TraceStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
@@ -7,6 +7,8 @@ from channels.generic.websocket import JsonWebsocketConsumer
 
 from backend.channels.Errors import InvalidRequestContent, UnknownRequestType, RequestDataInvalid
 from backend.model.TutorialRelatedModel import Graph
+from bundle.utils.json_stream import iter_json
+from bundle.utils.compression import iter_compressed, GZIP_ENCODING
 from .helpers import generate_respond_message, generate_respond_error_message, ResponseType, \
     generate_status_response_mapping
 
@@ -20,6 +22,11 @@ INSTRUCTION_TYPE_NAME = 'instruction'
 GRAPH_ID_INTERFACE_NAME = 'graphId'
 CODE_INTERFACE_NAME = 'code'
 TIME_STAMP_INTERFACE_NAME = 'timeStamp'
+# whether the result is sent in chunks
+CHUNKED_INTERFACE_NAME = 'chunked'
+# whether the client can decompress the result sent in a binary frame
+COMPRESSED_INTERFACE_NAME = 'compressed'
+COMPRESSED_ENCODING = GZIP_ENCODING
 TIME_STAMP_DIFF = 15
 
 
@@ -108,6 +115,30 @@ class RequestConsumer(JsonWebsocketConsumer):
             response_mapping=generate_status_response_mapping('You code is being executed. Please wait!')
         ))
 
+    def send_json_chunks(self, content: Mapping) -> int:
+        """
+        send the json of a large content in `executed_chunk` messages, whose `chunk`s are joined by the client
+        @param content:
+        @return: the number of chunks
+        """
+        count = 0
+        for count, chunk in enumerate(iter_json(content), start=1):
+            self.send_json(generate_respond_message(
+                response_type=ResponseType.EXECUTED_CHUNK.value,
+                response_mapping={'index': count - 1, 'chunk': chunk}
+            ))
+        return count
+
+    def send_compressed_json(self, content: Mapping) -> int:
+        """
+        send the json of a content compressed in one binary frame, which is compressed while the json is encoded
+        @param content:
+        @return: the size of the frame
+        """
+        compressed = b''.join(iter_compressed(iter_json(content), COMPRESSED_ENCODING))
+        self.send(bytes_data=compressed)
+        return len(compressed)
+
     def executed(self, response_mapping: Mapping) -> None:
         execution_logger.info(f'code (hash: {response_mapping["data"]["codeHash"]}) '
                            f'provided by {self} consumer is executed.')
@@ -116,6 +147,21 @@ class RequestConsumer(JsonWebsocketConsumer):
                 response_type=ResponseType.STOPPED.value,
                 response_mapping=response_mapping
             ))
+        elif self.request_data.get(COMPRESSED_INTERFACE_NAME):
+            # the `executed` message tells how to decompress the binary frame before it, which carries the response
+            self.send_json(generate_respond_message(
+                response_type=ResponseType.EXECUTED.value,
+                response_mapping={'encoding': COMPRESSED_ENCODING,
+                                  'size': self.send_compressed_json(response_mapping),
+                                  'timeStamp': self.request_data.get(TIME_STAMP_INTERFACE_NAME)}
+            ))
+        elif self.request_data.get(CHUNKED_INTERFACE_NAME):
+            # the `executed` message only tells the number of chunks, which carry the response
+            self.send_json(generate_respond_message(
+                response_type=ResponseType.EXECUTED.value,
+                response_mapping={'chunks': self.send_json_chunks(response_mapping),
+                                  'timeStamp': self.request_data.get(TIME_STAMP_INTERFACE_NAME)}
+            ))
         else:
             self.send_json(generate_respond_message(
                 response_type=ResponseType.EXECUTED.value,
@@ -9,6 +9,7 @@ class ResponseType(Enum):
     WAITING = 'waiting'
     EXECUTING = 'executing'
     EXECUTED = 'executed'
+    EXECUTED_CHUNK = 'executed_chunk'
 
 
 def generate_status_response_mapping(message: str = None):
@@ -1,4 +1,3 @@
-import json
 import urllib
 from queue import Queue
 from typing import Mapping
@@ -7,13 +6,15 @@ from channels.consumer import SyncConsumer
 
 from bundle.server_utils.utils import create_error_response
 from bundle.server_utils.params import VERSION
+from bundle.utils.serializers import get_serializer
 
 
 def post_request(url: str, data: Mapping[str, str]) -> Mapping:
-    encoded_data = json.dumps(data).encode('UTF-8')
+    serializer = get_serializer()
+    encoded_data = serializer.dumps_bytes(data)
     req = urllib.request.Request(url, data=encoded_data,
                                  headers={'content-type': 'application/json'})
-    return json.loads(urllib.request.urlopen(req).read().decode('UTF-8'))
+    return serializer.loads(urllib.request.urlopen(req).read())
 
 
 class ProcessHandler:
@@ -1,3 +1,4 @@
+import base64
 from typing import Tuple, Any, Iterable
 
 from django.db.models import QuerySet
@@ -17,9 +18,11 @@ from ..models import User
 from ..models import Category, Tutorial, Graph, Code, ExecResultJson
 from ..models import ENUS, ZHCN, ENUSGraphContent, ZHCNGraphContent
 from graphene_django.types import DjangoObjectType
+from graphene.types.generic import GenericScalar
 
 import graphene
 
+
 from copy import copy
 
 
@@ -236,11 +239,23 @@ class CodeType(PublishedFilterBase, DjangoObjectType):
 class ExecResultJsonType(DjangoObjectType):
     # TODO django can't query a user-defined property
     is_published = graphene.Boolean()
+    trace_index = GenericScalar(description='The steps of the lines, the variable changes and '
+                                            'the graph element accesses in the result')
+    binary_trace = graphene.String(description='The base64 encoded binary trace of the result')
 
     @graphene.resolve_only_args
     def resolve_is_published(self):
         return self.is_published
 
+    @graphene.resolve_only_args
+    def resolve_trace_index(self):
+        return self.get_trace_index()
+
+    @graphene.resolve_only_args
+    def resolve_binary_trace(self):
+        trace = self.get_trace()
+        return base64.b64encode(trace).decode('ascii') if trace is not None else None
+
     @field_adder(time_date_mixin_field, published_mixin_field, uuid_mixin_field)
     class Meta:
         model = ExecResultJson
@@ -0,0 +1,24 @@
+# Generated by Django 3.1.2 on 2026-10-19 10:12
+
+import backend.model.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0018_adapt_json_field_to_django_3_1'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='execresultjson',
+            name='json',
+            field=backend.model.fields.SerializedJSONField(),
+        ),
+        migrations.AlterField(
+            model_name='graph',
+            name='cyjs',
+            field=backend.model.fields.SerializedJSONField(),
+        ),
+    ]
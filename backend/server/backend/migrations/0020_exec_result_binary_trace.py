@@ -0,0 +1,194 @@
+# Generated by Django 3.1.2 on 2026-10-19 14:40
+
+import struct
+from collections.abc import Mapping
+
+from django.db import migrations, models
+
+# The encoder of the binary trace, version 1, as it is when this migration is made,
+# see `bundle.utils.binary_trace`. It's kept here, so that a later change of the
+# bundle doesn't change what this migration does. Only the records of the version 1
+# are encoded, the other results are left to `ExecResultJson.get_trace`.
+
+MAGIC = b'GTRC'
+BINARY_FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHBxIIIII')
+FLOAT = struct.Struct('<d')
+VARIABLES_NONE = 1
+
+TAG_NULL = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STRING = 5
+TAG_LIST = 6
+TAG_DICT = 7
+TAG_NORMAL_VAR = 8
+TAG_GRAPH_ELEMENT = 9
+TAG_ACCESS = 10
+
+NORMAL_VAR_KEYS = ('type', 'repr')
+GRAPH_ELEMENT_KEYS = ('type', 'id', 'color', 'repr')
+ACCESS_KEYS = ('id', 'color')
+
+
+def write_varint(buffer, number):
+    while number > 0x7F:
+        buffer.append((number & 0x7F) | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def has_keys(value, keys):
+    return len(value) == len(keys) and tuple(value) == keys and all(isinstance(value[key], str) for key in keys)
+
+
+class Encoder:
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+        self.values = bytearray()
+        self.value_count = 0
+        self.value_ids = {}
+
+    def intern(self, string):
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = self.string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def key(self, value):
+        if isinstance(value, Mapping):
+            return dict, tuple((key, self.key(item)) for key, item in value.items())
+        if isinstance(value, (list, tuple)):
+            return list, tuple(self.key(item) for item in value)
+        return type(value), value
+
+    def add_value(self, value):
+        key = self.key(value)
+        value_id = self.value_ids.get(key)
+        if value_id is None:
+            self.write_value(self.values, value)
+            self.value_count += 1
+            value_id = self.value_ids[key] = self.value_count
+        return value_id
+
+    def write_value(self, buffer, value):
+        if value is None:
+            buffer.append(TAG_NULL)
+        elif value is True:
+            buffer.append(TAG_TRUE)
+        elif value is False:
+            buffer.append(TAG_FALSE)
+        elif isinstance(value, int):
+            buffer.append(TAG_INT)
+            write_varint(buffer, value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif isinstance(value, float):
+            buffer.append(TAG_FLOAT)
+            buffer += FLOAT.pack(value)
+        elif isinstance(value, str):
+            buffer.append(TAG_STRING)
+            write_varint(buffer, self.intern(value))
+        elif isinstance(value, (list, tuple)):
+            buffer.append(TAG_LIST)
+            write_varint(buffer, len(value))
+            for item in value:
+                self.write_value(buffer, item)
+        elif isinstance(value, Mapping):
+            self.write_mapping(buffer, value)
+        else:
+            raise TypeError(f'Object of type {type(value).__name__} cannot be encoded into a binary trace')
+
+    def write_mapping(self, buffer, value):
+        if value.get('type') == 'normal_var' and has_keys(value, NORMAL_VAR_KEYS):
+            buffer.append(TAG_NORMAL_VAR)
+            write_varint(buffer, self.intern(value['repr']))
+        elif value.get('type') == 'graph_element' and has_keys(value, GRAPH_ELEMENT_KEYS):
+            buffer.append(TAG_GRAPH_ELEMENT)
+            for key in GRAPH_ELEMENT_KEYS[1:]:
+                write_varint(buffer, self.intern(value[key]))
+        elif has_keys(value, ACCESS_KEYS):
+            buffer.append(TAG_ACCESS)
+            for key in ACCESS_KEYS:
+                write_varint(buffer, self.intern(value[key]))
+        else:
+            buffer.append(TAG_DICT)
+            write_varint(buffer, len(value))
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f'keys must be str, not {type(key).__name__}')
+                write_varint(buffer, self.intern(key))
+                self.write_value(buffer, item)
+
+
+def encode_trace(records):
+    encoder = Encoder()
+    columns = []
+    column_ids = {}
+    record_values = []
+    for record in records:
+        variables = record['variables']
+        if variables is None:
+            record_values.append(None)
+            continue
+        values = {}
+        for name, value in variables.items():
+            column = column_ids.get(name)
+            if column is None:
+                column = column_ids[name] = len(columns)
+                columns.append(name)
+            values[column] = encoder.add_value(value)
+        record_values.append(values)
+    column_string_ids = [encoder.intern(name) for name in columns]
+
+    id_size = 2 if max(len(encoder.strings), encoder.value_count) < 1 << 16 else 4
+    id_code = 'H' if id_size == 2 else 'I'
+    record_struct = struct.Struct(f'<iB{len(columns)}{id_code}')
+    empty_values = [0] * len(columns)
+
+    buffer = bytearray(HEADER.pack(MAGIC, BINARY_FORMAT_VERSION, id_size, len(records), len(encoder.strings),
+                                   encoder.value_count, len(columns), 0))
+    for string in encoder.strings:
+        encoded_string = string.encode('UTF-8')
+        write_varint(buffer, len(encoded_string))
+        buffer += encoded_string
+    buffer += struct.pack(f'<{len(columns)}{id_code}', *column_string_ids)
+    buffer += encoder.values
+    for record, values in zip(records, record_values):
+        if values is None:
+            buffer += record_struct.pack(record['line'], VARIABLES_NONE, *empty_values)
+        else:
+            value_ids = list(empty_values)
+            for column, value_id in values.items():
+                value_ids[column] = value_id
+            buffer += record_struct.pack(record['line'], 0, *value_ids)
+    return bytes(buffer)
+
+
+def encode_existing_results(apps, schema_editor):
+    exec_result_model = apps.get_model('backend', 'ExecResultJson')
+    for model_instance in exec_result_model.objects.all():
+        try:
+            model_instance.trace = encode_trace(model_instance.json)
+        except (TypeError, ValueError, KeyError, AttributeError, struct.error):
+            # the json is not a list of records
+            model_instance.trace = None
+        model_instance.save(update_fields=['trace'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0019_serialized_json_field'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='execresultjson',
+            name='trace',
+            field=models.BinaryField(editable=False, null=True),
+        ),
+        migrations.RunPython(encode_existing_results, migrations.RunPython.noop),
+    ]
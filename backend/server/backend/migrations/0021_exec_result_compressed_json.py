@@ -0,0 +1,41 @@
+# Generated by Django 3.1.2 on 2026-10-19 16:05
+
+import json
+import zlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+# the results are compressed in gzip when this migration is made, see `bundle.utils.compression`,
+# which is not imported, so that a later change of the bundle doesn't change what this migration does
+GZIP_WINDOW_BITS = 16 + zlib.MAX_WBITS
+DEFAULT_COMPRESSION_LEVEL = 6
+
+
+def compress_json(value, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WINDOW_BITS)
+    return compressor.compress(json.dumps(value).encode('UTF-8')) + compressor.flush()
+
+
+def compress_existing_results(apps, schema_editor):
+    exec_result_model = apps.get_model('backend', 'ExecResultJson')
+    level = getattr(settings, 'RESULT_COMPRESSION_LEVEL', DEFAULT_COMPRESSION_LEVEL)
+    for model_instance in exec_result_model.objects.all():
+        model_instance.compressed_json = compress_json(model_instance.json, level)
+        model_instance.save(update_fields=['compressed_json'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0020_exec_result_binary_trace'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='execresultjson',
+            name='compressed_json',
+            field=models.BinaryField(editable=False, null=True),
+        ),
+        migrations.RunPython(compress_existing_results, migrations.RunPython.noop),
+    ]
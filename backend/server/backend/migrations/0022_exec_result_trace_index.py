@@ -0,0 +1,89 @@
+# Generated by Django 3.1.2 on 2026-10-19 18:20
+
+from collections.abc import Mapping
+
+import backend.model.fields
+from django.db import migrations
+
+# The trace index as it is when this migration is made, see `bundle.utils.trace_index`.
+# It's kept here, so that a later change of the bundle doesn't change what this migration
+# does. Only the records of the version 1 are indexed, the other results are left to
+# `ExecResultJson.get_trace_index`.
+
+ACCESSED_VARIABLE_NAME = 'global#accessed var'
+GRAPH_ELEMENT_TYPE = 'graph_element'
+MISSING = object()
+
+
+def get_changes(previous, variables):
+    if previous is None:
+        return dict(variables)
+    changes = {}
+    for name, value in variables.items():
+        previous_value = previous.get(name, MISSING)
+        if previous_value is not value and previous_value != value:
+            changes[name] = value
+    return changes
+
+
+def element_ids(value):
+    if isinstance(value, list):
+        for access in value:
+            if isinstance(access, Mapping) and access.get('id') is not None:
+                yield access['id']
+    elif isinstance(value, Mapping) and value.get('type') == GRAPH_ELEMENT_TYPE:
+        yield value['id']
+
+
+def add_step(index, key, step):
+    steps = index.setdefault(key, [])
+    if not steps or steps[-1] != step:
+        steps.append(step)
+
+
+def index_records(records):
+    if not isinstance(records, list):
+        raise TypeError('the json is not a list of records')
+    lines, variables_index, elements = {}, {}, {}
+    state = None
+    for step, record in enumerate(records):
+        add_step(lines, str(record['line']), step)
+        variables = record['variables']
+        if variables is not None:
+            for name, value in get_changes(state, variables).items():
+                if state is None and value is None:
+                    continue
+                if name != ACCESSED_VARIABLE_NAME:
+                    add_step(variables_index, name, step)
+                for element_id in element_ids(value):
+                    add_step(elements, element_id, step)
+            for element_id in element_ids(variables.get(ACCESSED_VARIABLE_NAME)):
+                add_step(elements, element_id, step)
+            state = variables
+    return {'lines': lines, 'variables': variables_index, 'elements': elements}
+
+
+def index_existing_results(apps, schema_editor):
+    exec_result_model = apps.get_model('backend', 'ExecResultJson')
+    for model_instance in exec_result_model.objects.all():
+        try:
+            model_instance.trace_index = index_records(model_instance.json)
+        except (TypeError, ValueError, KeyError, AttributeError):
+            model_instance.trace_index = None
+        model_instance.save(update_fields=['trace_index'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0021_exec_result_compressed_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='execresultjson',
+            name='trace_index',
+            field=backend.model.fields.SerializedJSONField(editable=False, null=True),
+        ),
+        migrations.RunPython(index_existing_results, migrations.RunPython.noop),
+    ]
@@ -5,7 +5,12 @@ from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
 
+from bundle.utils.binary_trace import encode_result
+from bundle.utils.compression import compress, GZIP_ENCODING, DEFAULT_COMPRESSION_LEVEL
+from bundle.utils.serializers import get_serializer
+from bundle.utils.trace_index import TraceIndex
 from .UserModel import User
+from .fields import SerializedJSONField
 from .mixins import PublishedMixin, TimeDateMixin, UUIDMixin, RankMixin
 from .translation_collection import process_trans_name, process_graph_info_trans_name
 
@@ -74,7 +79,7 @@ class Graph(PublishedMixin, TimeDateMixin, UUIDMixin, models.Model):
     authors = models.ManyToManyField(User)
     priority = models.PositiveSmallIntegerField(choices=GraphPriority.choices, default=GraphPriority.MAIN)
     # json
-    cyjs = models.JSONField()
+    cyjs = SerializedJSONField()
     # belongs to
     tutorials = models.ManyToManyField(Tutorial)
 
@@ -118,14 +123,99 @@ class Code(UUIDMixin, TimeDateMixin, models.Model):
         return f'<code {self.tutorial} | {self.code[:100]}>'
 
 
+def encode_result_trace(result) -> Optional[bytes]:
+    """
+    encode an execution result into the binary trace, see `bundle.utils.binary_trace`
+    @param result: the json of the result
+    @return: the binary trace, `None` if the json is not an execution result
+    """
+    try:
+        return encode_result(result)
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return None
+
+
+def compress_result_json(result) -> bytes:
+    """
+    compress the json of an execution result, with the level of the `RESULT_COMPRESSION_LEVEL` setting
+    @param result: the json of the result
+    @return: the json compressed in `ExecResultJson.COMPRESSED_ENCODING`
+    """
+    return compress(get_serializer().dumps_bytes(result), ExecResultJson.COMPRESSED_ENCODING,
+                    getattr(settings, 'RESULT_COMPRESSION_LEVEL', DEFAULT_COMPRESSION_LEVEL))
+
+
+def index_result_json(result) -> Optional[dict]:
+    """
+    index an execution result, see `bundle.utils.trace_index`
+    @param result: the json of the result
+    @return: the json form of the trace index, `None` if the json is not an execution result
+    """
+    try:
+        return TraceIndex.from_result(result).as_dict()
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return None
+
+
 class ExecResultJson(UUIDMixin, TimeDateMixin, models.Model):
     # relations
     code = models.ForeignKey(Code, on_delete=models.CASCADE)
     graph = models.ForeignKey(Graph, on_delete=models.CASCADE)
     # content
-    json = models.JSONField()
+    json = SerializedJSONField()
+    # the binary form, the compressed form and the trace index of the json,
+    # which are made when they're first asked for, and dropped when the json is written
+    trace = models.BinaryField(null=True, editable=False)
+    compressed_json = models.BinaryField(null=True, editable=False)
+    trace_index = SerializedJSONField(null=True, editable=False)
     breakpoints = ArrayField(models.PositiveIntegerField(null=True), default=list)
 
+    COMPRESSED_ENCODING = GZIP_ENCODING
+    # stored in place of the binary trace and the trace index of a json which is not an execution result,
+    # so they are not made again on each request
+    NO_TRACE = b''
+    NO_TRACE_INDEX = {}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # the forms of the old json are out of date once the json is written
+        if update_fields is None or 'json' in update_fields:
+            self.trace = self.compressed_json = self.trace_index = None
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'trace', 'compressed_json', 'trace_index'}
+        super().save(*args, **kwargs)
+
+    def _get_derived_field(self, field_name: str, make: Callable):
+        value = getattr(self, field_name)
+        if value is None:
+            value = make(self.json)
+            setattr(self, field_name, value)
+            self.save(update_fields=[field_name])
+        return value
+
+    def get_trace(self) -> Optional[bytes]:
+        """
+        the binary trace of the json, which is encoded and saved on the first call
+        @return: the binary trace, `None` if the json is not an execution result
+        """
+        trace = self._get_derived_field('trace', lambda result: encode_result_trace(result) or self.NO_TRACE)
+        return bytes(trace) or None
+
+    def get_compressed_json(self) -> bytes:
+        """
+        the json compressed in `COMPRESSED_ENCODING`, which is compressed and saved on the first call
+        @return:
+        """
+        return bytes(self._get_derived_field('compressed_json', compress_result_json))
+
+    def get_trace_index(self) -> Optional[dict]:
+        """
+        the trace index of the json, which is built and saved on the first call
+        @return: the json form of the trace index, `None` if the json is not an execution result
+        """
+        return self._get_derived_field('trace_index',
+                                       lambda result: index_result_json(result) or self.NO_TRACE_INDEX) or None
+
     @property
     def is_published(self) -> bool:
         """
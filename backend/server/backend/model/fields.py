@@ -0,0 +1,21 @@
+from django.db import models
+
+from bundle.utils.serializers import get_serializer
+
+
+class SerializedJSONField(models.JSONField):
+    """
+    A `JSONField` encoded and decoded by the serializer of the bundle,
+    which is much faster than `json` on the large results.
+    """
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        return get_serializer().dumps(value)
+
+    def from_db_value(self, value, expression, connection):
+        # the values which are already decoded by the database driver are kept as they are
+        if not isinstance(value, (str, bytes)):
+            return super().from_db_value(value, expression, connection)
+        # a value which can't be decoded is corrupted, and it's raised instead of served as a string
+        return get_serializer().loads(value)
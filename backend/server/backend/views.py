@@ -1,9 +1,13 @@
 from mimetypes import guess_type
+from uuid import UUID
 
 from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
 
-from backend.model.TutorialRelatedModel import Uploads
+from backend.model.TutorialRelatedModel import Uploads, ExecResultJson
+from backend.model.UserModel import ROLES
+from bundle.utils.compression import negotiate_encoding, decompress
 
 
 def csrf(request: HttpRequest) -> JsonResponse:
@@ -19,3 +23,32 @@ def media_request(request: HttpRequest, url: str) -> HttpResponse:
         except Uploads.DoesNotExist:
             return HttpResponse(status=404)
     return HttpResponse(status=400)
+
+
+def exec_result_request(request: HttpRequest, result_id: UUID) -> HttpResponse:
+    """
+    send the json of an execution result, which is compressed when it's first requested and sent as it is
+    to the clients accepting the encoding
+    """
+    if request.method != 'GET':
+        return HttpResponse(status=400)
+    try:
+        exec_result = ExecResultJson.objects.select_related('code__tutorial', 'graph').get(id=result_id)
+    except ExecResultJson.DoesNotExist:
+        return HttpResponse(status=404)
+
+    user = request.user
+    if (user.is_anonymous or user.role < ROLES.TRANSLATOR) and not exec_result.is_published:
+        return HttpResponse(status=404)
+
+    compressed_json = exec_result.get_compressed_json()
+
+    encoding = ExecResultJson.COMPRESSED_ENCODING
+    if negotiate_encoding(request.headers.get('Accept-Encoding', ''), (encoding,)) == encoding:
+        response = HttpResponse(content=compressed_json, content_type='application/json')
+        # a response with the header is not compressed again by the middlewares
+        response['Content-Encoding'] = encoding
+    else:
+        response = HttpResponse(content=decompress(compressed_json, encoding), content_type='application/json')
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
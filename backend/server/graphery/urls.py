@@ -34,5 +34,6 @@ urlpatterns = [
     url('graphql', GraphQLView.as_view(graphiql=settings.DEBUG)),
     path('csrf', backend_view.csrf),
     path('sitemap.xml', sitemap, {'sitemaps': sitemaps}),
-    path(f'{settings.UPLOAD_STATICS_ENTRY}/<path:url>', backend_view.media_request)
+    path(f'{settings.UPLOAD_STATICS_ENTRY}/<path:url>', backend_view.media_request),
+    path('exec-result/<uuid:result_id>', backend_view.exec_result_request),
 ]
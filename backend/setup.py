@@ -14,6 +14,8 @@ setuptools.setup(
     version="0.21.0",
     packages=setuptools.find_packages(exclude=['tests*']),
     install_requires=read_file('requirements.txt'),
+    # the accelerated json serializer, which is used automatically when it's installed
+    extras_require={'fast': ['orjson>=3.5']},
     author="Heyuan Zeng",
     author_email="zengl@reed.edu",
     description="Backend of Graphery",